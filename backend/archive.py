@@ -0,0 +1,161 @@
+"""
+Запись и воспроизведение страниц конкурентов без обращения к их сайтам
+
+Запись: python -m backend.archive record https://shop.ru/product/1 ...
+    Страница парсится отдельным браузером с включённым performance log; весь
+    сетевой трафик вкладки, DOM и результат парсинга сохраняются в архив (ARCHIVE_DIR).
+
+Воспроизведение: python -m backend.archive replay [архивы...] --repeat 3
+    Архивы раздаются локальным HTTP-сервером, на который Chrome направляет
+    все домены. Парсер работает как обычно, а по итогам выводятся время
+    парсинга и совпадение полей с результатом на момент записи.
+
+Профили загрузки и память селекторов в обоих режимах заморожены: локальные
+тайминги не должны переобучать боевые профили доменов. При воспроизведении
+домен получает профиль загрузки, сохранённый при записи, так что повторные
+прогоны сравнимы; использованные профили и порядок селекторов попадают в отчёт.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+from backend.config import logger, settings
+from backend.services.driver_pool import DriverPool
+from backend.services.load_profiles import LoadProfileStore, load_profiles
+from backend.services.page_archive import PageRecorder, ReplayServer, http_url, page_archives, score
+from backend.services.parsingservice import _init_driver, parse_competitor_data
+from backend.services.selector_memo import selector_memo
+
+
+def _freeze_learning() -> None:
+    load_profiles.frozen = True
+    selector_memo.frozen = True
+
+
+def _pin_profiles(archives: List[Dict[str, Any]]) -> None:
+    """Serve every recorded domain the load profile it was recorded with."""
+    pinned = dict(settings.parser_domain_profiles)
+    for archive in archives:
+        profile = archive.get("load_profile")
+        if profile:
+            pinned[LoadProfileStore.domain(archive["url"])] = {k: v for k, v in profile.items() if k != "source"}
+    settings.parser_domain_profiles = pinned
+
+
+def record(urls: List[str]) -> List[Path]:
+    _freeze_learning()
+    # Запись читает сетевой лог вкладки, даже если блокировка ресурсов выключена
+    pool = DriverPool(lambda: _init_driver(performance_log=True), browsers=1, tabs_per_browser=1)
+    paths = []
+    try:
+        for url in urls:
+            recorder = PageRecorder()
+            profile = asdict(load_profiles.profile_for(url))
+            selectors = selector_memo.selectors_for(url)
+            result = parse_competitor_data(url, pool=pool, recorder=recorder)
+            if recorder.archive is None:
+                logger.error(f"Не удалось записать {url}: {result.get('error')}")
+                continue
+            archive = {**recorder.archive, "load_profile": profile, "selectors": selectors}
+            path = page_archives.save(archive, result)
+            logger.info(f"Записано {len(recorder.archive['responses'])} ответов: {url} -> {path}")
+            paths.append(path)
+    finally:
+        pool.close()
+    return paths
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def replay(paths: List[Path], repeat: int = 1, browsers: int = 1, tabs: int = 1) -> Dict[str, Any]:
+    """Parse every archive ``repeat`` times against the replay server."""
+    archives = [page_archives.load(path) for path in paths]
+    _freeze_learning()
+    _pin_profiles(archives)
+    profiles = {}
+    for archive in archives:
+        selectors = selector_memo.selectors_for(archive["url"])
+        profiles[archive["url"]] = {
+            "load_profile": asdict(load_profiles.profile_for(archive["url"])),
+            "selectors": selectors,
+            # Порядок селекторов не закреплён: расхождение с записью объясняет разницу в полях
+            "selectors_as_recorded": archive["selectors"] == selectors if "selectors" in archive else None,
+        }
+    server = ReplayServer(archives)
+    server.start()
+    pool = DriverPool(lambda: _init_driver(server.chrome_args()), browsers=browsers, tabs_per_browser=tabs)
+    pool.warm_up()
+
+    def run(archive: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.monotonic()
+        result = parse_competitor_data(http_url(archive["url"]), pool=pool)
+        elapsed = time.monotonic() - started
+        return {
+            "url": archive["url"],
+            "latency_ms": round(elapsed * 1000),
+            "nav_ms": result.get("nav_ms"),
+            "ready_wait_ms": result.get("ready_wait_ms"),
+            "status": result.get("parsing_status"),
+            **score(archive.get("expected") or {}, result),
+        }
+
+    try:
+        with ThreadPoolExecutor(max_workers=pool.size) as executor:
+            runs = list(executor.map(run, [archive for _ in range(repeat) for archive in archives]))
+    finally:
+        pool.close()
+        server.stop()
+
+    latencies = [r["latency_ms"] for r in runs]
+    return {
+        "archives": len(archives),
+        "profiles": profiles,
+        "runs": runs,
+        "summary": {
+            "latency_p50_ms": _percentile(latencies, 0.5) if runs else None,
+            "latency_p95_ms": _percentile(latencies, 0.95) if runs else None,
+            "accuracy": round(statistics.mean(r["accuracy"] for r in runs), 3) if runs else None,
+            "unmatched_requests": len(server.misses),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Архивы страниц для офлайн-проверки парсера")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_cmd = commands.add_parser("record", help="Записать страницы в архивы")
+    record_cmd.add_argument("urls", nargs="+")
+    replay_cmd = commands.add_parser("replay", help="Воспроизвести архивы и оценить парсер")
+    replay_cmd.add_argument("archives", nargs="*", type=Path, help="По умолчанию - все архивы в ARCHIVE_DIR")
+    replay_cmd.add_argument("--repeat", type=int, default=1)
+    replay_cmd.add_argument("--browsers", type=int, default=1)
+    replay_cmd.add_argument("--tabs", type=int, default=1)
+    replay_cmd.add_argument("--output", type=Path, help="Сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.urls)
+        return
+    paths = args.archives or page_archives.paths()
+    if not paths:
+        parser.error("Архивы не найдены - сначала выполните record")
+    report = replay(paths, args.repeat, args.browsers, args.tabs)
+    for run in report["runs"]:
+        logger.info(f"{run['url']}: {run['latency_ms']} мс, точность {run['accuracy']:.0%}")
+    logger.info(f"Итого: {json.dumps(report['summary'], ensure_ascii=False)}")
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import logging
 import sys
+from pathlib import Path
+from typing import Any, Dict, List
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -13,9 +15,140 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = Field(..., min_length=1)
     OPENAI_PROXY: str | None = None
     OPENAI_MODEL: str = "gpt-4o"
+    OPENAI_TIMEOUT: float = 60.0
+    # Shared async client: pooled keep-alive connections, HTTP/2 if h2 is installed
+    OPENAI_HTTP2: bool = True
+    OPENAI_MAX_CONNECTIONS: int = 20
+    OPENAI_MAX_KEEPALIVE: int = 10
+    OPENAI_KEEPALIVE_EXPIRY: float = 120.0
+    OPENAI_MAX_RETRIES: int = 2
     history_file: str = "history.json"
     max_history_items: int = 50
 
+    # Parser (shared)
+    parser_timeout: int = 30
+    parser_user_agent: str = (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    )
+
+    # Parser (Playwright)
+    playwright_pool_size: int = 3
+
+    # "inprocess" - parse inside the API process, "queue" - submit to backend.worker
+    parser_mode: str = "inprocess"
+    parser_queue_file: str = "parse_jobs.sqlite3"
+    parser_queue_lease: float = 120.0
+    parser_queue_max_attempts: int = 3
+    parser_queue_wait_timeout: float = 180.0
+
+    # Conditional re-fetch: validators and last payload per URL
+    change_tracking_enabled: bool = True
+    change_tracker_file: str = "url_state.sqlite3"
+
+    # Versioned snapshots: a full keyframe every N versions, zlib deltas in between
+    snapshot_enabled: bool = True
+    snapshot_file: str = "snapshots.sqlite3"
+    snapshot_keyframe_interval: int = 20
+
+    # Screenshots: content-addressed files with downscaled WebP variants
+    screenshot_dir: str = "screenshots"
+    screenshot_index_file: str = "screenshots.sqlite3"
+    screenshot_display_max_side: int = 1280
+    screenshot_vision_max_side: int = 1024
+    screenshot_webp_quality: int = 80
+    screenshot_max_bytes: int = 20_000_000
+
+    # Parse result cache: in-memory LRU in front of an SQLite table
+    parse_cache_enabled: bool = True
+    parse_cache_ttl: float = 3600.0
+    parse_cache_max_items: int = 500
+    parse_cache_file: str = "parse_cache.sqlite3"
+
+    # Sitemap discovery: regexes over the URL path, limits per run
+    discovery_include_patterns: List[str] = [
+        r"/products?/", r"/catalog/.+", r"/p/", r"/item/", r"/goods/", r"/tovar",
+    ]
+    discovery_exclude_patterns: List[str] = [r"/(blog|news|help|search|cart|account)/"]
+    discovery_max_sitemaps: int = 200
+    discovery_max_urls: int = 50000
+    discovery_parse_concurrency: int = 4
+
+    # Watchlist monitoring: adaptive per-URL intervals within a crawl budget
+    watch_enabled: bool = True
+    watch_file: str = "watchlist.sqlite3"
+    watch_default_interval: float = 3600.0
+    watch_min_interval: float = 600.0
+    watch_max_interval: float = 604800.0
+    watch_budget_per_hour: int = 120
+    watch_concurrency: int = 2
+    watch_tick: float = 15.0
+
+    # Request deadline for /parsedemo: below the desktop client's 60 s timeout
+    request_deadline: float = 55.0
+    request_deadline_max: float = 300.0
+    request_disconnect_poll: float = 0.5
+    # AI analysis is skipped if less than this is left of the deadline
+    request_min_analysis_budget: float = 5.0
+
+    # Parser (Selenium): Chrome processes and concurrent tabs in each of them
+    parser_pool_size: int = 3
+    parser_tabs_per_browser: int = 1
+    parser_batch_max_urls: int = 500
+    parser_batch_analyze_concurrency: int = 4
+    parser_checkout_timeout: float = 60.0
+    # Politeness: parallel parses and interval between parse starts per host
+    parser_host_concurrency: int = 2
+    parser_host_min_delay: float = 1.0
+    parser_respect_robots: bool = True
+    parser_robots_ttl: float = 21600.0
+    parser_host_max_crawl_delay: float = 30.0
+    parser_ready_max_wait: float = 5.0
+    parser_ready_quiet_ms: int = 300
+    parser_ready_idle_ms: int = 800
+
+    # Static HTTP tier in front of Selenium
+    parser_static_enabled: bool = True
+    parser_static_timeout: float = 10.0
+    parser_static_max_connections: int = 20
+    parser_static_max_bytes: int = 5_000_000
+    parser_static_required_fields: List[str] = ["title"]
+
+    # Network-level resource blocking (CDP Network.setBlockedURLs)
+    parser_block_enabled: bool = True
+    parser_block_resource_types: List[str] = ["image", "font", "stylesheet", "media"]
+    parser_block_domains: List[str] = [
+        "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+        "googlesyndication.com", "mc.yandex.ru", "an.yandex.ru",
+        "connect.facebook.net", "top-fwz1.mail.ru", "vk.com/rtrg",
+        "hotjar.com", "criteo.com", "adriver.ru",
+    ]
+    # Per-domain allow-overrides: {"shop.ru": ["stylesheet", "cdn.shop.ru"]}
+    parser_block_allow: Dict[str, List[str]] = {}
+
+    # Page-load profiles: defaults, learned per-domain timings and overrides
+    parser_load_strategy: str = "eager"
+    parser_nav_timeout: float = 30.0
+    parser_nav_timeout_min: float = 5.0
+    parser_load_profiles_file: str = "load_profiles.json"
+    # {"slow-shop.ru": {"strategy": "none", "nav_timeout": 8, "ready_max_wait": 2, "stop_early": true}}
+    parser_domain_profiles: Dict[str, Dict[str, Any]] = {}
+
+    # Learned per-domain selector order
+    parser_selector_memo_enabled: bool = True
+    parser_selector_memo_file: str = "selector_memo.json"
+
+    # Recorded page archives for offline replay (python -m backend.archive)
+    archive_dir: str = "archives"
+
+    # Browser recycling: a browser is replaced after any of these limits
+    parser_governor_enabled: bool = True
+    parser_governor_interval: float = 15.0
+    parser_recycle_max_pages: int = 200
+    parser_recycle_max_age: float = 1800.0
+    parser_recycle_max_rss_mb: float = 1024.0
+    parser_recycle_max_error_rate: float = 0.5
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -25,6 +158,17 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
+
+def data_path(name: str) -> Path:
+    """Resolve a data file next to the .exe (PyInstaller) or in the working directory."""
+    path = Path(name)
+    if path.is_absolute():
+        return path
+    if getattr(sys, "frozen", False):
+        # Running as .exe - store next to executable
+        return Path(sys.executable).parent / path
+    return Path.cwd() / path
+
 # Setup logger
 logger = logging.getLogger("competitor_monitor")
 logger.setLevel(logging.INFO)
@@ -1,25 +1,75 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Request
+import asyncio
+import json
+import os
+import re
+import time
+from contextlib import asynccontextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, StreamingResponse
 from typing import Optional
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
 from backend.schemas import AnalyzeRequest, AnalyzeResponse
+from backend.services.change_tracker import change_tracker
+from backend.services.deadline import DeadlineExceeded, budget, current_deadline, deadline_scope
 from backend.services.history_service import history_service
 from backend.services.openai_service import openai_service
+from backend.services.parse_cache import parse_cache
 from backend.services.parsingservice import (
     parse_competitor_data_async,
     get_history as get_parsing_history,
+    browser_governor,
+    driver_pool,
+    host_scheduler,
+    start_parser,
+    stop_parser,
 )
-from backend.config import settings
+from backend.services.job_queue import job_queue
+from backend.services.load_profiles import load_profiles
+from backend.services.parser_service import parser_service
+from backend.services.readiness import readiness_stats
+from backend.services.screenshot_store import ScreenshotError, screenshot_store
+from backend.services.selector_memo import selector_memo
+from backend.services.sitemap_discovery import run_bounded, sitemap_discovery
+from backend.services.snapshot_store import snapshot_store
+from backend.services.timings import (
+    attach_timeline,
+    current_timeline,
+    reset_histograms,
+    span,
+    timeline_scope,
+    timing_histograms,
+)
+from backend.services.watchlist import watch_monitor, watchlist
+from backend.config import logger, settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Прогреваем пул WebDriver и браузер Playwright, чтобы запросы не ждали запуска Chrome
+    await start_parser()
+    await openai_service.start()
+    if os.environ.get("TESTING") != "True":
+        await parser_service.start()
+        if settings.watch_enabled:
+            watch_monitor.start(_watch_check)
+    yield
+    await watch_monitor.stop()
+    await parser_service.stop()
+    await stop_parser()
+    await openai_service.close()
 
 
 # Rate limiting: защита от злоупотреблений
 limiter = Limiter(key_func=get_remote_address)
-app = FastAPI(title="Competitor Analysis API")
+app = FastAPI(title="Competitor Analysis API", lifespan=lifespan)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -34,7 +84,7 @@ app.add_middleware(
         "http://127.0.0.1:3000",
     ],
     allow_credentials=True,
-    allow_methods=["GET", "POST"],
+    allow_methods=["GET", "POST", "DELETE"],
     allow_headers=["Content-Type", "Authorization"],
 )
 
@@ -44,6 +94,31 @@ async def health_check() -> dict[str, str]:
     return {"status": "ok", "service": "competitor-analysis"}
 
 
+@app.get("/parser/stats")
+async def parser_stats() -> dict:
+    """Состояние пула WebDriver, статистика ожидания и профили загрузки доменов"""
+    return {
+        "mode": settings.parser_mode,
+        "pool": driver_pool.stats(),
+        "governor": browser_governor.stats(),
+        "hosts": host_scheduler.stats(),
+        "readiness": readiness_stats(),
+        "load_profiles": load_profiles.snapshot(),
+        "selectors": selector_memo.snapshot(),
+        "queue": await asyncio.to_thread(job_queue.stats),
+        "cache": parse_cache.stats(),
+    }
+
+
+@app.get("/metrics/timings")
+async def metrics_timings(reset: bool = False) -> dict:
+    """Гистограммы длительности этапов парсинга и анализа (мс) с момента запуска или сброса"""
+    stages = timing_histograms()
+    if reset:
+        reset_histograms()
+    return {"stages": stages}
+
+
 # === Новые endpoints из оригинального плана ===
 
 from pydantic import BaseModel
@@ -89,7 +164,7 @@ class ImageAnalysisResponse(BaseModel):
 
 @app.post("/analyze_text", response_model=TextAnalysisResponse)
 @limiter.limit("10/minute")  # Максимум 10 запросов в минуту
-async def analyze_text(request: TextAnalysisRequest, http_request: Request):
+async def analyze_text(payload: TextAnalysisRequest, request: Request):
     """
     Анализ текста конкурента
     
@@ -117,14 +192,13 @@ async def analyze_text(request: TextAnalysisRequest, http_request: Request):
 - Пиши на русском языке
 - Будь конкретен и практичен в рекомендациях"""
 
-        from openai import AsyncOpenAI
-        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        client = openai_service.async_client
         
         response = await client.chat.completions.create(
             model=settings.OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Проанализируй текст конкурента:\n\n{request.text}"}
+                {"role": "user", "content": f"Проанализируй текст конкурента:\n\n{payload.text}"}
             ],
             response_format={"type": "json_object"},
             temperature=0.7,
@@ -146,7 +220,7 @@ async def analyze_text(request: TextAnalysisRequest, http_request: Request):
         # Сохраняем в историю
         history_service.add_entry(
             "analyze_text",
-            request.text[:200],
+            payload.text[:200],
             analysis.summary[:500]
         )
         
@@ -163,7 +237,7 @@ async def analyze_text(request: TextAnalysisRequest, http_request: Request):
 
 @app.post("/analyze_image", response_model=ImageAnalysisResponse)
 @limiter.limit("10/minute")  # Максимум 10 запросов в минуту
-async def analyze_image_endpoint(http_request: Request, file: UploadFile = File(...)):
+async def analyze_image_endpoint(request: Request, file: UploadFile = File(...)):
     """
     Анализ изображения конкурента
     
@@ -182,10 +256,10 @@ async def analyze_image_endpoint(http_request: Request, file: UploadFile = File(
         )
     
     try:
-        # Читаем и кодируем изображение
-        import base64
+        # Сохраняем изображение и отправляем в модель уменьшенный вариант
         content = await file.read()
-        image_base64 = base64.b64encode(content).decode('utf-8')
+        screenshot = await asyncio.to_thread(screenshot_store.save, content)
+        image_url = await asyncio.to_thread(screenshot_store.data_url, screenshot["id"], "vision")
         
         # Промпт для анализа изображения
         system_prompt = """Ты — эксперт по визуальному маркетингу и дизайну. Проанализируй изображение конкурента (баннер, сайт, упаковка товара и т.д.) и верни структурированный JSON-ответ.
@@ -205,8 +279,7 @@ async def analyze_image_endpoint(http_request: Request, file: UploadFile = File(
 - Пиши на русском языке
 - Оценивай: цветовую палитру, типографику, композицию, UX/UI элементы"""
 
-        from openai import AsyncOpenAI
-        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        client = openai_service.async_client
         
         response = await client.chat.completions.create(
             model=settings.OPENAI_MODEL,
@@ -222,7 +295,7 @@ async def analyze_image_endpoint(http_request: Request, file: UploadFile = File(
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:{file.content_type};base64,{image_base64}"
+                                "url": image_url
                             }
                         }
                     ]
@@ -266,38 +339,80 @@ async def analyze_image_endpoint(http_request: Request, file: UploadFile = File(
 @app.post("/api/analyze", response_model=AnalyzeResponse)
 @app.post("/analyze", response_model=AnalyzeResponse)
 async def analyze(request: AnalyzeRequest) -> AnalyzeResponse:
+    """
+    Оценка скриншота сайта
+    
+    Принимает screenshot_id из хранилища скриншотов или base64 изображение.
+    В модель отправляется уменьшенный WebP вариант, а не исходный PNG.
+    """
     try:
-        result = await openai_service.analyze_screenshot(request.base64_image)
+        screenshot_id = request.screenshot_id
+        if screenshot_id is None:
+            screenshot_id = (await asyncio.to_thread(screenshot_store.save_base64, request.base64_image))["id"]
+        image_url = await asyncio.to_thread(screenshot_store.data_url, screenshot_id, "vision")
+        if image_url is None:
+            raise HTTPException(status_code=404, detail="Скриншот не найден")
+        result = await openai_service.analyze_screenshot(image_url)
         return AnalyzeResponse(**result)
+    except ScreenshotError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     except HTTPException:
         raise
     except Exception as exc:  # pragma: no cover - safety net
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
+@app.post("/screenshots")
+@limiter.limit("30/minute")
+async def upload_screenshot(request: Request, file: UploadFile = File(...)) -> dict:
+    """Сохраняет изображение в хранилище скриншотов и возвращает его id"""
+    content = await file.read()
+    try:
+        return await asyncio.to_thread(screenshot_store.save, content)
+    except ScreenshotError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.get("/screenshots/{screenshot_id}")
+async def get_screenshot(screenshot_id: str, variant: str = "display") -> FileResponse:
+    """Файл скриншота: variant = display | vision | thumb | original"""
+    try:
+        found = await asyncio.to_thread(screenshot_store.file, screenshot_id, variant)
+    except ScreenshotError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if found is None or not found[0].exists():
+        raise HTTPException(status_code=404, detail="Скриншот не найден")
+    path, media_type = found
+    # Содержимое адресуется хэшем и никогда не меняется
+    return FileResponse(path, media_type=media_type, headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+
+@app.get("/screenshots/{screenshot_id}/meta")
+async def get_screenshot_meta(screenshot_id: str) -> dict:
+    meta = await asyncio.to_thread(screenshot_store.meta, screenshot_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Скриншот не найден")
+    return meta
+
+
 DEMO_URL = "https://example.com"
 
 
-@app.get("/parsedemo")
-@limiter.limit("5/minute")  # Максимум 5 запросов в минуту (парсинг медленный)
-async def parse_demo(http_request: Request, url: Optional[str] = None, analyze: bool = True) -> dict:
-    """
-    Парсинг сайта конкурента с опциональным AI анализом
-    
-    Parameters:
-    - url: URL для парсинга
-    - analyze: Если True, отправляет данные в OpenAI для анализа (по умолчанию True)
-    """
-    target_url = url or DEMO_URL
-    data = await parse_competitor_data_async(target_url)
-    
-    # Если парсинг успешен и analyze=True, отправляем в OpenAI
+async def _analyze_parsed_data(url: str, data: dict) -> dict | None:
+    """Отправляет распарсенные данные в OpenAI; None, если анализировать нечего"""
     ai_analysis = None
-    if analyze and data.get("parsing_status") in ["success", "partial"]:
+    if data.get("parsing_status") in ["success", "partial"]:
+        # Не начинаем платный запрос, на который у клиента уже не хватит времени
+        timeout = budget(settings.OPENAI_TIMEOUT)
+        if timeout < settings.request_min_analysis_budget:
+            return {
+                "error": "deadline",
+                "note": f"AI анализ пропущен: до конца запроса осталось {timeout:.1f} с",
+            }
         try:
             # Формируем текст для анализа из распарсенных данных
             analysis_text = f"""
-Сайт конкурента: {target_url}
+Сайт конкурента: {url}
 
 Заголовок страницы: {data.get('page_title', 'N/A')}
 Название товара/раздела: {data.get('product_name', 'N/A')}
@@ -305,25 +420,8 @@ async def parse_demo(http_request: Request, url: Optional[str] = None, analyze:
 Описание: {data.get('description', 'N/A')[:500]}
 """
             
-            # Отправляем в OpenAI для анализа
-            from openai import AsyncOpenAI
-            import json
-            import httpx
-            
-            # Настраиваем клиент с прокси, если он указан
-            http_client = None
-            if settings.OPENAI_PROXY:
-                try:
-                    transport = httpx.AsyncHTTPTransport(proxy=settings.OPENAI_PROXY)
-                    http_client = httpx.AsyncClient(transport=transport, timeout=30.0)
-                except Exception as proxy_error:
-                    print(f"⚠️ Ошибка настройки прокси: {proxy_error}")
-                    print("Попытка подключения без прокси...")
-            
-            client = AsyncOpenAI(
-                api_key=settings.OPENAI_API_KEY,
-                http_client=http_client
-            )
+            # Отправляем в OpenAI через общий клиент (прокси и пул соединений настроены в нём)
+            client = openai_service.async_client
             
             system_prompt = """Ты — эксперт по конкурентному анализу. Проанализируй предоставленную информацию о сайте конкурента и верни структурированный JSON-ответ.
 
@@ -342,16 +440,18 @@ async def parse_demo(http_request: Request, url: Optional[str] = None, analyze:
 - Будь конкретен и практичен в рекомендациях
 - Анализируй на основе предоставленных данных"""
 
-            response = await client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Проанализируй информацию о конкуренте:\n\n{analysis_text}"}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.7,
-                max_tokens=2000
-            )
+            with span("openai", model=settings.OPENAI_MODEL):
+                response = await client.chat.completions.create(
+                    model=settings.OPENAI_MODEL,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": f"Проанализируй информацию о конкуренте:\n\n{analysis_text}"}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=0.7,
+                    max_tokens=2000,
+                    timeout=timeout,
+                )
             
             content = response.choices[0].message.content or "{}"
             ai_analysis = json.loads(content)
@@ -369,9 +469,412 @@ async def parse_demo(http_request: Request, url: Optional[str] = None, analyze:
                 "hint": "Проверьте OPENAI_API_KEY и OPENAI_PROXY в .env файле"
             }
     
+    return ai_analysis
+
+
+async def _parse_and_analyze(
+    url: str,
+    analyze: bool,
+    analyze_semaphore: asyncio.Semaphore | None = None,
+) -> dict:
+    """
+    Парсинг с AI анализом и пропуском неизменившихся страниц
+    
+    Сначала выполняется дешёвый условный запрос (ETag / Last-Modified / хэш
+    контента). Если страница не менялась, возвращается сохранённый результат
+    вместе с прежним анализом, без Selenium и OpenAI.
+    """
+    probe = None
+    tracking = settings.change_tracking_enabled and os.environ.get("TESTING") != "True"
+    # Пробный запрос - тоже обращение к сайту: он и парсинг идут в одном слоте хоста
+    async with host_scheduler.slot(url) if tracking else nullcontext():
+        if tracking:
+            with span("change_probe") as details:
+                probe = await change_tracker.probe(url)
+                details["status"] = probe.status if probe is not None else None
+        if probe is None or not probe.unchanged:
+            data = await parse_competitor_data_async(url, html=probe.html if probe else None)
+            if probe is not None:
+                data["change_status"] = probe.status
+    
+    if probe is not None and probe.unchanged:
+        data = probe.previous
+        data["change_status"] = "unchanged"
+        if not analyze or data.get("ai_analysis"):
+            return data
+    
+    # Если парсинг успешен и analyze=True, отправляем в OpenAI
+    ai_analysis = None
+    if analyze:
+        with span("analysis"):
+            if analyze_semaphore is not None:
+                async with analyze_semaphore:
+                    ai_analysis = await _analyze_parsed_data(url, data)
+            else:
+                ai_analysis = await _analyze_parsed_data(url, data)
+    
     # Добавляем AI анализ к результатам
     if ai_analysis:
         data["ai_analysis"] = ai_analysis
     
+    # Результат, обрезанный дедлайном, не должен попасть в историю изменений
+    complete = not data.get("deadline_shortened")
+    if probe is not None and complete and not (ai_analysis or {}).get("error"):
+        await change_tracker.record(url, probe, data)
+    if settings.snapshot_enabled and complete and not (probe is not None and probe.unchanged):
+        with span("snapshot"):
+            data["changes"] = await asyncio.to_thread(snapshot_store.record, url, data)
+    return data
+
+
+def _is_cacheable(data: dict) -> bool:
+    if data.get("parsing_status") not in ("success", "partial") or data.get("deadline_shortened"):
+        return False
+    return not (data.get("ai_analysis") or {}).get("error")
+
+
+async def _cached_parse(
+    url: str,
+    analyze: bool,
+    max_age: float | None = None,
+    force_refresh: bool = False,
+    analyze_semaphore: asyncio.Semaphore | None = None,
+) -> tuple[dict, dict]:
+    """
+    Парсинг через кэш результатов
+    
+    Одинаковые одновременные запросы объединяются в один парсинг. Возвращает
+    (данные, информация о кэше: hit / miss / coalesced / disabled).
+    """
+    timeline = current_timeline()
+    
+    async def compute() -> dict:
+        # Общий парсинг идёт в чистом контексте (без дедлайна запроса); его этапы
+        # попадают в тайминги запроса, который его начал
+        with attach_timeline(timeline):
+            return await _parse_and_analyze(url, analyze, analyze_semaphore)
+    
+    if not settings.parse_cache_enabled:
+        return await compute(), {"status": "disabled"}
+    return await parse_cache.get_or_compute(
+        f"{url}|analyze={int(analyze)}",
+        compute,
+        max_age=max_age,
+        force_refresh=force_refresh,
+        cacheable=_is_cacheable,
+    )
+
+
+async def _until_disconnected(http_request: Request, coro):
+    """
+    Выполняет работу запроса, пока клиент подключён и не истёк дедлайн
+    
+    Если клиент закрыл соединение или время вышло, задача отменяется: отмена
+    доходит до потока Selenium через дедлайн, и драйвер сразу возвращается в пул.
+    """
+    task = asyncio.create_task(coro)
+    deadline = current_deadline()
+    # Запас после дедлайна: этапы сами укладываются в него и отдают частичный результат
+    hard_stop = None if deadline is None or deadline.expires_at is None else deadline.expires_at + 1.0
+    try:
+        while True:
+            wait = settings.request_disconnect_poll
+            if hard_stop is not None:
+                wait = max(0.0, min(wait, hard_stop - time.monotonic()))
+            done, _ = await asyncio.wait({task}, timeout=wait)
+            if done:
+                try:
+                    return task.result()
+                except DeadlineExceeded:
+                    # Общий парсинг не успел за дедлайн этого запроса
+                    raise HTTPException(status_code=504, detail="Время запроса истекло")
+            if await http_request.is_disconnected():
+                logger.info("Клиент отключился, отменяем парсинг")
+                raise HTTPException(status_code=499, detail="Клиент закрыл соединение")
+            if hard_stop is not None and time.monotonic() >= hard_stop:
+                raise HTTPException(status_code=504, detail="Время запроса истекло")
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+@app.get("/parsedemo")
+@limiter.limit("5/minute")  # Максимум 5 запросов в минуту (парсинг медленный)
+async def parse_demo(
+    request: Request,
+    url: Optional[str] = None,
+    analyze: bool = True,
+    max_age: Optional[float] = None,
+    force_refresh: bool = False,
+    timeout: Optional[float] = Query(None, gt=0),
+    debug: bool = False,
+) -> dict:
+    """
+    Парсинг сайта конкурента с опциональным AI анализом
+    
+    Parameters:
+    - url: URL для парсинга
+    - analyze: Если True, отправляет данные в OpenAI для анализа (по умолчанию True)
+    - max_age: Максимальный возраст результата из кэша в секундах
+    - force_refresh: Если True, кэш не используется и страница парсится заново
+    - timeout: Бюджет времени запроса в секундах; загрузка, ожидание и AI анализ
+      укладываются в него, а при отключении клиента работа прекращается
+    - debug: Если True, в ответ добавляются тайминги этапов (timings)
+    """
+    target_url = url or DEMO_URL
+    with timeline_scope(debug) as timeline, span("parsedemo") as details:
+        with deadline_scope(min(timeout or settings.request_deadline, settings.request_deadline_max)):
+            data, cache_info = await _until_disconnected(
+                request, _cached_parse(target_url, analyze, max_age, force_refresh)
+            )
+        details["cache"] = cache_info.get("status")
+    
     history_service.add_entry("parsedemo", target_url[:1000], str(data)[:1000])
-    return {"url": target_url, "data": data, "history": get_parsing_history()}
\ No newline at end of file
+    response = {"url": target_url, "data": data, "cache": cache_info, "history": get_parsing_history()}
+    if timeline is not None:
+        response["timings"] = timeline.spans()
+    return response
+
+class BatchParseRequest(BaseModel):
+    """Запрос на пакетный парсинг"""
+    urls: List[str]
+    analyze: bool = False
+    max_age: Optional[float] = None
+    force_refresh: bool = False
+
+
+@app.post("/parse/batch")
+@limiter.limit("2/minute")
+async def parse_batch(payload: BatchParseRequest, request: Request) -> StreamingResponse:
+    """
+    Пакетный парсинг списка URL конкурентов
+    
+    URL распределяются по общему бюджету параллельности парсера, а каждый
+    результат отправляется клиенту отдельной строкой NDJSON сразу после
+    завершения - не дожидаясь самого медленного сайта.
+    """
+    urls = list(dict.fromkeys(u.strip() for u in payload.urls if u.strip()))
+    if not urls:
+        raise HTTPException(status_code=400, detail="Список URL пуст")
+    if len(urls) > settings.parser_batch_max_urls:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Слишком много URL: максимум {settings.parser_batch_max_urls}"
+        )
+    
+    # AI анализ ограничиваем отдельно, чтобы не упереться в лимиты OpenAI
+    analyze_semaphore = asyncio.Semaphore(settings.parser_batch_analyze_concurrency)
+    
+    async def run(target_url: str) -> dict:
+        try:
+            data, cache_info = await _cached_parse(
+                target_url, payload.analyze, payload.max_age, payload.force_refresh, analyze_semaphore
+            )
+            return {"url": target_url, "data": data, "cache": cache_info}
+        except Exception as e:
+            logger.error(f"Пакетный парсинг {target_url} не удался: {str(e)}")
+            return {"url": target_url, "error": str(e)}
+    
+    async def stream():
+        tasks = [asyncio.create_task(run(u)) for u in urls]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished, ensure_ascii=False) + "\n"
+        finally:
+            # Клиент отключился - не продолжаем парсинг впустую
+            for task in tasks:
+                task.cancel()
+        history_service.add_entry("parse_batch", f"{len(urls)} URL", ", ".join(urls)[:1000])
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+class DiscoverRequest(BaseModel):
+    """Поиск товаров конкурента через robots.txt и sitemap"""
+    target: str
+    include: Optional[List[str]] = None
+    exclude: Optional[List[str]] = None
+    lastmod_days: Optional[float] = None
+    include_undated: bool = True
+    limit: Optional[int] = None
+    parse: bool = False
+    analyze: bool = False
+    watch: bool = False
+
+
+@app.post("/discover")
+@limiter.limit("2/minute")
+async def discover(payload: DiscoverRequest, request: Request) -> StreamingResponse:
+    """
+    Поиск URL товаров конкурента по его sitemap
+    
+    target - домен, адрес сайта или прямая ссылка на sitemap. Найденные URL
+    отдаются строками NDJSON по мере чтения sitemap. С parse=True каждый URL
+    сразу парсится (с ограниченной параллельностью), с watch=True - добавляется
+    в список наблюдения.
+    """
+    since = None
+    if payload.lastmod_days is not None:
+        since = datetime.now(timezone.utc) - timedelta(days=payload.lastmod_days)
+    limit = payload.limit or settings.discovery_max_urls
+    if payload.parse:
+        limit = min(limit, settings.parser_batch_max_urls)
+    for pattern in (payload.include or []) + (payload.exclude or []):
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise HTTPException(status_code=400, detail=f"Некорректный шаблон {pattern!r}: {str(e)}")
+    entries = sitemap_discovery.discover(
+        payload.target,
+        include=payload.include,
+        exclude=payload.exclude,
+        since=since,
+        include_undated=payload.include_undated,
+        limit=limit,
+    )
+    
+    async def handle(entry: dict) -> dict:
+        if payload.watch:
+            await asyncio.to_thread(watchlist.add, entry["url"], payload.analyze)
+        if payload.parse:
+            data, cache_info = await _cached_parse(entry["url"], payload.analyze)
+            return {**entry, "data": data, "cache": cache_info}
+        return entry
+    
+    async def stream():
+        count = 0
+        try:
+            async for result in run_bounded(entries, handle, settings.discovery_parse_concurrency):
+                if "url" in result:
+                    count += 1
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        except Exception as e:
+            # Ответ уже начат - статус не поменять, сообщаем об ошибке последней строкой
+            logger.error(f"Поиск URL по sitemap прерван: {str(e)}")
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+        history_service.add_entry("discover", payload.target[:1000], f"Найдено URL: {count}")
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+async def _watch_check(url: str, analyze: bool) -> dict:
+    """Плановая проверка URL из списка наблюдения (в обход кэша)"""
+    data, _ = await _cached_parse(url, analyze, force_refresh=True)
+    return data
+
+
+class WatchlistAddRequest(BaseModel):
+    """Добавление URL в список наблюдения"""
+    urls: List[str]
+    analyze: bool = False
+    interval: Optional[float] = None
+
+
+@app.get("/watchlist")
+async def get_watchlist(limit: int = 1000, offset: int = 0) -> dict:
+    """Список наблюдения с текущими интервалами проверки и состоянием планировщика"""
+    items = await asyncio.to_thread(watchlist.entries, limit, offset)
+    stats = await asyncio.to_thread(watchlist.stats)
+    return {"items": items, "stats": {**stats, **watch_monitor.stats()}}
+
+
+@app.post("/watchlist")
+@limiter.limit("10/minute")
+async def add_to_watchlist(payload: WatchlistAddRequest, request: Request) -> dict:
+    """
+    Добавляет URL в список наблюдения
+    
+    interval - начальный интервал проверки в секундах; дальше он подстраивается
+    под частоту изменений страницы.
+    """
+    urls = list(dict.fromkeys(u.strip() for u in payload.urls if u.strip()))
+    if not urls:
+        raise HTTPException(status_code=400, detail="Список URL пуст")
+    items = []
+    for target_url in urls:
+        items.append(await asyncio.to_thread(watchlist.add, target_url, payload.analyze, payload.interval))
+    return {"items": items}
+
+
+@app.delete("/watchlist")
+async def remove_from_watchlist(url: str) -> dict:
+    """Удаляет URL из списка наблюдения"""
+    if not await asyncio.to_thread(watchlist.remove, url):
+        raise HTTPException(status_code=404, detail="URL нет в списке наблюдения")
+    return {"status": "removed", "url": url}
+
+
+def _parse_since(since: str) -> float:
+    try:
+        return float(since)
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(since.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since: ожидается ISO дата или Unix время")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+@app.get("/changes")
+async def get_changes(
+    since: str,
+    url: Optional[str] = None,
+    field: Optional[List[str]] = Query(None),
+    limit: int = 1000,
+) -> dict:
+    """
+    Изменения полей страниц после момента since
+    
+    since - ISO дата или Unix время. Ответ строится по таблице изменений,
+    без восстановления снимков.
+    """
+    changes = await asyncio.to_thread(
+        snapshot_store.changes_since, _parse_since(since), url, field, min(limit, 10000)
+    )
+    return {"since": since, "count": len(changes), "changes": changes}
+
+
+@app.get("/snapshots")
+async def get_snapshots(url: str, version: Optional[int] = None) -> dict:
+    """Версии снимков URL или содержимое конкретной версии"""
+    if version is None:
+        return {"url": url, "versions": await asyncio.to_thread(snapshot_store.versions, url)}
+    snapshot = await asyncio.to_thread(snapshot_store.get_version, url, version)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Версия не найдена")
+    return {"url": url, "version": version, "data": snapshot}
+
+
+class JobSubmitRequest(BaseModel):
+    """Постановка URL в очередь воркеров"""
+    urls: List[str]
+
+
+@app.post("/jobs")
+@limiter.limit("10/minute")
+async def submit_jobs(payload: JobSubmitRequest, request: Request) -> dict:
+    """Ставит URL в очередь парсинга; результаты забираются через GET /jobs/{job_id}"""
+    urls = [u.strip() for u in payload.urls if u.strip()]
+    if not urls or len(urls) > settings.parser_batch_max_urls:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Нужно от 1 до {settings.parser_batch_max_urls} URL"
+        )
+    jobs = []
+    for target_url in urls:
+        job_id = await asyncio.to_thread(job_queue.submit, target_url)
+        jobs.append({"id": job_id, "url": target_url})
+    return {"jobs": jobs}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> dict:
+    """Статус и результат задачи парсинга"""
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return job
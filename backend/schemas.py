@@ -1,12 +1,19 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class AnalyzeRequest(BaseModel):
-    base64_image: str = Field(..., description="Image encoded as data URL or plain base64 string")
+    base64_image: Optional[str] = Field(None, description="Image encoded as data URL or plain base64 string")
+    screenshot_id: Optional[str] = Field(None, description="Id of an image in the screenshot store")
+
+    @model_validator(mode="after")
+    def _one_image(self) -> "AnalyzeRequest":
+        if not self.base64_image and not self.screenshot_id:
+            raise ValueError("Either base64_image or screenshot_id is required")
+        return self
 
 
 class AnalyzeResponse(BaseModel):
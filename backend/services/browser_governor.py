@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Set, Tuple
+
+import psutil
+
+from backend.config import settings
+from backend.services.driver_pool import DriverPool, _Browser
+
+logger = logging.getLogger(__name__)
+
+# Метка в командной строке Chrome: по ней находим свои процессы после падения chromedriver
+OWNER_FLAG = f"--competitor-monitor-owner={os.getpid()}"
+
+_MIN_OUTCOMES = 5
+_DRIVER_NAMES = ("chromedriver", "chromedriver.exe")
+
+
+def _tree(pid: int | None) -> List[psutil.Process]:
+    if pid is None:
+        return []
+    try:
+        root = psutil.Process(pid)
+        return [root, *root.children(recursive=True)]
+    except psutil.Error:
+        return []
+
+
+def _rss_mb(processes: List[psutil.Process]) -> float:
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+class BrowserGovernor:
+    """Background thread recycling pooled browsers before they degrade.
+
+    A browser is retired once it has served ``parser_recycle_max_pages``
+    pages, lived ``parser_recycle_max_age`` seconds, grown its process tree
+    beyond ``parser_recycle_max_rss_mb`` or failed too large a share of its
+    recent parses. A replacement is launched right away, and the old browser
+    is quit when its last busy tab is returned, so requests never wait for a
+    cold start. Each pass also reaps zombie children and kills Chrome and
+    chromedriver processes left behind by crashed sessions.
+    """
+
+    def __init__(self, pool: DriverPool) -> None:
+        self.pool = pool
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._health: List[Dict[str, Any]] = []
+        self._recycled: Dict[str, int] = {}
+        self._reaped = 0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="browser-governor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.parser_governor_interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Ошибка контроля браузеров: {str(e)}")
+
+    def _reason(self, browser: _Browser, rss_mb: float) -> Tuple[str, str] | None:
+        """``(limit, message)`` for the first limit the browser exceeds."""
+        if browser.pages >= settings.parser_recycle_max_pages:
+            return "pages", f"обслужено {browser.pages} страниц"
+        if time.monotonic() - browser.launched_at >= settings.parser_recycle_max_age:
+            return "age", "превышен возраст"
+        if rss_mb >= settings.parser_recycle_max_rss_mb:
+            return "rss", f"память {rss_mb:.0f} МБ"
+        if len(browser.outcomes) >= _MIN_OUTCOMES and browser.error_rate >= settings.parser_recycle_max_error_rate:
+            return "errors", f"доля ошибок {browser.error_rate:.0%}"
+        return None
+
+    def check(self) -> None:
+        """One governor pass: measure, recycle, reap."""
+        health: List[Dict[str, Any]] = []
+        known: Set[int] = set()
+        retired_any = False
+        for browser in self.pool.browsers():
+            processes = _tree(browser.pid)
+            known.update(p.pid for p in processes)
+            rss_mb = _rss_mb(processes)
+            exceeded = None if browser.retired else self._reason(browser, rss_mb)
+            if exceeded is not None:
+                limit, message = exceeded
+                self.pool.retire(browser, message)
+                retired_any = True
+                with self._lock:
+                    self._recycled[limit] = self._recycled.get(limit, 0) + 1
+            health.append({
+                "pid": browser.pid,
+                "processes": len(processes),
+                "rss_mb": round(rss_mb, 1),
+                "pages": browser.pages,
+                "age": round(time.monotonic() - browser.launched_at),
+                "error_rate": round(browser.error_rate, 2),
+                "busy": browser.busy,
+                "retired": browser.retired,
+                "retire_reason": browser.retire_reason,
+            })
+        with self._lock:
+            self._health = health
+
+        reaped = self._reap(known)
+        if reaped:
+            with self._lock:
+                self._reaped += reaped
+            logger.warning(f"Завершено осиротевших процессов браузера: {reaped}")
+        if retired_any:
+            # Замена запускается сразу, а не при следующем запросе
+            self.pool.warm_up()
+
+    @staticmethod
+    def _reap(known: Set[int]) -> int:
+        """Reap zombie children and kill our Chrome/chromedriver processes no browser owns."""
+        reaped = 0
+        try:
+            children = psutil.Process().children(recursive=False)
+        except psutil.Error:
+            children = []
+        for child in children:
+            try:
+                if child.status() == psutil.STATUS_ZOMBIE:
+                    child.wait(timeout=0)
+                    reaped += 1
+            except (psutil.Error, psutil.TimeoutExpired):
+                continue
+
+        for process in psutil.process_iter(["pid", "name", "cmdline", "ppid"]):
+            info = process.info
+            if info["pid"] in known:
+                continue
+            name = (info["name"] or "").lower()
+            cmdline = info["cmdline"] or []
+            ours = OWNER_FLAG in cmdline or (name in _DRIVER_NAMES and info["ppid"] == os.getpid())
+            if not ours:
+                continue
+            try:
+                # Процесс ещё может создаваться прямо сейчас - даём ему время
+                if time.time() - process.create_time() < settings.parser_governor_interval:
+                    continue
+                process.kill()
+                reaped += 1
+            except psutil.Error:
+                continue
+        return reaped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "browsers": list(self._health),
+                "recycled": dict(self._recycled),
+                "reaped_processes": self._reaped,
+                "running": self._thread is not None,
+            }
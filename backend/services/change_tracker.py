@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+import httpx
+
+from backend.config import settings
+from backend.services.deadline import budget, ensure_alive
+from backend.services.sqlite_store import SQLiteStore
+from backend.services.static_fetcher import static_fetcher
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS url_state (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    payload TEXT NOT NULL,
+    checked_at REAL NOT NULL,
+    changed_at REAL NOT NULL
+);
+"""
+
+# Нормализация: убираем то, что меняется без изменения контента (скрипты,
+# CSRF-токены, комментарии), и сравниваем видимый текст плюс адреса картинок
+_NOISE = re.compile(
+    r"<script\b.*?</script>|<style\b.*?</style>|<noscript\b.*?</noscript>|<!--.*?-->"
+    r"|<input\b[^>]*type=[\"']?hidden[^>]*>",
+    re.I | re.S,
+)
+_IMG_SRC = re.compile(r"<img\b[^>]*?\bsrc=[\"']([^\"']+)", re.I)
+_TAG = re.compile(r"<[^>]+>")
+_SPACES = re.compile(r"\s+")
+
+
+def content_hash(html: str) -> str:
+    """Hash of the page's visible text and image sources."""
+    cleaned = _NOISE.sub(" ", html)
+    images = " ".join(_IMG_SRC.findall(cleaned))
+    text = _SPACES.sub(" ", _TAG.sub(" ", cleaned)).strip()
+    return hashlib.sha256(f"{text}\n{images}".encode("utf-8", "replace")).hexdigest()
+
+
+@dataclass
+class ProbeResult:
+    status: str  # "new" | "unchanged" | "changed" | "unknown"
+    previous: Dict[str, Any] | None = None
+    html: str | None = None
+    validators: Dict[str, str | None] = field(default_factory=dict)
+
+    @property
+    def unchanged(self) -> bool:
+        return self.status == "unchanged"
+
+
+class ChangeTracker(SQLiteStore):
+    """Per-URL validators (ETag, Last-Modified, content hash) and last payload.
+
+    ``probe`` issues one conditional GET through the shared static-tier HTTP
+    client. A 304 or an identical normalized content hash means the stored
+    payload (with its AI analysis) can be returned as is - but only when that
+    payload came from the static tier; browser-tier payloads always get
+    reparsed. Otherwise the fetched HTML is handed back so the parser does
+    not download it again.
+    """
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self) -> None:
+        super().__init__(settings.change_tracker_file)
+
+    def _get(self, url: str) -> Dict[str, Any] | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM url_state WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def _touch(self, url: str, validators: Dict[str, str | None]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE url_state SET etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified), checked_at = ? WHERE url = ?",
+                (validators.get("etag"), validators.get("last_modified"), time.time(), url),
+            )
+
+    def _save(self, url: str, validators: Dict[str, str | None], payload: Dict[str, Any], changed: bool) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO url_state (url, etag, last_modified, content_hash, payload, checked_at, changed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified, "
+                "content_hash = COALESCE(excluded.content_hash, url_state.content_hash), "
+                "payload = excluded.payload, checked_at = excluded.checked_at, "
+                "changed_at = CASE WHEN ? THEN excluded.changed_at ELSE url_state.changed_at END",
+                (
+                    url,
+                    validators.get("etag"),
+                    validators.get("last_modified"),
+                    validators.get("content_hash"),
+                    json.dumps(payload, ensure_ascii=False),
+                    now,
+                    now,
+                    changed,
+                ),
+            )
+
+    async def probe(self, url: str) -> ProbeResult:
+        state = await asyncio.to_thread(self._get, url)
+        previous = json.loads(state["payload"]) if state else None
+        # Данные из браузера дорисованы скриптами: неизменный HTML-каркас
+        # ничего не говорит о цене и названии, такую страницу парсим заново
+        trusted = previous is not None and previous.get("fetch_tier") == "static"
+
+        headers = {}
+        if trusted and state["etag"]:
+            headers["If-None-Match"] = state["etag"]
+        if trusted and state["last_modified"]:
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        ensure_alive("change_probe")
+        timeout = budget(settings.parser_static_timeout)
+        try:
+            async with static_fetcher.client.stream("GET", url, headers=headers, timeout=timeout) as response:
+                validators = {
+                    "etag": response.headers.get("etag"),
+                    "last_modified": response.headers.get("last-modified"),
+                }
+                if response.status_code == 304 and trusted:
+                    await asyncio.to_thread(self._touch, url, validators)
+                    return ProbeResult("unchanged", previous, validators=validators)
+                if response.status_code != 200 or "html" not in response.headers.get("content-type", ""):
+                    return ProbeResult("unknown" if state else "new", previous)
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) > settings.parser_static_max_bytes:
+                        return ProbeResult("unknown" if state else "new", previous)
+                html = body.decode(response.encoding or "utf-8", errors="replace")
+        except httpx.HTTPError as e:
+            # Таймаут, урезанный дедлайном, - это конец запроса, а не сбой сайта
+            ensure_alive("change_probe")
+            logger.info(f"Условный запрос не удался для {url}: {str(e)}")
+            return ProbeResult("unknown" if state else "new", previous)
+
+        validators["content_hash"] = await asyncio.to_thread(content_hash, html)
+        if state and validators["content_hash"] == state["content_hash"]:
+            if not trusted:
+                return ProbeResult("unknown", previous, html=html, validators=validators)
+            await asyncio.to_thread(self._touch, url, validators)
+            return ProbeResult("unchanged", previous, html=html, validators=validators)
+        return ProbeResult("changed" if state else "new", previous, html=html, validators=validators)
+
+    async def record(self, url: str, probe: ProbeResult, payload: Dict[str, Any]) -> None:
+        """Store the validators from ``probe`` together with the final payload."""
+        if payload.get("parsing_status") not in ("success", "partial"):
+            return
+        await asyncio.to_thread(self._save, url, probe.validators, payload, not probe.unchanged)
+
+
+change_tracker = ChangeTracker()
@@ -0,0 +1,107 @@
+"""Per-request time budget shared by every stage of a parse.
+
+An endpoint opens a ``deadline_scope``; the deadline travels in a context
+variable through ``asyncio`` tasks and ``asyncio.to_thread`` into the
+Selenium thread. Stages cap their own timeouts with ``budget``, report a
+cut with ``note_shortened`` and stop at ``ensure_alive``. A cancelled
+deadline (client disconnected) makes blocking loops in worker threads give
+up at their next poll, since threads can't be cancelled from the event loop.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List
+
+_current: ContextVar["Deadline | None"] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    """Absolute expiry plus a cancel flag; a child never outlives its parent."""
+
+    def __init__(self, seconds: float | None = None, parent: "Deadline | None" = None) -> None:
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+        self.parent = parent
+        self.shortened: List[str] = []
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def remaining(self) -> float | None:
+        """Seconds left; ``None`` when unbounded, ``0`` once cancelled."""
+        if self.cancelled:
+            return 0.0
+        left = None if self.expires_at is None else max(0.0, self.expires_at - time.monotonic())
+        if self.parent is not None:
+            parent_left = self.parent.remaining()
+            if parent_left is not None:
+                left = parent_left if left is None else min(left, parent_left)
+        return left
+
+    @property
+    def expired(self) -> bool:
+        left = self.remaining()
+        return left is not None and left <= 0
+
+    def note_shortened(self, stage: str) -> None:
+        if stage not in self.shortened:
+            self.shortened.append(stage)
+        if self.parent is not None:
+            self.parent.note_shortened(stage)
+
+
+def current_deadline() -> Deadline | None:
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(seconds: float | None = None) -> Iterator[Deadline]:
+    """Run the block under a deadline nested in the current one."""
+    deadline = Deadline(seconds, parent=_current.get())
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def budget(timeout: float) -> float:
+    """``timeout`` capped by the time left in the current deadline."""
+    deadline = _current.get()
+    left = None if deadline is None else deadline.remaining()
+    return timeout if left is None else min(timeout, left)
+
+
+def note_shortened(stage: str) -> None:
+    """Mark that ``stage`` stopped early because of the deadline."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.note_shortened(stage)
+
+
+def cancelled() -> bool:
+    deadline = _current.get()
+    return deadline is not None and deadline.cancelled
+
+
+def ensure_alive(stage: str) -> None:
+    """Raise ``DeadlineExceeded`` if the request was cancelled or ran out of time."""
+    deadline = _current.get()
+    if deadline is None:
+        return
+    if deadline.cancelled:
+        raise DeadlineExceeded(f"Запрос отменён перед этапом {stage}")
+    if deadline.expired:
+        deadline.note_shortened(stage)
+        raise DeadlineExceeded(f"Время запроса истекло перед этапом {stage}")
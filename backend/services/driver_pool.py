@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Set
+from urllib.parse import urlsplit
+
+from selenium import webdriver
+
+from backend.services.timings import span
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних парсингов учитывается в доле ошибок браузера
+_OUTCOME_WINDOW = 20
+
+
+class _Browser:
+    """One Chrome process and the bookkeeping for its tabs."""
+
+    def __init__(self, driver: webdriver.Chrome) -> None:
+        self.driver = driver
+        # WebDriver-сессия обслуживает одну вкладку за раз: команды вкладок сериализуются
+        self.lock = threading.RLock()
+        self.current = driver.current_window_handle
+        self.handles: Set[str] = {self.current}
+        self.idle_handles: List[str] = [self.current]
+        self.busy = 0
+        self.retired = False
+        self.log_buffers: Dict[str, List[Dict[str, Any]]] = {}
+        # Счётчики для BrowserGovernor
+        self.launched_at = time.monotonic()
+        self.pages = 0
+        self.outcomes: Deque[bool] = deque(maxlen=_OUTCOME_WINDOW)
+        self.retire_reason: str | None = None
+
+    @property
+    def pid(self) -> int | None:
+        """PID of the chromedriver process (Chrome runs as its child)."""
+        process = getattr(getattr(self.driver, "service", None), "process", None)
+        return getattr(process, "pid", None)
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def focus(self, handle: str) -> None:
+        """Switch the session to ``handle``; caller must hold ``lock``."""
+        if self.current != handle:
+            self.driver.switch_to.window(handle)
+            self.current = handle
+
+    def drain_performance_log(self) -> None:
+        """Move new performance log entries into per-tab buffers; caller holds ``lock``."""
+        for entry in self.driver.get_log("performance"):
+            try:
+                webview = json.loads(entry["message"]).get("webview")
+            except (KeyError, ValueError):
+                continue
+            self.log_buffers.setdefault(webview, []).append(entry)
+
+
+class BrowserTab:
+    """A pooled tab exposing the subset of the WebDriver API the parser uses.
+
+    Every command switches the shared session to this tab under the browser
+    lock, so several threads can drive different tabs of one Chrome process.
+    Navigation must not block the session, which is why pooled drivers run
+    with the ``none`` page-load strategy.
+    """
+
+    def __init__(self, browser: _Browser, handle: str) -> None:
+        self.browser = browser
+        self.handle = handle
+
+    def _call(self, name: str, *args: Any) -> Any:
+        with self.browser.lock:
+            self.browser.focus(self.handle)
+            return getattr(self.browser.driver, name)(*args)
+
+    def get(self, url: str) -> None:
+        self._call("get", url)
+
+    def execute_script(self, script: str, *args: Any) -> Any:
+        return self._call("execute_script", script, *args)
+
+    def execute_cdp_cmd(self, cmd: str, params: Dict[str, Any]) -> Any:
+        return self._call("execute_cdp_cmd", cmd, params)
+
+    def get_log(self, log_type: str) -> List[Dict[str, Any]]:
+        if log_type != "performance":
+            return self._call("get_log", log_type)
+        # Лог общий для всей сессии - раскладываем записи по вкладкам
+        with self.browser.lock:
+            self.browser.drain_performance_log()
+            return self.browser.log_buffers.pop(self.handle, [])
+
+    @property
+    def title(self) -> str:
+        return self._call("execute_script", "return document.title;")
+
+    @property
+    def current_url(self) -> str:
+        return self._call("execute_script", "return location.href;")
+
+
+class DriverPool:
+    """Pool of pre-launched Chrome processes, each serving several tabs.
+
+    ``browsers`` Chrome instances are created lazily (or eagerly via
+    ``warm_up``) and each can run ``tabs_per_browser`` parses concurrently in
+    separate tabs, so memory is paid per browser rather than per parse. Tabs
+    are handed out with ``checkout``/``checkin`` and reset between uses: web
+    storage and popups are always cleared, cookies (shared by the whole
+    browser) when no other tab of that browser is busy.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], webdriver.Chrome],
+        browsers: int,
+        tabs_per_browser: int = 1,
+    ) -> None:
+        self._factory = factory
+        self._max_browsers = max(1, browsers)
+        self._tabs_per_browser = max(1, tabs_per_browser)
+        self._browsers: List[_Browser] = []
+        self._launching = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        """Total number of concurrent parse slots (browsers x tabs)."""
+        return self._max_browsers * self._tabs_per_browser
+
+    def checkout(self, timeout: float | None = None) -> BrowserTab:
+        """Take an idle tab, launching a browser or opening a tab if needed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        browser: _Browser | None = None
+        handle: str | None = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+                candidates = [
+                    b for b in self._browsers
+                    if not b.retired and b.busy < self._tabs_per_browser
+                ]
+                if candidates:
+                    # Распределяем нагрузку на наименее занятый браузер
+                    browser = min(candidates, key=lambda b: b.busy)
+                    browser.busy += 1
+                    handle = browser.idle_handles.pop() if browser.idle_handles else None
+                    break
+                if self._live() + self._launching < self._max_browsers:
+                    self._launching += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Нет свободного WebDriver в пуле")
+                self._cond.wait(remaining)
+
+        if browser is None:
+            browser = self._launch()
+            with self._cond:
+                browser.busy = 1
+                handle = browser.idle_handles.pop()
+                self._browsers.append(browser)
+
+        if handle is None:
+            try:
+                with browser.lock, span("tab_open"):
+                    browser.driver.switch_to.new_window("tab")
+                    handle = browser.driver.current_window_handle
+                    browser.current = handle
+                    browser.handles.add(handle)
+            except Exception:
+                self._release(browser, None, retire=True)
+                raise
+        return BrowserTab(browser, handle)
+
+    def checkin(self, tab: BrowserTab, discard: bool = False, failed: bool = False) -> None:
+        """Return a tab; ``discard`` retires its whole browser once it is idle.
+
+        ``failed`` marks the parse as unsuccessful for the browser's error rate.
+        """
+        browser = tab.browser
+        with self._cond:
+            browser.pages += 1
+            browser.outcomes.append(not (failed or discard))
+        if not discard and not self._closed and not browser.retired:
+            try:
+                self._reset(tab)
+            except Exception as e:
+                logger.warning(f"Не удалось сбросить вкладку, пересоздаём браузер: {str(e)}")
+                discard = True
+        self._release(browser, tab.handle, retire=discard)
+
+    def warm_up(self) -> int:
+        """Launch browsers and open their tabs; returns how many browsers started."""
+        with self._cond:
+            missing = self._max_browsers - self._live() - self._launching
+            if missing <= 0:
+                return 0
+            self._launching += missing
+
+        def launch(_: int) -> _Browser | None:
+            try:
+                browser = _Browser(self._factory())
+                with browser.lock:
+                    for _ in range(self._tabs_per_browser - 1):
+                        browser.driver.switch_to.new_window("tab")
+                        handle = browser.driver.current_window_handle
+                        browser.handles.add(handle)
+                        browser.idle_handles.append(handle)
+                    browser.current = browser.driver.current_window_handle
+                return browser
+            except Exception as e:
+                logger.error(f"Не удалось запустить WebDriver при прогреве: {str(e)}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=missing) as executor:
+            started = [b for b in executor.map(launch, range(missing)) if b is not None]
+
+        with self._cond:
+            self._launching -= missing
+            self._browsers.extend(started)
+            self._cond.notify_all()
+        logger.info(
+            f"Пул WebDriver прогрет: {len(started)}/{missing} браузеров "
+            f"по {self._tabs_per_browser} вкладок"
+        )
+        return len(started)
+
+    def close(self) -> None:
+        """Quit idle browsers; busy ones are quit when their last tab is checked in."""
+        with self._cond:
+            self._closed = True
+            idle = [b for b in self._browsers if b.busy == 0]
+            for browser in idle:
+                self._browsers.remove(browser)
+            self._cond.notify_all()
+        for browser in idle:
+            self._quit(browser.driver)
+
+    def browsers(self) -> List[_Browser]:
+        """Snapshot of the pool's browsers, including retired ones still draining."""
+        with self._cond:
+            return list(self._browsers)
+
+    def retire(self, browser: _Browser, reason: str) -> None:
+        """Stop handing out ``browser``; it is quit once its busy tabs come back."""
+        to_quit = None
+        with self._cond:
+            if browser.retired or browser not in self._browsers:
+                return
+            browser.retired = True
+            browser.retire_reason = reason
+            if browser.busy == 0:
+                self._browsers.remove(browser)
+                to_quit = browser
+            self._cond.notify_all()
+        logger.info(f"Браузер выводится из пула: {reason}")
+        if to_quit is not None:
+            self._quit(to_quit.driver)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            live = [b for b in self._browsers if not b.retired]
+            busy = sum(b.busy for b in live)
+            return {
+                "size": self.size,
+                "browsers": len(live),
+                "draining": len(self._browsers) - len(live),
+                "max_browsers": self._max_browsers,
+                "tabs_per_browser": self._tabs_per_browser,
+                "busy": busy,
+                "idle": len(live) * self._tabs_per_browser - busy,
+            }
+
+    def _live(self) -> int:
+        """Browsers still accepting work; caller holds ``_cond``."""
+        return sum(1 for b in self._browsers if not b.retired)
+
+    def _launch(self) -> _Browser:
+        try:
+            with span("driver_launch"):
+                browser = _Browser(self._factory())
+        except Exception:
+            with self._cond:
+                self._launching -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._launching -= 1
+        return browser
+
+    def _release(self, browser: _Browser, handle: str | None, retire: bool) -> None:
+        to_quit = None
+        with self._cond:
+            browser.busy -= 1
+            if retire:
+                browser.retired = True
+            elif handle is not None:
+                browser.idle_handles.append(handle)
+            if (browser.retired or self._closed) and browser.busy == 0 and browser in self._browsers:
+                self._browsers.remove(browser)
+                to_quit = browser
+            self._cond.notify_all()
+        if to_quit is not None:
+            self._quit(to_quit.driver)
+
+    @staticmethod
+    def _reset(tab: BrowserTab) -> None:
+        """Drop popups, storage, cookies and log entries left by the previous parse."""
+        browser = tab.browser
+        driver = browser.driver
+        with browser.lock:
+            # Закрываем всплывающие окна, открытые страницами
+            for handle in set(driver.window_handles) - browser.handles:
+                driver.switch_to.window(handle)
+                driver.close()
+                browser.current = None
+            browser.focus(tab.handle)
+
+            parts = urlsplit(driver.execute_script("return location.href;") or "")
+            if parts.scheme in ("http", "https"):
+                driver.execute_cdp_cmd(
+                    "Storage.clearDataForOrigin",
+                    {"origin": f"{parts.scheme}://{parts.netloc}", "storageTypes": "all"},
+                )
+            if browser.busy <= 1:
+                # Cookies общие для всех вкладок - чистим, только если браузер свободен
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.get("about:blank")
+            browser.log_buffers.pop(tab.handle, None)
+
+    @staticmethod
+    def _quit(driver: webdriver.Chrome) -> None:
+        try:
+            driver.quit()
+            logger.info("WebDriver закрыт")
+        except Exception as e:
+            logger.warning(f"Ошибка при закрытии WebDriver: {str(e)}")
@@ -4,25 +4,13 @@ import logging
 from datetime import datetime
 from pathlib import Path
 from typing import List
-from backend.config import settings
+from backend.config import data_path, settings
 from backend.models.schemas import HistoryItem
 
 class HistoryService:
     def __init__(self):
         # Use absolute path for .exe compatibility (PyInstaller _MEIPASS)
-        history_path = settings.history_file
-        if not Path(history_path).is_absolute():
-            # Store in same directory as executable or current working directory
-            import sys
-            if getattr(sys, 'frozen', False):
-                # Running as .exe - store next to executable
-                base_dir = Path(sys.executable).parent
-            else:
-                # Running as script - store in current directory
-                base_dir = Path.cwd()
-            self.file_path = base_dir / history_path
-        else:
-            self.file_path = Path(history_path)
+        self.file_path = data_path(settings.history_file)
         self._ensure_file()
 
     def _ensure_file(self):
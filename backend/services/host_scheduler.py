@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from backend.config import settings
+from backend.services.static_fetcher import static_fetcher
+from backend.services.timings import record
+
+logger = logging.getLogger(__name__)
+
+# Хосты, слот которых уже занят текущей задачей (пробный запрос + парсинг)
+_held: ContextVar[frozenset] = ContextVar("held_hosts", default=frozenset())
+
+
+@dataclass
+class _HostState:
+    active: int = 0
+    next_start: float = 0.0
+    crawl_delay: float = 0.0
+    robots_checked_at: float | None = None
+    robots_task: asyncio.Task | None = None
+    waiters: Deque[asyncio.Future] = field(default_factory=deque)
+    served: int = 0
+
+
+def host_key(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class HostScheduler:
+    """Global parse budget shared fairly between hosts.
+
+    At most ``capacity`` parses run at once, at most ``per_host`` of them
+    against the same host, and consecutive parses of one host start at
+    least ``min_delay`` seconds apart (or the robots.txt Crawl-delay, if
+    larger). When a slot frees up, hosts with waiting requests are served
+    round-robin, so one large domain in a batch cannot starve the others.
+    A task already holding a host's slot can enter it again without waiting;
+    only the outermost entry records its wait as ``host_slot_wait``.
+    """
+
+    def __init__(self, capacity: int, per_host: int, min_delay: float) -> None:
+        self.capacity = capacity
+        self.per_host = per_host
+        self.min_delay = min_delay
+        self._active = 0
+        self._hosts: Dict[str, _HostState] = {}
+        # Хосты с ожидающими запросами в порядке обслуживания
+        self._ring: Deque[str] = deque()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _host(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState()
+        return state
+
+    def _delay(self, state: _HostState) -> float:
+        return max(self.min_delay, state.crawl_delay)
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting hosts in round-robin order."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        wake_at: float | None = None
+        checked = 0
+        while self._ring and self._active < self.capacity and checked < len(self._ring):
+            host = self._ring[0]
+            state = self._hosts[host]
+            while state.waiters and state.waiters[0].done():
+                state.waiters.popleft()  # запрос отменён, пока ждал
+            if not state.waiters:
+                self._ring.popleft()
+                continue
+            self._ring.rotate(-1)
+            if state.active >= self.per_host:
+                checked += 1
+                continue
+            if state.next_start > now:
+                wake_at = state.next_start if wake_at is None else min(wake_at, state.next_start)
+                checked += 1
+                continue
+            state.waiters.popleft().set_result(None)
+            state.active += 1
+            state.served += 1
+            state.next_start = now + self._delay(state)
+            self._active += 1
+            checked = 0
+        if wake_at is not None and self._active < self.capacity:
+            self._timer = asyncio.get_running_loop().call_later(wake_at - now, self._dispatch)
+
+    async def _load_robots(self, host: str, url: str) -> None:
+        state = self._host(host)
+        parts = urlsplit(url)
+        robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+        crawl_delay = 0.0
+        try:
+            response = await static_fetcher.client.get(robots_url, timeout=5.0)
+            if response.status_code == 200:
+                parser = RobotFileParser()
+                parser.parse(response.text.splitlines())
+                delay = parser.crawl_delay(settings.parser_user_agent) or 0.0
+                rate = parser.request_rate(settings.parser_user_agent)
+                if rate and rate.requests:
+                    delay = max(float(delay), rate.seconds / rate.requests)
+                crawl_delay = min(float(delay), settings.parser_host_max_crawl_delay)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.info(f"Не удалось загрузить robots.txt для {host}: {str(e)}")
+        if crawl_delay:
+            logger.info(f"Crawl-delay для {host}: {crawl_delay:g} с")
+        state.crawl_delay = crawl_delay
+        state.robots_checked_at = time.monotonic()
+
+    async def _ensure_robots(self, host: str, url: str) -> None:
+        if not settings.parser_respect_robots or os.environ.get("TESTING") == "True":
+            return
+        state = self._host(host)
+        fresh = (
+            state.robots_checked_at is not None
+            and time.monotonic() - state.robots_checked_at < settings.parser_robots_ttl
+        )
+        if fresh:
+            return
+        if state.robots_task is None or state.robots_task.done():
+            state.robots_task = asyncio.create_task(self._load_robots(host, url))
+        await asyncio.shield(state.robots_task)
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        host = host_key(url)
+        held = _held.get()
+        if host in held:
+            yield
+            return
+        queued = time.perf_counter()
+        await self._ensure_robots(host, url)
+        state = self._host(host)
+        waiter = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+        if host not in self._ring:
+            self._ring.append(host)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Слот уже выдан, но запрос отменили - возвращаем его
+                self._release(state)
+            raise
+        # Ожидание пишем только для внешнего входа: повторный вход слот не ждёт
+        record("host_slot_wait", (time.perf_counter() - queued) * 1000)
+        token = _held.set(held | {host})
+        try:
+            yield
+        finally:
+            _held.reset(token)
+            self._release(state)
+
+    def _release(self, state: _HostState) -> None:
+        state.active -= 1
+        self._active -= 1
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        busy = {
+            host: {
+                "active": state.active,
+                "waiting": len(state.waiters),
+                "served": state.served,
+                "crawl_delay": state.crawl_delay,
+            }
+            for host, state in self._hosts.items()
+            if state.active or state.waiters
+        }
+        return {
+            "capacity": self.capacity,
+            "per_host": self.per_host,
+            "min_delay": self.min_delay,
+            "active": self._active,
+            "waiting": sum(len(state.waiters) for state in self._hosts.values()),
+            "hosts": busy,
+        }
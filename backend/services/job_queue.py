@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, List
+
+from backend.config import settings
+from backend.services.sqlite_store import SQLiteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+
+class JobQueue(SQLiteStore):
+    """Durable parse job queue backed by a local SQLite file.
+
+    The API process submits jobs and waits for results; any number of
+    ``backend.worker`` processes claim jobs with a lease. A job whose worker
+    died is picked up again once its lease expires, up to
+    ``parser_queue_max_attempts`` times. A job cancelled by the API (its
+    request went away) is never claimed again, and a worker running it drops
+    it at the next heartbeat. Several hosts can share the queue only through
+    a filesystem with working SQLite locking.
+    """
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self) -> None:
+        super().__init__(settings.parser_queue_file)
+
+    def submit(self, url: str) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, url, status, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, url, now, now),
+            )
+        return job_id
+
+    def claim(self, worker_id: str) -> Dict[str, Any] | None:
+        """Atomically lease the oldest queued (or abandoned) job."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = conn.execute(
+                        "SELECT id, url, attempts FROM jobs "
+                        "WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                        "ORDER BY created_at LIMIT 1",
+                        (now,),
+                    ).fetchone()
+                    if row is None or row["attempts"] < settings.parser_queue_max_attempts:
+                        break
+                    # Воркеры падали на этой задаче слишком часто - больше не выдаём её
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                        ("Превышено число попыток", now, row["id"]),
+                    )
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', worker_id = ?, lease_until = ?, "
+                        "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (worker_id, now + settings.parser_queue_lease, now, row["id"]),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {"id": row["id"], "url": row["url"], "attempt": row["attempts"] + 1}
+
+    def heartbeat(self, job_ids: List[str], worker_id: str) -> List[str]:
+        """Extend the leases of jobs still being processed by ``worker_id``.
+
+        Returns the ids among ``job_ids`` that were cancelled meanwhile.
+        """
+        if not job_ids:
+            return []
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'running'",
+                [(now + settings.parser_queue_lease, now, job_id, worker_id) for job_id in job_ids],
+            )
+            rows = conn.execute(
+                f"SELECT id FROM jobs WHERE status = 'cancelled' AND id IN ({','.join('?' * len(job_ids))})",
+                job_ids,
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job nobody waits for anymore; ``False`` if it already finished."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id),
+            )
+            return cursor.rowcount > 0
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'running'",
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id, worker_id),
+            )
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> None:
+        """Requeue the job for another attempt, or mark it failed for good."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "error = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'running'",
+                (settings.parser_queue_max_attempts, error, time.time(), job_id, worker_id),
+            )
+
+    def get(self, job_id: str) -> Dict[str, Any] | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs last updated more than ``older_than`` seconds ago."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(FINISHED_STATUSES))}) AND updated_at < ?",
+                (*FINISHED_STATUSES, time.time() - older_than),
+            )
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    async def wait_result(self, job_id: str, timeout: float) -> Dict[str, Any] | None:
+        """Poll until the job finishes; returns the job or ``None`` on timeout."""
+        deadline = time.monotonic() + timeout
+        delay = 0.1
+        while time.monotonic() < deadline:
+            job = await asyncio.to_thread(self.get, job_id)
+            if job is not None and job["status"] in FINISHED_STATUSES:
+                return job
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, 1.0)
+        return None
+
+
+job_queue = JobQueue()
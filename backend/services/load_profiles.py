@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+from backend.config import data_path, settings
+
+logger = logging.getLogger(__name__)
+
+LOAD_STRATEGIES = ("none", "eager", "normal")
+
+_ALPHA = 0.3          # вес нового замера в EWMA
+_MIN_SAMPLES = 3      # сколько замеров нужно, прежде чем доверять выученному профилю
+_SAVE_INTERVAL = 10.0
+
+
+@dataclass
+class LoadProfile:
+    strategy: str
+    nav_timeout: float
+    ready_max_wait: float
+    stop_early: bool = False
+    source: str = "default"
+
+
+def _ewma(previous: float | None, value: float) -> float:
+    return value if previous is None else previous + _ALPHA * (value - previous)
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+
+class LoadProfileStore:
+    """Per-domain page-load profiles.
+
+    Operator overrides from ``parser_domain_profiles`` win over profiles learned
+    from past parses, which win over the global defaults. Learned timings are
+    exponentially weighted and persisted to a JSON file. A ``frozen`` store
+    keeps serving profiles but learns nothing (offline record/replay runs).
+    """
+
+    def __init__(self) -> None:
+        self.file_path = data_path(settings.parser_load_profiles_file)
+        self.frozen = False
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return {}
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._stats, ensure_ascii=False, indent=2)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        try:
+            with open(self.file_path, "w", encoding="utf-8") as f:
+                f.write(data)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить профили загрузки: {str(e)}")
+
+    @staticmethod
+    def domain(url: str) -> str:
+        host = (urlsplit(url).hostname or "").lower()
+        return host[4:] if host.startswith("www.") else host
+
+    def _override(self, domain: str) -> Dict[str, Any] | None:
+        for pattern, values in settings.parser_domain_profiles.items():
+            pattern = pattern.lower()
+            if domain == pattern or domain.endswith("." + pattern):
+                return values
+        return None
+
+    def _learned(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        learned: Dict[str, Any] = {}
+        interactive = stats.get("interactive")
+        if interactive is not None:
+            learned["nav_timeout"] = _clamp(
+                interactive * 3 + 2, settings.parser_nav_timeout_min, settings.parser_nav_timeout
+            )
+        if stats.get("ready") is not None:
+            learned["ready_max_wait"] = _clamp(stats["ready"] * 2, 0.5, settings.parser_ready_max_wait)
+
+        samples = stats["samples"]
+        timeouts = stats.get("timeouts", 0)
+        if timeouts / samples >= 0.5 and stats.get("timeout_successes", 0) >= timeouts / 2:
+            # Страница пригодна к извлечению задолго до окончания загрузки:
+            # не ждём readyState и прерываем догрузку, чтобы не держать слот пула
+            learned.update(strategy="none", nav_timeout=settings.parser_nav_timeout_min, stop_early=True)
+        elif stats.get("tail") is not None and stats["tail"] > 2.0:
+            # Долгий "хвост" после DOMContentLoaded - останавливаем загрузку после готовности
+            learned["stop_early"] = True
+        return learned
+
+    def profile_for(self, url: str) -> LoadProfile:
+        domain = self.domain(url)
+        profile = LoadProfile(
+            strategy=settings.parser_load_strategy,
+            nav_timeout=settings.parser_nav_timeout,
+            ready_max_wait=settings.parser_ready_max_wait,
+        )
+        with self._lock:
+            stats = dict(self._stats.get(domain) or {})
+        if stats.get("samples", 0) >= _MIN_SAMPLES:
+            for key, value in self._learned(stats).items():
+                setattr(profile, key, value)
+            profile.source = "learned"
+
+        override = self._override(domain)
+        if override:
+            for key in ("strategy", "nav_timeout", "ready_max_wait", "stop_early"):
+                if key in override:
+                    setattr(profile, key, override[key])
+            profile.source = "override"
+
+        if profile.strategy not in LOAD_STRATEGIES:
+            logger.warning(f"Неизвестная стратегия загрузки '{profile.strategy}' для {domain}, используем eager")
+            profile.strategy = "eager"
+        return profile
+
+    def record(
+        self,
+        url: str,
+        interactive: float | None,
+        complete: float | None,
+        ready: float | None,
+        timed_out: bool,
+        usable: bool,
+    ) -> None:
+        """Feed one parse's timings (seconds) into the domain's statistics.
+
+        ``ready`` is ``None`` when the page never got as far as the readiness wait.
+        """
+        if self.frozen:
+            return
+        domain = self.domain(url)
+        with self._lock:
+            stats = self._stats.setdefault(domain, {"samples": 0})
+            stats["samples"] += 1
+            if timed_out:
+                stats["timeouts"] = stats.get("timeouts", 0) + 1
+                if usable:
+                    stats["timeout_successes"] = stats.get("timeout_successes", 0) + 1
+            if interactive is not None:
+                stats["interactive"] = _ewma(stats.get("interactive"), interactive)
+            if interactive is not None and complete is not None:
+                stats["tail"] = _ewma(stats.get("tail"), max(0.0, complete - interactive))
+            if ready is not None:
+                stats["ready"] = _ewma(stats.get("ready"), ready)
+            stats["updated_at"] = time.time()
+            self._dirty = True
+            due = time.monotonic() - self._saved_at > _SAVE_INTERVAL
+        if due:
+            self.save()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            domains = list(self._stats)
+        return {domain: asdict(self.profile_for(f"https://{domain}/")) for domain in domains}
+
+
+load_profiles = LoadProfileStore()
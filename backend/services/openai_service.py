@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import importlib.util
 import json
+import logging
 from typing import Any, Dict
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
 
 from backend.config import settings
 
+logger = logging.getLogger(__name__)
+
 PROMPT = (
     "You are an expert E-commerce UX/UI Auditor specializing in luxury leather goods. "
     "Your task is to analyze the provided website screenshot and extract specific visual metrics "
@@ -17,17 +22,22 @@ PROMPT = (
 
 
 class OpenAIService:
-    """Service wrapper around AsyncOpenAI for vision analysis."""
+    """Service wrapper around OpenAI clients.
+
+    ``async_client`` is the one ``AsyncOpenAI`` instance every API endpoint
+    uses: its pooled HTTP/2 connections stay open between calls, so LLM
+    requests skip the TCP/TLS handshake. The app lifespan creates it in
+    ``start`` and closes it in ``close``. The synchronous ``client`` is
+    kept for the desktop embedded backend, which has no event loop.
+    """
 
     def __init__(self) -> None:
         # Используем синхронный клиент с прокси
-        import httpx
-        
         http_client = None
         if settings.OPENAI_PROXY:
             # Создаем HTTP клиент с прокси
             http_client = httpx.Client(
-                proxies=settings.OPENAI_PROXY,
+                proxy=settings.OPENAI_PROXY,
                 timeout=30.0
             )
         
@@ -35,15 +45,56 @@ class OpenAIService:
             api_key=settings.OPENAI_API_KEY,
             http_client=http_client
         )
+        self._async_client: AsyncOpenAI | None = None
+        self._http_client: httpx.AsyncClient | None = None
+
+    async def start(self) -> None:
+        """Create the shared async client up front; called from the app lifespan."""
+        self.async_client
+
+    def _build_async_client(self) -> AsyncOpenAI:
+        http2 = settings.OPENAI_HTTP2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("Пакет h2 не установлен, OpenAI клиент работает по HTTP/1.1 (pip install httpx[http2])")
+            http2 = False
+        self._http_client = httpx.AsyncClient(
+            http2=http2,
+            proxy=settings.OPENAI_PROXY or None,
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(settings.OPENAI_TIMEOUT, connect=10.0),
+        )
+        return AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=self._http_client,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            timeout=settings.OPENAI_TIMEOUT,
+        )
+
+    async def close(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+            self._http_client = None
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        # Без lifespan (тестовый ASGI клиент) клиент создаётся при первом вызове
+        if self._async_client is None:
+            self._async_client = self._build_async_client()
+        return self._async_client
 
-    def analyze_screenshot(self, base64_image: str) -> Dict[str, Any]:
+    async def analyze_screenshot(self, base64_image: str) -> Dict[str, Any]:
         image_url = (
             f"data:image/png;base64,{base64_image}"
             if not base64_image.startswith("data:image")
             else base64_image
         )
 
-        response = self.client.chat.completions.create(
+        response = await self.async_client.chat.completions.create(
             model=settings.OPENAI_MODEL,
             messages=[
                 {
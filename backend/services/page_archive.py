@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from backend.config import data_path, settings
+from backend.services.driver_pool import BrowserTab
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+# Поля результата парсинга, по которым оценивается точность при воспроизведении
+EXPECTED_FIELDS = ("product_name", "price", "price_value", "currency", "image_url", "description", "page_title")
+
+# Заголовки, которые при воспроизведении не имеют смысла или мешают (тело уже распаковано)
+_DROP_HEADERS = {
+    "content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive",
+    "strict-transport-security", "alt-svc", "content-security-policy",
+    "content-security-policy-report-only", "report-to", "nel",
+}
+_TEXT_TYPES = ("text/", "javascript", "json", "xml", "svg")
+
+
+def http_url(url: str) -> str:
+    """Replay address of a recorded URL: same host and path over plain HTTP."""
+    parts = urlsplit(url)
+    return urlunsplit(("http", parts.hostname or "", parts.path or "/", parts.query, ""))
+
+
+def _messages(entries: Iterable[Dict[str, Any]]) -> Iterable[Tuple[str, Dict[str, Any]]]:
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        yield message.get("method", ""), message.get("params", {})
+
+
+class PageRecorder:
+    """Captures one page's network traffic and DOM from a pooled tab.
+
+    Reads the tab's performance log (which ``collect_stats`` would otherwise
+    consume, so the entries are kept in ``entries`` for it) and pulls every
+    finished response body over CDP while the page is still open.
+    """
+
+    def __init__(self) -> None:
+        self.entries: List[Dict[str, Any]] = []
+        self.archive: Dict[str, Any] | None = None
+
+    def capture(self, driver: BrowserTab, url: str) -> None:
+        self.entries = driver.get_log("performance")
+        requests: Dict[str, Dict[str, Any]] = {}
+        responses: List[Dict[str, Any]] = []
+        finished: List[str] = []
+        for method, params in _messages(self.entries):
+            request_id = params.get("requestId")
+            if method == "Network.requestWillBeSent":
+                redirect = params.get("redirectResponse")
+                if redirect:
+                    # Промежуточный ответ редиректа: тела у него нет
+                    responses.append(self._response(requests.get(request_id, {}), redirect, b""))
+                requests[request_id] = {"method": params["request"].get("method", "GET"), "response": None}
+            elif method == "Network.responseReceived" and request_id in requests:
+                requests[request_id]["response"] = params.get("response") or {}
+            elif method == "Network.loadingFinished":
+                finished.append(request_id)
+
+        for request_id in finished:
+            request = requests.get(request_id)
+            if not request or not request["response"]:
+                continue
+            if request["response"].get("url", "").startswith("data:"):
+                continue
+            try:
+                found = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            except Exception as e:
+                logger.debug(f"Тело ответа недоступно ({request['response'].get('url')}): {str(e)}")
+                continue
+            body = found.get("body", "")
+            data = base64.b64decode(body) if found.get("base64Encoded") else body.encode("utf-8")
+            responses.append(self._response(request, request["response"], data))
+
+        self.archive = {
+            "version": ARCHIVE_VERSION,
+            "url": url,
+            "final_url": driver.current_url,
+            "recorded_at": time.time(),
+            "dom": driver.execute_script("return document.documentElement.outerHTML;"),
+            "responses": responses,
+        }
+
+    @staticmethod
+    def _response(request: Dict[str, Any], response: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+        return {
+            "method": request.get("method", "GET"),
+            "url": response.get("url", ""),
+            "status": int(response.get("status") or 200),
+            "headers": {k.lower(): v for k, v in (response.get("headers") or {}).items()},
+            "mime": response.get("mimeType", ""),
+            "body": base64.b64encode(body).decode("ascii"),
+        }
+
+
+class PageArchives:
+    """Gzipped JSON archives of recorded pages under ``archive_dir``."""
+
+    def __init__(self) -> None:
+        self.root = data_path(settings.archive_dir)
+
+    def path_for(self, url: str) -> Path:
+        host = urlsplit(url).hostname or "unknown"
+        return self.root / host / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]}.json.gz"
+
+    def save(self, archive: Dict[str, Any], expected: Dict[str, Any]) -> Path:
+        archive = {**archive, "expected": {field: expected.get(field) for field in EXPECTED_FIELDS}}
+        path = self.path_for(archive["url"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(archive, f, ensure_ascii=False)
+        tmp.replace(path)
+        return path
+
+    @staticmethod
+    def load(path: Path | str) -> Dict[str, Any]:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def paths(self) -> List[Path]:
+        return sorted(self.root.glob("*/*.json.gz"))
+
+
+def _rewrite(body: bytes) -> bytes:
+    # Всё воспроизводится по HTTP: абсолютные https-ссылки иначе ушли бы мимо сервера
+    return body.replace(b"https://", b"http://").replace(b"https:\\/\\/", b"http:\\/\\/")
+
+
+class ReplayServer:
+    """Local HTTP server answering with recorded responses.
+
+    Chrome is started with ``--host-resolver-rules`` mapping every host to
+    this server (see ``chrome_args``), so pages keep their real host names,
+    only downgraded from HTTPS to HTTP; anything not in the archives gets a
+    404 and nothing reaches the network.
+    """
+
+    def __init__(self, archives: Iterable[Dict[str, Any]]) -> None:
+        self._exact: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._by_path: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for archive in archives:
+            for response in archive["responses"]:
+                url = http_url(response["url"])
+                location = response["headers"].get("location")
+                if location and http_url(location) == url:
+                    # Редирект http -> https после понижения схемы ведёт сам на себя
+                    continue
+                self._exact[(response["method"], url)] = response
+                self._by_path.setdefault((response["method"], url.split("?", 1)[0]), response)
+        self.misses: List[str] = []
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def find(self, method: str, url: str) -> Dict[str, Any] | None:
+        found = self._exact.get((method, url))
+        if found is None:
+            # Параметры-«антикэши» меняются от загрузки к загрузке - сверяем только путь
+            found = self._by_path.get((method, url.split("?", 1)[0]))
+        return found
+
+    def start(self) -> None:
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self) -> None:
+                url = f"http://{(self.headers.get('Host') or '').split(':')[0]}{self.path}"
+                response = replay.find(self.command, url)
+                if response is None:
+                    replay.misses.append(url)
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = base64.b64decode(response["body"])
+                mime = response.get("mime") or response["headers"].get("content-type", "")
+                if any(kind in mime for kind in _TEXT_TYPES):
+                    body = _rewrite(body)
+                self.send_response(response["status"])
+                for name, value in response["headers"].items():
+                    if name in _DROP_HEADERS:
+                        continue
+                    if name == "location":
+                        value = value.replace("https://", "http://")
+                    # CDP склеивает повторяющиеся заголовки через перевод строки
+                    for line in str(value).split("\n"):
+                        self.send_header(name, line)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            do_GET = do_POST = do_HEAD = do_OPTIONS = _serve
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1] if self._server else 0
+
+    def chrome_args(self) -> List[str]:
+        return [f"--host-resolver-rules=MAP * 127.0.0.1:{self.port}, EXCLUDE localhost"]
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _downgraded(value: Any) -> Any:
+    if isinstance(value, str) and value.startswith("https://"):
+        return "http://" + value[len("https://"):]
+    return value
+
+
+def score(expected: Dict[str, Any], actual: Dict[str, Any]) -> Dict[str, Any]:
+    """Field-by-field comparison of a replayed parse with the recorded result."""
+    fields: Dict[str, bool] = {}
+    for field in EXPECTED_FIELDS:
+        # URL в результатах (изображение, заголовок-заглушка) при воспроизведении идут по HTTP
+        fields[field] = _downgraded(expected.get(field)) == _downgraded(actual.get(field))
+    return {"fields": fields, "accuracy": round(sum(fields.values()) / len(fields), 3)}
+
+
+page_archives = PageArchives()
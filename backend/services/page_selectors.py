@@ -0,0 +1,39 @@
+"""Selector heuristics shared by the browser and static-HTML extractors."""
+
+# Universal selectors, tried in order
+TITLE_SELECTORS = [
+    "h1", "h2", ".product-title", ".product-name", ".title",
+    "[class*='title']", "[class*='heading']", "[class*='product']"
+]
+PRICE_SELECTORS = [
+    ".price", ".product-price", "[class*='price']", "[data-price]",
+    "span[class*='price']", "div[class*='price']", ".cost", ".amount"
+]
+IMAGE_SELECTORS = [
+    "img.product-image", "img[class*='product']", "img[class*='main']",
+    ".product-gallery img", "picture img", "main img"
+]
+# Описание - более точные селекторы
+DESCRIPTION_SELECTORS = [
+    ".description", ".product-description", "[class*='description']",
+    ".details", ".product-details", "article p", "main p",
+    ".content p", ".text p", "[class*='content'] p"
+]
+# Селекторы, появление которых означает, что страница готова к извлечению
+READY_SELECTORS = ["h1", ".product-title", ".product-name", ".price", ".product-price", "[class*='price']"]
+
+# Строки body с этими словами не считаются описанием (навигация, корзина и т.п.)
+BODY_SKIP_WORDS = ['меню', 'навигация', 'поиск', 'корзина', 'войти']
+
+# Fallback для описания: первый длинный параграф в основном контенте
+PARAGRAPH_FALLBACK_SELECTOR = "main p, article p, .content p, section p"
+
+# Списки селекторов по полям - порядок внутри домена уточняет selector_memo
+FIELD_SELECTORS = {
+    "title": TITLE_SELECTORS,
+    "price": PRICE_SELECTORS,
+    "image": IMAGE_SELECTORS,
+    "description": DESCRIPTION_SELECTORS,
+}
+# Ключ поля в результате извлечения для каждого списка селекторов
+FIELD_INFO_KEYS = {"title": "title", "price": "price", "image": "image_url", "description": "description"}
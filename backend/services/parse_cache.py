@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import copy
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from backend.config import settings
+from backend.services.deadline import DeadlineExceeded, current_deadline
+from backend.services.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parse_cache (
+    key TEXT PRIMARY KEY,
+    stored_at REAL NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS parse_cache_stored_at ON parse_cache (stored_at);
+"""
+
+
+class ParseCache(SQLiteStore):
+    """Two-tier parse result cache with single-flight request coalescing.
+
+    Lookups go to an in-memory LRU first, then to an SQLite table that
+    survives restarts. Concurrent misses for the same key share one
+    underlying computation, which keeps running while at least one request
+    still waits for it and is cancelled when the last one goes away. The
+    computation runs in a clean context, so it never inherits the deadline of
+    the request that happened to start it; each request waits only as long
+    as its own deadline allows.
+    """
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self) -> None:
+        super().__init__(settings.parse_cache_file)
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self._stats = {"memory": 0, "disk": 0, "miss": 0, "coalesced": 0}
+
+    def _memory_get(self, key: str) -> Tuple[float, Dict[str, Any]] | None:
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    def _memory_put(self, key: str, stored_at: float, value: Dict[str, Any]) -> None:
+        with self._memory_lock:
+            self._memory[key] = (stored_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > settings.parse_cache_max_items:
+                self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str) -> Tuple[float, Dict[str, Any]] | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT stored_at, value FROM parse_cache WHERE key = ?", (key,)).fetchone()
+        return (row["stored_at"], json.loads(row["value"])) if row else None
+
+    def _disk_put(self, key: str, stored_at: float, value: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO parse_cache (key, stored_at, value) VALUES (?, ?, ?)",
+                (key, stored_at, json.dumps(value, ensure_ascii=False)),
+            )
+            conn.execute(
+                "DELETE FROM parse_cache WHERE stored_at < ?",
+                (stored_at - settings.parse_cache_ttl,),
+            )
+
+    async def _lookup(self, key: str, max_age: float) -> Tuple[Dict[str, Any], str, float] | None:
+        now = time.time()
+        entry = self._memory_get(key)
+        if entry is not None and now - entry[0] <= max_age:
+            return entry[1], "memory", now - entry[0]
+        entry = await asyncio.to_thread(self._disk_get, key)
+        if entry is not None and now - entry[0] <= max_age:
+            self._memory_put(key, *entry)
+            return entry[1], "disk", now - entry[0]
+        return None
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        max_age: float | None = None,
+        force_refresh: bool = False,
+        cacheable: Callable[[Dict[str, Any]], bool] = lambda value: True,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Return ``(value, cache_info)``; ``value`` is a private copy for the caller."""
+        max_age = settings.parse_cache_ttl if max_age is None else min(max_age, settings.parse_cache_ttl)
+        if not force_refresh:
+            found = await self._lookup(key, max_age)
+            if found is not None:
+                value, tier, age = found
+                self._stats[tier] += 1
+                return copy.deepcopy(value), {"status": "hit", "tier": tier, "age": round(age, 1)}
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats["coalesced"] += 1
+            status = "coalesced"
+        else:
+            self._stats["miss"] += 1
+            status = "miss"
+            # Пустой контекст: дедлайн и тайминги первого запроса не достаются остальным
+            task = contextvars.Context().run(asyncio.create_task, self._compute(key, compute, cacheable))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        deadline = current_deadline()
+        timeout = None if deadline is None else deadline.remaining()
+        # shield: отмена или дедлайн одного запроса не прерывают общий парсинг для остальных
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            value = await asyncio.wait_for(asyncio.shield(task), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            if task.done():
+                raise
+            if self._waiters[key] == 1:
+                # Ушёл последний ожидающий - результат больше никому не нужен
+                task.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise DeadlineExceeded(f"Дедлайн истёк в ожидании общего парсинга: {key}") from None
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+        return copy.deepcopy(value), {"status": status, "tier": None, "age": 0.0}
+
+    async def _compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        cacheable: Callable[[Dict[str, Any]], bool],
+    ) -> Dict[str, Any]:
+        value = await compute()
+        if cacheable(value):
+            stored_at = time.time()
+            self._memory_put(key, stored_at, value)
+            try:
+                await asyncio.to_thread(self._disk_put, key, stored_at, value)
+            except Exception as e:
+                logger.warning(f"Не удалось сохранить результат в дисковый кэш: {str(e)}")
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._memory_lock:
+            size = len(self._memory)
+        return {**self._stats, "memory_items": size, "inflight": len(self._inflight)}
+
+
+parse_cache = ParseCache()
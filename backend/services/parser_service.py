@@ -1,58 +1,151 @@
-import base64
-from typing import Tuple, Optional
-from playwright.async_api import async_playwright
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+from playwright.async_api import Browser, Playwright, async_playwright
 from backend.config import logger, settings
+from backend.services.screenshot_store import screenshot_store
+
 
 class ParserService:
+    """
+    Парсер на Playwright с одним долгоживущим браузером на процесс.
+
+    Вкладки берутся из ограниченного пула пар (BrowserContext, Page) и
+    переиспользуются между вызовами. Если браузер упал, он перезапускается
+    при следующем запросе, а устаревшие контексты пересоздаются.
+    """
+
+    def __init__(self) -> None:
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._generation = 0
+        self._launch_lock = asyncio.Lock()
+        self._slots: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        for _ in range(max(1, settings.playwright_pool_size)):
+            self._slots.put_nowait({"context": None, "page": None, "generation": -1})
+
+    async def start(self) -> None:
+        """Запуск браузера при старте приложения"""
+        try:
+            await self._ensure_browser()
+        except Exception as e:
+            logger.error(f"Не удалось запустить Playwright браузер: {e}")
+
+    async def stop(self) -> None:
+        """Закрытие браузера при остановке приложения"""
+        async with self._launch_lock:
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception as e:
+                    logger.warning(f"Ошибка при закрытии браузера: {e}")
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+            self._generation += 1
+
+    async def _ensure_browser(self) -> Browser:
+        async with self._launch_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._browser is not None:
+                logger.warning("Браузер Playwright упал, перезапускаем")
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            # Запускаем браузер (headless=True значит без окна)
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._generation += 1
+            logger.info("Браузер Playwright запущен")
+            return self._browser
+
+    async def _acquire(self) -> Dict[str, Any]:
+        slot = await self._slots.get()
+        try:
+            browser = await self._ensure_browser()
+            if slot["generation"] != self._generation or slot["page"] is None or slot["page"].is_closed():
+                # Контекст принадлежит упавшему браузеру или был закрыт - пересоздаём
+                slot["context"] = await browser.new_context(user_agent=settings.parser_user_agent)
+                slot["page"] = await slot["context"].new_page()
+                slot["generation"] = self._generation
+        except Exception:
+            self._slots.put_nowait(slot)
+            raise
+        return slot
+
+    async def _release(self, slot: Dict[str, Any], broken: bool) -> None:
+        try:
+            if broken:
+                raise RuntimeError("slot marked as broken")
+            # Сбрасываем состояние вкладки перед следующим использованием
+            await slot["context"].clear_cookies()
+            await slot["page"].goto("about:blank")
+        except Exception:
+            if slot["context"] is not None:
+                try:
+                    await slot["context"].close()
+                except Exception:
+                    pass
+            slot.update(context=None, page=None, generation=-1)
+        finally:
+            self._slots.put_nowait(slot)
+
     async def parse_url(self, url: str) -> Tuple[str, str, str, Optional[str], Optional[str]]:
         """
-        Возвращает: (title, h1, paragraph, screenshot_base64, error)
+        Возвращает: (title, h1, paragraph, screenshot_id, error)
+
+        Скриншот сохраняется в screenshot_store; по id можно получить файл
+        через /screenshots/{id} или передать его в /analyze.
         """
         # Добавляем протокол, если нет
         if not url.startswith("http"):
             url = "https://" + url
 
-        logger.info(f"Запуск браузера для парсинга: {url}")
-        
+        logger.info(f"Парсинг через Playwright: {url}")
+
         try:
-            async with async_playwright() as p:
-                # Запускаем браузер (headless=True значит без окна)
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page(user_agent=settings.parser_user_agent)
-                
-                # Переходим на сайт (ждем максимум timeout секунд)
-                try:
-                    await page.goto(url, timeout=settings.parser_timeout * 1000)
-                except Exception as e:
-                    await browser.close()
-                    return "", "", "", None, f"Ошибка соединения: {str(e)}"
-
-                # Извлекаем данные
-                title = await page.title()
-                
-                # H1 (первый попавшийся)
-                h1 = ""
-                if await page.locator("h1").count() > 0:
-                    h1 = await page.locator("h1").first.inner_text()
-                
-                # Первый длинный параграф
-                paragraph = ""
-                paragraphs = await page.locator("p").all()
-                for p_loc in paragraphs:
-                    text = await p_loc.inner_text()
-                    if len(text) > 50:
-                        paragraph = text
-                        break
-                
-                # Скриншот
-                screenshot_bytes = await page.screenshot(full_page=False)
-                screenshot_b64 = base64.b64encode(screenshot_bytes).decode("utf-8")
-                
-                await browser.close()
-                return title, h1, paragraph, screenshot_b64, None
+            slot = await self._acquire()
+        except Exception as e:
+            logger.error(f"Критическая ошибка парсера: {e}")
+            return "", "", "", None, str(e)
+
+        broken = False
+        try:
+            page = slot["page"]
+            # Переходим на сайт (ждем максимум timeout секунд)
+            try:
+                await page.goto(url, timeout=settings.parser_timeout * 1000)
+            except Exception as e:
+                broken = not self._browser or not self._browser.is_connected()
+                return "", "", "", None, f"Ошибка соединения: {str(e)}"
+
+            # Извлекаем данные
+            title = await page.title()
+
+            # H1 (первый попавшийся)
+            h1 = ""
+            if await page.locator("h1").count() > 0:
+                h1 = await page.locator("h1").first.inner_text()
+
+            # Первый длинный параграф
+            paragraph = ""
+            paragraphs = await page.locator("p").all()
+            for p_loc in paragraphs:
+                text = await p_loc.inner_text()
+                if len(text) > 50:
+                    paragraph = text
+                    break
+
+            # Скриншот: сохраняем на диск и возвращаем ссылку вместо base64
+            screenshot_bytes = await page.screenshot(full_page=False)
+            screenshot = await asyncio.to_thread(screenshot_store.save, screenshot_bytes, url)
+
+            return title, h1, paragraph, screenshot["id"], None
 
         except Exception as e:
+            broken = True
             logger.error(f"Критическая ошибка парсера: {e}")
             return "", "", "", None, str(e)
+        finally:
+            await self._release(slot, broken)
 
-parser_service = ParserService()
\ No newline at end of file
+parser_service = ParserService()
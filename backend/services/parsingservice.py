@@ -6,16 +6,48 @@ import random
 import threading
 import time
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 import logging
 
+from backend.config import settings
+from backend.services.browser_governor import OWNER_FLAG, BrowserGovernor
+from backend.services.deadline import (
+    DeadlineExceeded,
+    budget,
+    cancelled,
+    deadline_scope,
+    ensure_alive,
+    note_shortened,
+)
+from backend.services.driver_pool import BrowserTab, DriverPool
+from backend.services.host_scheduler import HostScheduler
+from backend.services.job_queue import job_queue
+from backend.services.load_profiles import LoadProfile, load_profiles
+from backend.services.page_archive import PageRecorder
+from backend.services.page_selectors import (
+    BODY_SKIP_WORDS,
+    FIELD_INFO_KEYS,
+    PARAGRAPH_FALLBACK_SELECTOR,
+    READY_SELECTORS,
+)
+from backend.services.readiness import wait_until_ready
+from backend.services.resource_blocking import apply_blocking, collect_stats
+from backend.services.selector_memo import selector_memo
+from backend.services.static_fetcher import static_fetcher
+from backend.services.timings import span
+from backend.services.structured_data import (
+    MICRODATA_PROPS,
+    MICRODATA_SCOPE,
+    META_KEYS,
+    from_parts,
+    guess_currency,
+    parse_price,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,22 +55,35 @@ logger = logging.getLogger(__name__)
 _history: List[Dict[str, Any]] = []
 _HISTORY_LIMIT = 50
 _history_lock = threading.Lock()
-_parse_semaphore = asyncio.Semaphore(3)
 
 
-def _init_driver() -> webdriver.Chrome:
-    """Create a headless Chrome driver with lightweight defaults."""
+def _init_driver(extra_args: List[str] | None = None, performance_log: bool | None = None) -> webdriver.Chrome:
+    """Create a headless Chrome driver with lightweight defaults.
+
+    The performance log is only collected when something reads it: resource
+    blocking stats by default, or ``performance_log=True`` for page recording.
+    """
     chrome_options = Options()
     chrome_options.add_argument("--headless=new")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--window-size=1280,720")
+    # Фоновые вкладки парсятся параллельно - не даём Chrome их замедлять
+    chrome_options.add_argument("--disable-background-timer-throttling")
+    chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    chrome_options.add_argument("--disable-renderer-backgrounding")
     # Suppress console window and logging for GUI apps
     chrome_options.add_argument("--disable-logging")
     chrome_options.add_argument("--log-level=3")  # Only fatal errors
+    # Метка владельца: по ней BrowserGovernor находит осиротевшие процессы Chrome
+    chrome_options.add_argument(OWNER_FLAG)
+    for arg in extra_args or []:
+        chrome_options.add_argument(arg)
     chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
     chrome_options.add_experimental_option("useAutomationExtension", False)
+    # Навигация не блокируется драйвером: стратегия и timeout задаются профилем домена
+    chrome_options.page_load_strategy = "none"
     
     # Ускорение загрузки - отключаем изображения и другие ресурсы
     prefs = {
@@ -47,6 +92,11 @@ def _init_driver() -> webdriver.Chrome:
     }
     chrome_options.add_experimental_option("prefs", prefs)
     chrome_options.add_argument("--blink-settings=imagesEnabled=false")  # Дополнительно отключаем изображения
+    # Сетевые события нужны для подсчёта заблокированных запросов и записи архивов;
+    # непрочитанный лог копится в chromedriver, поэтому без потребителя он выключен
+    if settings.parser_block_enabled if performance_log is None else performance_log:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
     
     # PyInstaller compatibility: selenium-manager handles driver automatically
     # but we ensure it works in frozen environment
@@ -69,95 +119,192 @@ def _init_driver() -> webdriver.Chrome:
         return webdriver.Chrome(options=chrome_options)
 
 
-def _safe_get(driver: webdriver.Chrome, by: By, value: str, attr: str | None = None) -> str | None:
+# Состояния document.readyState, которых ждём для каждой стратегии загрузки
+_READY_STATES = {"none": None, "eager": ("interactive", "complete"), "normal": ("complete",)}
+
+
+def _navigate(driver: BrowserTab, url: str, profile: LoadProfile) -> Dict[str, Any]:
+    """Start navigation and wait for the ready state required by the domain profile.
+
+    Drivers run with the ``none`` page-load strategy, so ``driver.get`` returns
+    right away and the per-domain strategy and timeout are enforced here. The
+    timeout is capped by the request deadline; ``shortened`` tells a
+    deadline cut from a genuinely slow page.
+    """
+    targets = _READY_STATES[profile.strategy]
+    nav_timeout = budget(profile.nav_timeout)
+    start = time.monotonic()
+    timed_out = False
+    committed = False
     try:
-        element = driver.find_element(by, value)
-        if attr:
-            return element.get_attribute(attr) or None
-        return (element.text or "").strip() or None
-    except Exception:
-        return None
-
-
-def _try_multiple_selectors(driver: webdriver.Chrome, selectors: List[str], attr: str | None = None) -> str | None:
-    """Try multiple CSS selectors and return first match."""
-    for selector in selectors:
-        result = _safe_get(driver, By.CSS_SELECTOR, selector, attr)
-        if result:
-            return result
-    return None
-
-
-def _extract_page_info(driver: webdriver.Chrome) -> Dict[str, Any]:
-    """Extract general information from any webpage."""
-    # Try to find title/heading
-    title_selectors = [
-        "h1", "h2", ".product-title", ".product-name", ".title", 
-        "[class*='title']", "[class*='heading']", "[class*='product']"
-    ]
-    title = _try_multiple_selectors(driver, title_selectors)
-    
-    # Try to find price
-    price_selectors = [
-        ".price", ".product-price", "[class*='price']", "[data-price]",
-        "span[class*='price']", "div[class*='price']", ".cost", ".amount"
-    ]
-    price = _try_multiple_selectors(driver, price_selectors)
-    
-    # Try to find main image
-    image_selectors = [
-        "img.product-image", "img[class*='product']", "img[class*='main']",
-        ".product-gallery img", "picture img", "main img"
-    ]
-    image_url = _try_multiple_selectors(driver, image_selectors, attr="src")
-    
-    # Try to find description - более точные селекторы
-    description_selectors = [
-        ".description", ".product-description", "[class*='description']",
-        ".details", ".product-details", "article p", "main p",
-        ".content p", ".text p", "[class*='content'] p"
-    ]
-    description = _try_multiple_selectors(driver, description_selectors)
-    
-    # Если описание не найдено, попробуем найти основной текстовый контент
-    if not description:
+        driver.get(url)
+    except TimeoutException:
+        pass
+    while True:
         try:
-            # Ищем параграфы с текстом (исключая навигацию и футер)
-            paragraphs = driver.find_elements(By.CSS_SELECTOR, "main p, article p, .content p, section p")
-            for p in paragraphs:
-                text = p.text.strip()
-                if text and len(text) > 50:  # Минимум 50 символов
-                    description = text
-                    break
-        except:
+            state, href = driver.execute_script("return [document.readyState, location.href];")
+            committed = href != "about:blank"
+            if committed and (targets is None or state in targets):
+                break
+        except WebDriverException:
+            # Контекст страницы пересоздаётся во время навигации - пробуем ещё раз
             pass
-    
-    # Get page title as fallback
-    page_title = driver.title
-    
-    # Если описание всё ещё пустое, берём первые абзацы из body
-    if not description:
-        try:
-            body_text = driver.find_element(By.TAG_NAME, "body").text
-            # Разбиваем на строки и ищем содержательные абзацы
-            lines = body_text.split('\n')
-            content_lines = []
-            for line in lines:
-                line = line.strip()
-                if len(line) > 30 and not any(skip in line.lower() for skip in ['меню', 'навигация', 'поиск', 'корзина', 'войти']):
-                    content_lines.append(line)
-                    if len(' '.join(content_lines)) > 200:
-                        break
-            description = ' '.join(content_lines[:3]) if content_lines else "Описание не найдено"
-        except:
-            description = "Описание не найдено"
+        if time.monotonic() - start >= nav_timeout or cancelled():
+            timed_out = True
+            break
+        time.sleep(0.05)
+    shortened = timed_out and nav_timeout < profile.nav_timeout
+    if shortened:
+        note_shortened("navigation")
+    return {
+        "elapsed": time.monotonic() - start,
+        "timed_out": timed_out,
+        "committed": committed,
+        "shortened": shortened,
+    }
+
+
+# Пул прогретых браузеров; каждый обслуживает несколько вкладок одновременно
+driver_pool = DriverPool(
+    _init_driver,
+    browsers=settings.parser_pool_size,
+    tabs_per_browser=settings.parser_tabs_per_browser,
+)
+# Общий бюджет парсинга, распределяемый между хостами по очереди
+host_scheduler = HostScheduler(
+    capacity=driver_pool.size,
+    per_host=settings.parser_host_concurrency,
+    min_delay=settings.parser_host_min_delay,
+)
+# Перезапускает изношенные браузеры и добивает осиротевшие процессы Chrome
+browser_governor = BrowserGovernor(driver_pool)
+
+
+# Evaluates every selector list and fallback inside the page, so the whole
+# extraction costs a single WebDriver round trip.
+_EXTRACT_SCRIPT = """
+var sel = arguments[0];
+var matched = {};
+function pick(field, attr) {
+    var list = sel[field];
+    matched[field] = null;
+    for (var i = 0; i < list.length; i++) {
+        var el = null;
+        try { el = document.querySelector(list[i]); } catch (e) { continue; }
+        if (!el) continue;
+        var value = attr ? (el[attr] || el.getAttribute(attr)) : (el.innerText || '').trim();
+        if (value) { matched[field] = list[i]; return value; }
+    }
+    return null;
+}
+// Структурированные данные (JSON-LD, OpenGraph, microdata) - разбираются в Python
+var structured = {jsonld: [], meta: {}, microdata: {}};
+document.querySelectorAll('script[type*="ld+json"]').forEach(function (s) {
+    structured.jsonld.push(s.textContent);
+});
+document.querySelectorAll('meta[property], meta[name]').forEach(function (m) {
+    var key = (m.getAttribute('property') || m.getAttribute('name') || '').toLowerCase();
+    if (sel.metaKeys.indexOf(key) !== -1 && !(key in structured.meta) && m.content) {
+        structured.meta[key] = m.content;
+    }
+});
+document.querySelectorAll(sel.microdataScope).forEach(function (scope) {
+    scope.querySelectorAll('[itemprop]').forEach(function (el) {
+        var prop = el.getAttribute('itemprop');
+        if (sel.microdataProps.indexOf(prop) === -1 || prop in structured.microdata) return;
+        var value = el.getAttribute('content') || el.getAttribute('src') || el.getAttribute('href')
+            || (el.innerText || '').trim();
+        if (value) structured.microdata[prop] = value;
+    });
+});
+var description = pick('description');
+// Описание из метаданных есть - дорогой разбор текста страницы не нужен
+if (structured.meta['og:description'] || structured.microdata.description) {
+    description = description || '';
+}
+// Если описание не найдено, ищем параграфы с текстом (исключая навигацию и футер)
+if (description === null) {
+    var paragraphs = document.querySelectorAll(sel.paragraphs);
+    for (var i = 0; i < paragraphs.length; i++) {
+        var text = (paragraphs[i].innerText || '').trim();
+        if (text.length > 50) { description = text; break; }
+    }
+}
+// Если описание всё ещё пустое, берём первые содержательные строки из body
+if (description === null && document.body) {
+    var lines = (document.body.innerText || '').split('\\n');
+    var content = [];
+    for (var j = 0; j < lines.length; j++) {
+        var line = lines[j].trim();
+        var lower = line.toLowerCase();
+        if (line.length > 30 && !sel.skip.some(function (w) { return lower.indexOf(w) !== -1; })) {
+            content.push(line);
+            if (content.join(' ').length > 200) break;
+        }
+    }
+    description = content.slice(0, 3).join(' ') || null;
+}
+return {
+    title: pick('title'),
+    price: pick('price'),
+    image_url: pick('image', 'src'),
+    description: description,
+    page_title: document.title,
+    matched: matched,
+    structured: structured,
+    timing: (function () {
+        var nav = performance.getEntriesByType('navigation')[0];
+        return {
+            interactive: nav ? nav.domInteractive : 0,
+            complete: nav ? nav.loadEventEnd : 0,
+            now: performance.now()
+        };
+    })()
+};
+"""
+
+def _extract_page_info(driver: BrowserTab, url: str) -> Dict[str, Any]:
+    """Extract general information from any webpage in one script call.
+
+    Structured data (JSON-LD, microdata, OpenGraph) takes precedence; CSS
+    selectors, tried in the per-domain order learned by ``selector_memo``,
+    only fill the fields it lacks, and only those are fed back into the memo.
+    """
+    selectors = selector_memo.selectors_for(url)
+    info = driver.execute_script(_EXTRACT_SCRIPT, {
+        **selectors,
+        "paragraphs": PARAGRAPH_FALLBACK_SELECTOR,
+        "skip": BODY_SKIP_WORDS,
+        "metaKeys": list(META_KEYS),
+        "microdataProps": list(MICRODATA_PROPS),
+        "microdataScope": MICRODATA_SCOPE,
+    }) or {}
+    parts = info.get("structured") or {}
+    structured = from_parts(parts.get("jsonld", []), parts.get("meta", {}), parts.get("microdata", {}), url)
+    if info.get("matched") is not None:
+        css_fields = [field for field, key in FIELD_INFO_KEYS.items() if not structured.get(key)]
+        selector_memo.record(
+            url,
+            {field: selectors[field] for field in css_fields},
+            {field: info["matched"].get(field) for field in css_fields},
+        )
+    page_title = info.get("page_title")
+    # Имя или цену нашли селекторы/разметка товара; document.title есть почти у любой страницы
+    content_found = bool(
+        structured.get("title") or info.get("title") or structured.get("price") or info.get("price")
+    )
     
     return {
-        "title": title or page_title,
-        "price": price,
-        "image_url": image_url,
-        "description": description,
+        "title": structured.get("title") or info.get("title") or page_title,
+        "price": structured.get("price") or info.get("price"),
+        "image_url": structured.get("image_url") or info.get("image_url"),
+        "description": structured.get("description") or info.get("description") or "Описание не найдено",
         "page_title": page_title,
+        "price_value": structured.get("price_value"),
+        "currency": structured.get("currency"),
+        "structured": structured["structured"],
+        "content_found": content_found,
+        "timing": info.get("timing"),
     }
 
 
@@ -176,75 +323,163 @@ def _fallback_payload(url: str) -> Dict[str, Any]:
     }
 
 
-def parse_competitor_data(url: str) -> Dict[str, Any]:
-    """Parse competitor site with Selenium using universal selectors."""
+def _build_payload(url: str, page_info: Dict[str, Any], fetch_tier: str) -> Dict[str, Any]:
+    """Build the public parse payload from extracted page info."""
+    price = page_info.get("price")
+    price_value = page_info.get("price_value")
+    currency = page_info.get("currency")
+    if price and price_value is None:
+        # Цена найдена CSS-селектором - разбираем текст
+        price_value = parse_price(price)
+        currency = currency or guess_currency(price)
+    return {
+        "url": url,
+        "product_name": page_info.get("title") or "Не удалось определить",
+        "price": price or "Цена не найдена",
+        "price_value": price_value,
+        "currency": currency,
+        "image_url": page_info.get("image_url") or "Изображение не найдено",
+        "description": page_info.get("description") or "Описание не найдено",
+        "page_title": page_info.get("page_title") or url,
+        "parsed_at": datetime.utcnow().isoformat(),
+        "parsing_status": "success" if page_info.get("title") else "partial",
+        "fetch_tier": fetch_tier,
+        "structured_fields": page_info.get("structured") or [],
+    }
+
+
+def parse_competitor_data(
+    url: str,
+    pool: DriverPool | None = None,
+    recorder: PageRecorder | None = None,
+) -> Dict[str, Any]:
+    """Parse competitor site with Selenium using universal selectors.
+
+    ``pool`` overrides the shared driver pool (archive replay runs its own
+    Chrome); ``recorder`` captures the page's traffic and DOM into an archive.
+    """
     # Testing stub for controlled delay and deterministic output
     if os.environ.get("TESTING") == "True":
         time.sleep(2)
         return {"url": url, "status": "Test Done"}
 
-    driver = _init_driver()
+    pool = pool or driver_pool
+    ensure_alive("checkout")
+    with span("driver_checkout"):
+        driver = pool.checkout(timeout=budget(settings.parser_checkout_timeout))
+    broken = False
+    failed = False
     try:
-        # Устанавливаем timeout для загрузки страницы (30 секунд)
-        driver.set_page_load_timeout(30)
+        profile = load_profiles.profile_for(url)
         
-        # Устанавливаем стратегию загрузки - не ждем всех ресурсов
-        # 'eager' - ждем только DOM, не ждем изображения и стили
-        try:
-            from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
-            caps = DesiredCapabilities.CHROME.copy()
-            caps['pageLoadStrategy'] = 'eager'
-        except:
-            pass
+        # Блокируем шрифты, стили, медиа и трекеры на уровне сети
+        with span("resource_blocking"):
+            apply_blocking(driver, url)
         
         # Load the page
-        try:
-            driver.get(url)
-            logger.info(f"Страница загружена: {url}")
-        except TimeoutException:
+        with span("navigation", strategy=profile.strategy) as details:
+            nav = _navigate(driver, url, profile)
+            details["timed_out"] = nav["timed_out"]
+        if cancelled():
+            raise DeadlineExceeded(f"Запрос отменён во время загрузки страницы: {url}")
+        if nav["timed_out"]:
             # Если timeout, пробуем остановить загрузку и продолжить
             logger.warning(f"Timeout при загрузке, пробуем остановить загрузку: {url}")
             try:
                 driver.execute_script("window.stop();")
                 logger.info("Загрузка остановлена, продолжаем парсинг")
-            except:
+            except WebDriverException:
+                nav["committed"] = False
+            if not nav["committed"]:
+                if nav["shortened"]:
+                    raise DeadlineExceeded(f"Время запроса истекло во время загрузки страницы: {url}")
+                failed = True
                 logger.error(f"Не удалось остановить загрузку: {url}")
+                load_profiles.record(url, None, None, None, timed_out=True, usable=False)
                 return {
                     "url": url,
-                    "error": "Timeout: страница не загрузилась за 30 секунд",
+                    "error": f"Timeout: страница не загрузилась за {profile.nav_timeout:g} секунд",
                     "parsing_status": "failed",
                     "parsed_at": datetime.utcnow().isoformat(),
                 }
+        else:
+            logger.info(f"Страница загружена: {url}")
         
-        # Ждем, пока body загрузится (для JS-сайтов)
-        try:
-            wait = WebDriverWait(driver, 10)
-            wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-            logger.info("Body элемент загружен")
-        except TimeoutException:
-            logger.warning("Body не загрузился за 10 секунд, продолжаем парсинг")
+        # Ждём готовности динамического контента вместо фиксированной задержки
+        ready_max_wait = budget(profile.ready_max_wait)
+        with span("readiness") as details:
+            readiness = wait_until_ready(
+                driver,
+                READY_SELECTORS,
+                max_wait=ready_max_wait,
+                quiet_ms=settings.parser_ready_quiet_ms,
+                idle_ms=settings.parser_ready_idle_ms,
+            )
+            details.update(reason=readiness.reason, polls=readiness.polls)
+        logger.info(f"Страница готова за {readiness.waited:.2f} с ({readiness.reason})")
+        if readiness.reason == "cancelled":
+            raise DeadlineExceeded(f"Запрос отменён во время ожидания готовности: {url}")
+        if readiness.reason == "timeout" and ready_max_wait < profile.ready_max_wait:
+            note_shortened("readiness")
         
-        # Дополнительная задержка для динамического контента
-        time.sleep(3)
+        if profile.stop_early:
+            # Прерываем догрузку оставшихся ресурсов, контент уже готов
+            with span("stop_loading"):
+                try:
+                    driver.execute_script("window.stop();")
+                except WebDriverException as e:
+                    logger.warning(f"Не удалось остановить догрузку, продолжаем парсинг: {str(e)}")
         
         # Extract information using universal selectors
-        page_info = _extract_page_info(driver)
+        with span("extraction"):
+            page_info = _extract_page_info(driver, url)
         
-        # Build payload with extracted data
-        payload = {
-            "url": url,
-            "product_name": page_info.get("title") or "Не удалось определить",
-            "price": page_info.get("price") or "Цена не найдена",
-            "image_url": page_info.get("image_url") or "Изображение не найдено",
-            "description": page_info.get("description") or "Описание не найдено",
-            "page_title": page_info.get("page_title") or url,
-            "parsed_at": datetime.utcnow().isoformat(),
-            "parsing_status": "success" if page_info.get("title") else "partial"
-        }
+        # Если load ещё не наступил, текущее время - нижняя оценка полной загрузки
+        timing = page_info.pop("timing", None) or {}
+        content_found = page_info.pop("content_found", False)
+        interactive_ms = timing.get("interactive")
+        complete_ms = timing.get("complete") or timing.get("now")
+        load_profiles.record(
+            url,
+            interactive=interactive_ms / 1000 if interactive_ms else None,
+            complete=complete_ms / 1000 if complete_ms else None,
+            ready=readiness.waited,
+            # Обрезанная дедлайном загрузка ничего не говорит о скорости домена
+            timed_out=nav["timed_out"] and not nav["shortened"],
+            usable=content_found,
+        )
         
+        payload = _build_payload(url, page_info, fetch_tier="browser")
+        payload["nav_ms"] = round(nav["elapsed"] * 1000)
+        payload["ready_wait_ms"] = round(readiness.waited * 1000)
+        payload["ready_reason"] = readiness.reason
+        payload["load_profile"] = {
+            "strategy": profile.strategy,
+            "nav_timeout": profile.nav_timeout,
+            "source": profile.source,
+        }
+        entries = None
+        if recorder is not None:
+            with span("archive_capture"):
+                recorder.capture(driver, url)
+            entries = recorder.entries
+        with span("blocking_stats"):
+            blocking = collect_stats(driver, entries)
+        if blocking:
+            payload["blocking"] = blocking
         return payload
         
+    except DeadlineExceeded as e:
+        logger.info(str(e))
+        return {
+            "url": url,
+            "error": str(e),
+            "parsing_status": "failed",
+            "deadline_exceeded": True,
+            "parsed_at": datetime.utcnow().isoformat(),
+        }
     except WebDriverException as e:
+        broken = True
         logger.error(f"WebDriver ошибка для {url}: {str(e)}")
         return {
             "url": url,
@@ -253,6 +488,7 @@ def parse_competitor_data(url: str) -> Dict[str, Any]:
             "parsed_at": datetime.utcnow().isoformat(),
         }
     except Exception as e:
+        failed = True
         logger.error(f"Неожиданная ошибка при парсинге {url}: {str(e)}")
         return {
             "url": url,
@@ -261,11 +497,8 @@ def parse_competitor_data(url: str) -> Dict[str, Any]:
             "parsed_at": datetime.utcnow().isoformat(),
         }
     finally:
-        try:
-            driver.quit()
-            logger.info("WebDriver закрыт")
-        except Exception as e:
-            logger.warning(f"Ошибка при закрытии WebDriver: {str(e)}")
+        # Возвращаем драйвер в пул; сломанный драйвер будет пересоздан
+        pool.checkin(driver, discard=broken, failed=failed)
 
 
 def add_to_history(entry: Dict[str, Any]) -> None:
@@ -284,10 +517,117 @@ def clear_history() -> None:
         _history.clear()
 
 
-async def parse_competitor_data_async(url: str) -> Dict[str, Any]:
-    """Async wrapper to run blocking Selenium in a thread."""
-    async with _parse_semaphore:
-        result = await asyncio.to_thread(parse_competitor_data, url)
-        add_to_history(result)
+async def start_parser(local: bool = False) -> None:
+    """
+    Warm up the driver pool so the first requests skip Chrome cold start.
+
+    ``local=True`` is for processes that parse themselves (the queue worker);
+    without it the API process skips the browsers in queue mode.
+    """
+    if os.environ.get("TESTING") == "True":
+        return
+    # В режиме очереди браузеры живут в воркерах, а не в API-процессе
+    if settings.parser_mode == "queue" and not local:
+        return
+    if settings.parser_governor_enabled:
+        browser_governor.start()
+    try:
+        await asyncio.to_thread(driver_pool.warm_up)
+    except Exception as e:
+        logger.error(f"Прогрев пула WebDriver не удался: {str(e)}")
+
+
+async def stop_parser() -> None:
+    """Shut down all pooled drivers and the shared HTTP client."""
+    await static_fetcher.close()
+    load_profiles.save()
+    selector_memo.save()
+    await asyncio.to_thread(browser_governor.stop)
+    await asyncio.to_thread(driver_pool.close)
+
+
+async def _parse_static(url: str, html: str | None = None) -> Tuple[Dict[str, Any] | None, str | None]:
+    """Try the HTTP tier; a ``None`` payload means the page needs a real browser."""
+    page_info, reason = await static_fetcher.fetch_page_info(url, html=html)
+    if page_info is None:
+        logger.info(f"Статический парсинг недостаточен ({reason}), используем браузер: {url}")
+        return None, reason
+    return _build_payload(url, page_info, fetch_tier="static"), None
+
+
+async def parse_locally(url: str, html: str | None = None) -> Dict[str, Any]:
+    """Parse via the static HTTP tier, escalating to Selenium in a thread.
+
+    ``html`` is an already downloaded copy of the page (e.g. from a change
+    probe) that the static tier uses instead of fetching it again. Both
+    tiers run inside one host scheduler slot. Stages cut short by the request
+    deadline are listed in ``deadline_shortened``.
+    """
+    result, escalation = None, None
+    with deadline_scope() as deadline:
+        try:
+            async with host_scheduler.slot(url):
+                ensure_alive("fetch")
+                if settings.parser_static_enabled and os.environ.get("TESTING") != "True":
+                    with span("static_tier") as details:
+                        result, escalation = await _parse_static(url, html)
+                        details["escalated"] = result is None
+                if result is None:
+                    ensure_alive("browser")
+                    with span("browser_tier"):
+                        result = await asyncio.to_thread(parse_competitor_data, url)
+                    if escalation:
+                        result["escalation_reason"] = escalation
+        except asyncio.CancelledError:
+            # Поток Selenium нельзя прервать извне - он остановится, увидев отмену
+            deadline.cancel()
+            raise
+        except DeadlineExceeded as e:
+            result = {
+                "url": url,
+                "error": str(e),
+                "parsing_status": "failed",
+                "deadline_exceeded": True,
+                "parsed_at": datetime.utcnow().isoformat(),
+            }
+    if deadline.shortened:
+        result["deadline_shortened"] = list(deadline.shortened)
+    return result
+
+
+async def _parse_via_queue(url: str) -> Dict[str, Any]:
+    """Submit the URL to the worker queue and wait for its result.
+
+    A job nobody waits for anymore (timeout, disconnected client) is
+    cancelled, so the worker does not keep parsing it.
+    """
+    job_id = await asyncio.to_thread(job_queue.submit, url)
+    try:
+        job = await job_queue.wait_result(job_id, timeout=budget(settings.parser_queue_wait_timeout))
+    except asyncio.CancelledError:
+        await asyncio.to_thread(job_queue.cancel, job_id)
+        raise
+    if job is None:
+        await asyncio.to_thread(job_queue.cancel, job_id)
+    if job is not None and job["status"] == "done":
+        result = job["result"]
+        result["job_id"] = job_id
         return result
+    error = job["error"] if job else f"Воркер не вернул результат за {settings.parser_queue_wait_timeout:g} секунд"
+    return {
+        "url": url,
+        "error": error,
+        "job_id": job_id,
+        "parsing_status": "failed",
+        "parsed_at": datetime.utcnow().isoformat(),
+    }
+
 
+async def parse_competitor_data_async(url: str, html: str | None = None) -> Dict[str, Any]:
+    """Parse in this process or, in queue mode, through the worker fleet."""
+    if settings.parser_mode == "queue":
+        result = await _parse_via_queue(url)
+    else:
+        result = await parse_locally(url, html)
+    add_to_history(result)
+    return result
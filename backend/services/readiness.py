@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from backend.services.deadline import cancelled
+from backend.services.driver_pool import BrowserTab
+
+logger = logging.getLogger(__name__)
+
+# Фиксированная задержка, которую заменяет движок готовности (для оценки экономии)
+FIXED_WAIT_BASELINE = 3.0
+
+# Устанавливает наблюдатели (один раз на документ) и возвращает текущие сигналы.
+# Активность = мутации DOM, завершение fetch/XHR и новые записи Resource Timing.
+_PROBE_SCRIPT = """
+var s = window.__cmReady;
+if (!s) {
+    s = window.__cmReady = {last: performance.now(), inflight: 0, resources: 0};
+    var touch = function () { s.last = performance.now(); };
+    new MutationObserver(touch).observe(document, {
+        subtree: true, childList: true, attributes: true, characterData: true
+    });
+    if (window.fetch) {
+        var origFetch = window.fetch;
+        window.fetch = function () {
+            s.inflight++; touch();
+            return origFetch.apply(this, arguments).finally(function () {
+                s.inflight--; touch();
+            });
+        };
+    }
+    var origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        s.inflight++; touch();
+        this.addEventListener('loadend', function () { s.inflight--; touch(); });
+        return origSend.apply(this, arguments);
+    };
+}
+var now = performance.now();
+var resources = performance.getEntriesByType('resource').length;
+if (resources !== s.resources) { s.resources = resources; s.last = now; }
+var hit = false;
+var selectors = arguments[0] || [];
+for (var i = 0; i < selectors.length && !hit; i++) {
+    try {
+        var el = document.querySelector(selectors[i]);
+        hit = !!(el && (el.innerText || '').trim());
+    } catch (e) {}
+}
+return {state: document.readyState, quiet: now - s.last, inflight: Math.max(s.inflight, 0), hit: hit};
+"""
+
+
+@dataclass
+class ReadinessResult:
+    waited: float
+    reason: str
+    polls: int
+
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Any] = {"waits": 0, "total_wait": 0.0, "saved": 0.0, "reasons": {}}
+
+
+def wait_until_ready(
+    driver: BrowserTab,
+    selectors: List[str],
+    max_wait: float,
+    quiet_ms: int,
+    idle_ms: int,
+    poll_interval: float = 0.1,
+) -> ReadinessResult:
+    """Block until the page looks ready for extraction or ``max_wait`` runs out.
+
+    Ready means the document has left the ``loading`` state, no fetch/XHR is
+    in flight and the DOM has been quiet for ``quiet_ms`` once a target
+    selector has content, or for ``idle_ms`` if none of them ever shows up.
+    """
+    start = time.monotonic()
+    polls = 0
+    reason = "timeout"
+    while True:
+        polls += 1
+        if cancelled():
+            reason = "cancelled"
+            break
+        try:
+            probe = driver.execute_script(_PROBE_SCRIPT, selectors) or {}
+        except Exception as e:
+            logger.warning(f"Проверка готовности страницы не удалась: {str(e)}")
+            reason = "error"
+            break
+
+        if probe.get("state") != "loading" and not probe.get("inflight"):
+            quiet = probe.get("quiet") or 0
+            if probe.get("hit") and quiet >= quiet_ms:
+                reason = "selectors"
+                break
+            if quiet >= idle_ms:
+                reason = "idle"
+                break
+
+        if time.monotonic() - start + poll_interval > max_wait:
+            break
+        time.sleep(poll_interval)
+
+    result = ReadinessResult(waited=time.monotonic() - start, reason=reason, polls=polls)
+    _record(result)
+    return result
+
+
+def _record(result: ReadinessResult) -> None:
+    with _stats_lock:
+        _stats["waits"] += 1
+        _stats["total_wait"] += result.waited
+        _stats["saved"] += FIXED_WAIT_BASELINE - result.waited
+        _stats["reasons"][result.reason] = _stats["reasons"].get(result.reason, 0) + 1
+
+
+def readiness_stats() -> Dict[str, Any]:
+    """Aggregate wait times and latency saved relative to the old fixed sleep."""
+    with _stats_lock:
+        waits = _stats["waits"]
+        return {
+            "waits": waits,
+            "avg_wait_ms": round(_stats["total_wait"] / waits * 1000) if waits else 0,
+            "total_saved_s": round(_stats["saved"], 3),
+            "reasons": dict(_stats["reasons"]),
+        }
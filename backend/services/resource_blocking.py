@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, List
+from urllib.parse import urlsplit
+
+from backend.config import settings
+from backend.services.driver_pool import BrowserTab
+
+logger = logging.getLogger(__name__)
+
+# URL-шаблоны для Network.setBlockedURLs по типу ресурса
+RESOURCE_TYPE_PATTERNS: Dict[str, List[str]] = {
+    "image": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"],
+    "font": ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"],
+    "stylesheet": ["*.css*"],
+    "media": ["*.mp4*", "*.webm*", "*.mp3*", "*.ogg*", "*.wav*", "*.m3u8*"],
+}
+
+# Средний размер заблокированного ресурса по типу CDP (для оценки экономии трафика)
+_AVERAGE_BYTES = {
+    "Image": 45_000,
+    "Font": 35_000,
+    "Stylesheet": 25_000,
+    "Script": 30_000,
+    "Media": 500_000,
+    "XHR": 5_000,
+    "Fetch": 5_000,
+    "Ping": 500,
+    "Other": 5_000,
+}
+
+
+def _host_matches(host: str, domain: str) -> bool:
+    return host == domain or host.endswith("." + domain)
+
+
+def blocked_patterns(url: str) -> List[str]:
+    """Patterns to block for ``url`` after applying per-domain allow-overrides."""
+    host = (urlsplit(url).hostname or "").lower()
+    allowed: set[str] = set()
+    for domain, entries in settings.parser_block_allow.items():
+        if _host_matches(host, domain.lower()):
+            allowed.update(entry.lower() for entry in entries)
+
+    patterns: List[str] = []
+    for resource_type in settings.parser_block_resource_types:
+        if resource_type not in allowed:
+            patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, []))
+    for domain in settings.parser_block_domains:
+        if domain.lower() not in allowed and not _host_matches(host, domain.lower()):
+            patterns.append(f"*{domain}*")
+    return patterns
+
+
+def apply_blocking(driver: BrowserTab, url: str) -> None:
+    """Install the block list for the next navigation and flush old log entries."""
+    if not settings.parser_block_enabled:
+        return
+    try:
+        driver.get_log("performance")
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_patterns(url)})
+    except Exception as e:
+        logger.warning(f"Не удалось включить блокировку ресурсов: {str(e)}")
+
+
+def collect_stats(driver: BrowserTab, entries: List[Dict[str, Any]] | None = None) -> Dict[str, Any] | None:
+    """Summarize loaded and blocked requests from the Chrome performance log.
+
+    Blocked requests never transfer bytes, so the savings are estimated from
+    typical resource sizes per type. ``entries`` are log entries someone
+    else already read from the tab.
+    """
+    if not settings.parser_block_enabled:
+        return None
+    if entries is None:
+        try:
+            entries = driver.get_log("performance")
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать performance log: {str(e)}")
+            return None
+
+    stats = {"requests_loaded": 0, "bytes_loaded": 0, "requests_blocked": 0, "bytes_saved_estimate": 0}
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        params = message.get("params", {})
+        if message.get("method") == "Network.loadingFinished":
+            stats["requests_loaded"] += 1
+            stats["bytes_loaded"] += int(params.get("encodedDataLength") or 0)
+        elif message.get("method") == "Network.loadingFailed" and params.get("blockedReason"):
+            stats["requests_blocked"] += 1
+            stats["bytes_saved_estimate"] += _AVERAGE_BYTES.get(params.get("type"), _AVERAGE_BYTES["Other"])
+    return stats
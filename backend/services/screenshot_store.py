@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict
+
+from PIL import Image, UnidentifiedImageError
+
+from backend.config import data_path, settings
+from backend.services.sqlite_store import SQLiteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS screenshots (
+    id TEXT PRIMARY KEY,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    original_format TEXT NOT NULL,
+    original_bytes INTEGER NOT NULL,
+    stored_bytes INTEGER NOT NULL,
+    source_url TEXT,
+    captures INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    last_seen_at REAL NOT NULL
+);
+"""
+
+VARIANTS = ("display", "vision", "thumb")
+_THUMB_SIDE = 320
+MEDIA_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "gif": "image/gif", "webp": "image/webp"}
+
+
+class ScreenshotError(ValueError):
+    pass
+
+
+def _max_side(variant: str) -> int:
+    """Longest side of a variant in pixels."""
+    if variant == "display":
+        return settings.screenshot_display_max_side
+    if variant == "vision":
+        return settings.screenshot_vision_max_side
+    return _THUMB_SIDE
+
+
+class ScreenshotStore(SQLiteStore):
+    """Content-addressed screenshot files with downscaled WebP variants.
+
+    The id is a hash of the decoded pixels, so the same capture saved twice
+    (even re-encoded) is stored once. Next to the original, each image gets
+    WebP variants for display, for the vision model and as a thumbnail;
+    APIs pass ids around and ``data_url`` builds the small vision payload
+    only when a request to the model is actually made.
+    """
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self) -> None:
+        super().__init__(settings.screenshot_index_file)
+        self.root = data_path(settings.screenshot_dir)
+
+    def _path(self, screenshot_id: str, name: str) -> Path:
+        return self.root / screenshot_id[:2] / f"{screenshot_id}.{name}"
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def save(self, data: bytes, source_url: str | None = None) -> Dict[str, Any]:
+        """Store an encoded image (PNG, JPEG, WebP, GIF); returns its metadata."""
+        if len(data) > settings.screenshot_max_bytes:
+            raise ScreenshotError("Изображение слишком большое")
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+            raise ScreenshotError(f"Не удалось прочитать изображение: {str(e)}") from e
+        fmt = (image.format or "png").lower()
+        image = image.convert("RGB")
+
+        digest = hashlib.sha256(f"{image.width}x{image.height}".encode())
+        digest.update(image.tobytes())
+        screenshot_id = digest.hexdigest()[:32]
+
+        now = time.time()
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE screenshots SET captures = captures + 1, last_seen_at = ? WHERE id = ?",
+                (now, screenshot_id),
+            ).rowcount
+        if updated:
+            return self.meta(screenshot_id)
+
+        stored = len(data)
+        self._write(self._path(screenshot_id, f"original.{fmt}"), data)
+        for variant in VARIANTS:
+            scaled = image.copy()
+            scaled.thumbnail((_max_side(variant), _max_side(variant)), Image.LANCZOS)
+            buffer = io.BytesIO()
+            scaled.save(buffer, "WEBP", quality=settings.screenshot_webp_quality, method=4)
+            self._write(self._path(screenshot_id, f"{variant}.webp"), buffer.getvalue())
+            stored += buffer.tell()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO screenshots (id, width, height, original_format, original_bytes, "
+                "stored_bytes, source_url, created_at, last_seen_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (screenshot_id, image.width, image.height, fmt, len(data), stored, source_url, now, now),
+            )
+        return self.meta(screenshot_id)
+
+    def save_base64(self, value: str, source_url: str | None = None) -> Dict[str, Any]:
+        """Store an image given as a data URL or plain base64 string."""
+        if value.startswith("data:"):
+            value = value.split(",", 1)[-1]
+        try:
+            data = base64.b64decode(value, validate=False)
+        except ValueError as e:
+            raise ScreenshotError("Некорректная base64 строка") from e
+        return self.save(data, source_url)
+
+    def meta(self, screenshot_id: str) -> Dict[str, Any] | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM screenshots WHERE id = ?", (screenshot_id,)).fetchone()
+        if row is None:
+            return None
+        meta = dict(row)
+        meta["variants"] = ["original", *VARIANTS]
+        return meta
+
+    def file(self, screenshot_id: str, variant: str = "display") -> tuple[Path, str] | None:
+        """Path and media type of a stored variant."""
+        meta = self.meta(screenshot_id)
+        if meta is None:
+            return None
+        if variant == "original":
+            fmt = meta["original_format"]
+            return self._path(screenshot_id, f"original.{fmt}"), MEDIA_TYPES.get(fmt, "application/octet-stream")
+        if variant not in VARIANTS:
+            raise ScreenshotError(f"Неизвестный вариант: {variant}")
+        return self._path(screenshot_id, f"{variant}.webp"), "image/webp"
+
+    def data_url(self, screenshot_id: str, variant: str = "vision") -> str | None:
+        found = self.file(screenshot_id, variant)
+        if found is None or not found[0].exists():
+            return None
+        path, media_type = found
+        return f"data:{media_type};base64,{base64.b64encode(path.read_bytes()).decode('ascii')}"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS images, COALESCE(SUM(captures), 0) AS captures, "
+                "COALESCE(SUM(original_bytes), 0) AS original_bytes, "
+                "COALESCE(SUM(stored_bytes), 0) AS stored_bytes FROM screenshots"
+            ).fetchone()
+        return dict(row)
+
+
+screenshot_store = ScreenshotStore()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List
+
+from backend.config import data_path, settings
+from backend.services.load_profiles import LoadProfileStore
+from backend.services.page_selectors import FIELD_SELECTORS
+
+logger = logging.getLogger(__name__)
+
+_DEAD_AFTER = 5           # промахов без единого попадания - селектор исключается
+_DEAD_TTL = 7 * 86400.0   # через неделю исключённый селектор пробуется снова
+_INVALIDATE_AFTER = 3     # промахов подряд у лучшего селектора - сброс (редизайн)
+_SAVE_INTERVAL = 10.0
+
+
+class SelectorMemo:
+    """Learned per-domain selector order for each extracted field.
+
+    Selectors that matched on a domain are tried first, most hits first,
+    followed by the remaining defaults minus those that missed repeatedly
+    without ever matching there. When the memoized winner misses several
+    pages in a row the field's statistics are dropped, since the site has
+    most likely changed its markup. Persisted to a JSON file. A ``frozen``
+    memo keeps its current order but learns nothing.
+    """
+
+    def __init__(self) -> None:
+        self.file_path = data_path(settings.parser_selector_memo_file)
+        self.frozen = False
+        self._lock = threading.Lock()
+        # {domain: {field: {"selectors": {selector: [hits, misses, updated_at]}, "streak": n}}}
+        self._memo: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return {}
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._memo, ensure_ascii=False, indent=2)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        try:
+            with open(self.file_path, "w", encoding="utf-8") as f:
+                f.write(data)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить память селекторов: {str(e)}")
+
+    @staticmethod
+    def _best(stats: Dict[str, List[float]]) -> str | None:
+        hits = [(entry[0], selector) for selector, entry in stats.items() if entry[0] > 0]
+        return max(hits)[1] if hits else None
+
+    def _ordered(self, entry: Dict[str, Any] | None, defaults: List[str], now: float) -> List[str]:
+        stats = (entry or {}).get("selectors", {})
+        learned = sorted((s for s, e in stats.items() if e[0] > 0), key=lambda s: -stats[s][0])
+        rest = [
+            selector
+            for selector in defaults
+            if selector not in learned
+            and not (
+                selector in stats
+                and stats[selector][0] == 0
+                and stats[selector][1] >= _DEAD_AFTER
+                and now - stats[selector][2] < _DEAD_TTL
+            )
+        ]
+        return learned + rest
+
+    def selectors_for(self, url: str) -> Dict[str, List[str]]:
+        """Selector lists for every field, in the order to try them on ``url``."""
+        if not settings.parser_selector_memo_enabled:
+            return {field: list(defaults) for field, defaults in FIELD_SELECTORS.items()}
+        domain = LoadProfileStore.domain(url)
+        now = time.time()
+        with self._lock:
+            fields = self._memo.get(domain, {})
+            return {
+                field: self._ordered(fields.get(field), defaults, now)
+                for field, defaults in FIELD_SELECTORS.items()
+            }
+
+    def record(self, url: str, tried: Dict[str, List[str]], matched: Dict[str, str | None]) -> None:
+        """Account one extraction: selectors before the match missed, the match hit."""
+        if not settings.parser_selector_memo_enabled or self.frozen:
+            return
+        domain = LoadProfileStore.domain(url)
+        now = time.time()
+        with self._lock:
+            fields = self._memo.setdefault(domain, {})
+            for field, selectors in tried.items():
+                entry = fields.setdefault(field, {"selectors": {}, "streak": 0})
+                stats = entry["selectors"]
+                best = self._best(stats)
+                winner = matched.get(field)
+                for selector in selectors:
+                    counters = stats.setdefault(selector, [0, 0, now])
+                    counters[2] = now
+                    if selector == winner:
+                        counters[0] += 1
+                        break
+                    counters[1] += 1
+
+                if best is None or winner == best:
+                    entry["streak"] = 0
+                elif best in selectors:
+                    entry["streak"] += 1
+                    if entry["streak"] >= _INVALIDATE_AFTER:
+                        logger.info(
+                            f"Селектор '{best}' для поля {field} на {domain} перестал находить данные, "
+                            "сбрасываем память (вероятно, редизайн)"
+                        )
+                        fields[field] = {"selectors": {}, "streak": 0}
+            self._dirty = True
+            due = time.monotonic() - self._saved_at > _SAVE_INTERVAL
+        if due:
+            self.save()
+
+    def snapshot(self) -> Dict[str, Dict[str, str | None]]:
+        """Current winning selector per field for every known domain."""
+        with self._lock:
+            return {
+                domain: {field: self._best(entry.get("selectors", {})) for field, entry in fields.items()}
+                for domain, fields in self._memo.items()
+            }
+
+
+selector_memo = SelectorMemo()
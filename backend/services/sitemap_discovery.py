@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List
+from urllib.parse import urljoin, urlsplit
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser
+
+import httpx
+
+from backend.config import settings
+from backend.services.static_fetcher import static_fetcher
+
+logger = logging.getLogger(__name__)
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_lastmod(value: str | None) -> datetime | None:
+    """W3C datetime from a sitemap (``2024-05-01``, ``2024-05-01T10:00:00+03:00``)."""
+    if not value:
+        return None
+    value = value.strip().replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            parsed = datetime.strptime(value[:10], "%Y-%m-%d")
+        except ValueError:
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class SitemapEntries:
+    """Incremental sitemap parser: feed raw (possibly gzipped) bytes, read entries.
+
+    Every finished ``<url>``/``<sitemap>`` element is turned into a small dict
+    and removed from the tree right away, so memory use does not depend on
+    the number of entries in the file.
+    """
+
+    def __init__(self) -> None:
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._root: Element | None = None
+        self._inflater: Any = None
+        self._sniffed = False
+
+    def feed(self, chunk: bytes) -> Iterator[Dict[str, Any]]:
+        if not self._sniffed:
+            self._sniffed = True
+            if chunk.startswith(_GZIP_MAGIC):
+                self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._inflater is not None:
+            chunk = self._inflater.decompress(chunk)
+        self._parser.feed(chunk)
+        yield from self._drain()
+
+    def close(self) -> Iterator[Dict[str, Any]]:
+        if self._inflater is not None:
+            self._parser.feed(self._inflater.flush())
+        self._parser.close()
+        yield from self._drain()
+
+    def _drain(self) -> Iterator[Dict[str, Any]]:
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                continue
+            kind = _local(element.tag)
+            if kind not in ("url", "sitemap"):
+                continue
+            fields = {_local(child.tag): (child.text or "").strip() for child in element}
+            if self._root is not None:
+                self._root.clear()
+            if fields.get("loc"):
+                yield {"kind": kind, "loc": fields["loc"], "lastmod": fields.get("lastmod") or None}
+
+
+class SitemapDiscovery:
+    """Finds product URLs of a competitor through robots.txt and its sitemaps.
+
+    Sitemaps are streamed through the shared static-tier HTTP client and
+    parsed incrementally; sitemap indexes are followed breadth-first up to
+    ``discovery_max_sitemaps`` files. Child sitemaps whose own ``lastmod`` is
+    older than the window are skipped without downloading them.
+    """
+
+    async def sitemap_urls(self, base: str) -> List[str]:
+        """``Sitemap:`` lines from robots.txt, or the conventional location."""
+        sitemaps: List[str] = []
+        try:
+            response = await static_fetcher.client.get(urljoin(base, "/robots.txt"))
+            if response.status_code == 200:
+                for line in response.text.splitlines():
+                    key, _, value = line.partition(":")
+                    if key.strip().lower() == "sitemap" and value.strip():
+                        sitemaps.append(urljoin(base, value.strip()))
+        except httpx.HTTPError as e:
+            logger.info(f"robots.txt недоступен для {base}: {str(e)}")
+        return list(dict.fromkeys(sitemaps)) or [urljoin(base, "/sitemap.xml")]
+
+    async def _stream_entries(self, sitemap_url: str) -> AsyncIterator[Dict[str, Any]]:
+        entries = SitemapEntries()
+        try:
+            async with static_fetcher.client.stream("GET", sitemap_url) as response:
+                if response.status_code != 200:
+                    logger.info(f"Sitemap {sitemap_url} вернул HTTP {response.status_code}")
+                    return
+                # Content-Encoding снимает httpx, а .xml.gz распаковывает SitemapEntries
+                async for chunk in response.aiter_bytes():
+                    for entry in entries.feed(chunk):
+                        yield entry
+            for entry in entries.close():
+                yield entry
+        except (httpx.HTTPError, ParseError, zlib.error) as e:
+            logger.warning(f"Не удалось прочитать sitemap {sitemap_url}: {str(e)}")
+
+    async def discover(
+        self,
+        target: str,
+        include: List[str] | None = None,
+        exclude: List[str] | None = None,
+        since: datetime | None = None,
+        include_undated: bool = True,
+        limit: int | None = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield ``{"url", "lastmod", "sitemap"}`` for matching pages of ``target``.
+
+        ``target`` is a domain, a site URL or a direct sitemap URL. ``include``
+        and ``exclude`` are regular expressions matched against the URL path;
+        ``since`` drops entries whose ``lastmod`` is older.
+        """
+        if "://" not in target:
+            target = f"https://{target}"
+        parts = urlsplit(target)
+        base = f"{parts.scheme}://{parts.netloc}"
+        if parts.path.endswith((".xml", ".xml.gz", ".gz")):
+            queue = deque([target])
+        else:
+            queue = deque(await self.sitemap_urls(base))
+
+        include_re = [re.compile(p, re.I) for p in (settings.discovery_include_patterns if include is None else include)]
+        exclude_re = [re.compile(p, re.I) for p in (settings.discovery_exclude_patterns if exclude is None else exclude)]
+        limit = limit or settings.discovery_max_urls
+        seen_sitemaps: set[str] = set()
+        found = 0
+
+        while queue and len(seen_sitemaps) < settings.discovery_max_sitemaps:
+            sitemap_url = queue.popleft()
+            if sitemap_url in seen_sitemaps:
+                continue
+            seen_sitemaps.add(sitemap_url)
+            async for entry in self._stream_entries(sitemap_url):
+                lastmod = parse_lastmod(entry["lastmod"])
+                if since is not None and lastmod is not None and lastmod < since:
+                    continue
+                if entry["kind"] == "sitemap":
+                    if len(queue) + len(seen_sitemaps) < settings.discovery_max_sitemaps:
+                        queue.append(urljoin(sitemap_url, entry["loc"]))
+                    continue
+                if since is not None and lastmod is None and not include_undated:
+                    continue
+                path = urlsplit(entry["loc"]).path
+                if include_re and not any(p.search(path) for p in include_re):
+                    continue
+                if any(p.search(path) for p in exclude_re):
+                    continue
+                yield {"url": entry["loc"], "lastmod": entry["lastmod"], "sitemap": sitemap_url}
+                found += 1
+                if found >= limit:
+                    return
+
+
+async def run_bounded(
+    source: AsyncIterator[Dict[str, Any]],
+    worker: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+    concurrency: int,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Apply ``worker`` to items of ``source`` with bounded concurrency.
+
+    Both queues are bounded, so a slow consumer pauses the workers and the
+    workers pause the source: at most a few items are held at any time.
+    Results are yielded in completion order. A failing ``source`` ends the
+    stream with an ``{"error": ...}`` item instead of raising, since results
+    have usually been sent to the client by then.
+    """
+    pending: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    done = object()
+    errors: List[Exception] = []
+
+    async def produce() -> None:
+        try:
+            async for item in source:
+                await pending.put(item)
+        except Exception as e:
+            errors.append(e)
+        for _ in range(concurrency):
+            await pending.put(done)
+
+    async def consume() -> None:
+        while (item := await pending.get()) is not done:
+            try:
+                result = await worker(item)
+            except Exception as e:
+                result = {**item, "error": str(e)}
+            await results.put(result)
+        await results.put(done)
+
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(consume()) for _ in range(concurrency)]
+    try:
+        finished = 0
+        while finished < concurrency:
+            result = await results.get()
+            if result is done:
+                finished += 1
+                continue
+            yield result
+        if errors:
+            logger.warning(f"Источник прерван с ошибкой: {str(errors[0])}")
+            yield {"error": str(errors[0])}
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if hasattr(source, "aclose"):
+            await source.aclose()
+
+
+sitemap_discovery = SitemapDiscovery()
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import difflib
+import json
+import time
+import zlib
+from typing import Any, Dict, List
+
+from backend.config import settings
+from backend.services.sqlite_store import SQLiteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    url TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    taken_at REAL NOT NULL,
+    keyframe INTEGER NOT NULL,
+    blob BLOB NOT NULL,
+    PRIMARY KEY (url, version)
+);
+CREATE TABLE IF NOT EXISTS snapshot_heads (
+    url TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    keyframe_version INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    checked_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    changed_at REAL NOT NULL,
+    field TEXT NOT NULL,
+    old TEXT,
+    new TEXT,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS changes_changed_at ON changes (changed_at);
+CREATE INDEX IF NOT EXISTS changes_url ON changes (url, changed_at);
+"""
+
+# Поля результата парсинга, история которых хранится (без таймингов и AI анализа)
+SNAPSHOT_FIELDS = (
+    "product_name", "price", "price_value", "currency",
+    "image_url", "description", "page_title",
+)
+
+
+# Длинные тексты в таблице изменений обрезаются; полные значения - в снимках
+_CHANGE_TEXT_LIMIT = 500
+
+
+def _clip(value: Any) -> str:
+    if isinstance(value, str) and len(value) > _CHANGE_TEXT_LIMIT:
+        value = value[:_CHANGE_TEXT_LIMIT] + "…"
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _state(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: payload.get(field) for field in SNAPSHOT_FIELDS}
+
+
+def _encode(state: Dict[str, Any]) -> bytes:
+    return json.dumps(state, ensure_ascii=False, sort_keys=True).encode("utf-8")
+
+
+def _delta(previous: bytes, current: bytes) -> bytes:
+    # Предыдущая версия - словарь zlib: совпадающие куски кодируются ссылками на неё
+    compressor = zlib.compressobj(level=9, zdict=previous)
+    return compressor.compress(current) + compressor.flush()
+
+
+def _undelta(previous: bytes, blob: bytes) -> bytes:
+    decompressor = zlib.decompressobj(zdict=previous)
+    return decompressor.decompress(blob) + decompressor.flush()
+
+
+def _detail(field: str, old: Any, new: Any) -> Dict[str, Any] | None:
+    if field == "price_value" and isinstance(old, (int, float)) and isinstance(new, (int, float)):
+        return {"delta": round(new - old, 2), "percent": round((new - old) / old * 100, 2) if old else None}
+    if isinstance(old, str) and isinstance(new, str):
+        return {"similarity": round(difflib.SequenceMatcher(None, old, new).ratio(), 3)}
+    return None
+
+
+class SnapshotStore(SQLiteStore):
+    """Versioned per-URL snapshots of parse results with field-level diffs.
+
+    Every ``snapshot_keyframe_interval``-th version is stored as a compressed
+    full snapshot; the versions in between are zlib streams compressed with
+    the previous version as the preset dictionary, so an unchanged
+    description costs a few bytes. The latest state is kept uncompressed for
+    diffing, and each field change goes into the ``changes`` table, which is
+    all "what changed since T" queries read.
+    """
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self) -> None:
+        super().__init__(settings.snapshot_file)
+
+    def record(self, url: str, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Store a new version if tracked fields changed; returns the changes."""
+        if payload.get("parsing_status") not in ("success", "partial"):
+            return []
+        state = _state(payload)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                head = conn.execute("SELECT * FROM snapshot_heads WHERE url = ?", (url,)).fetchone()
+                previous = json.loads(head["state"]) if head else None
+                if previous == state:
+                    conn.execute("UPDATE snapshot_heads SET checked_at = ? WHERE url = ?", (now, url))
+                    conn.execute("COMMIT")
+                    return []
+
+                version = head["version"] + 1 if head else 1
+                keyframe = head is None or version - head["keyframe_version"] >= settings.snapshot_keyframe_interval
+                encoded = _encode(state)
+                blob = zlib.compress(encoded, 9) if keyframe else _delta(_encode(previous), encoded)
+                conn.execute(
+                    "INSERT INTO snapshots (url, version, taken_at, keyframe, blob) VALUES (?, ?, ?, ?, ?)",
+                    (url, version, now, int(keyframe), blob),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO snapshot_heads (url, version, keyframe_version, state, checked_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (url, version, version if keyframe else head["keyframe_version"], encoded.decode("utf-8"), now),
+                )
+
+                changes: List[Dict[str, Any]] = []
+                if previous is not None:
+                    for field in SNAPSHOT_FIELDS:
+                        old, new = previous.get(field), state.get(field)
+                        if old != new:
+                            changes.append({"field": field, "old": old, "new": new, "detail": _detail(field, old, new)})
+                    conn.executemany(
+                        "INSERT INTO changes (url, version, changed_at, field, old, new, detail) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (
+                                url,
+                                version,
+                                now,
+                                change["field"],
+                                _clip(change["old"]),
+                                _clip(change["new"]),
+                                json.dumps(change["detail"]) if change["detail"] else None,
+                            )
+                            for change in changes
+                        ],
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return changes
+
+    def changes_since(
+        self,
+        since: float,
+        url: str | None = None,
+        fields: List[str] | None = None,
+        limit: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        query = "SELECT url, version, changed_at, field, old, new, detail FROM changes WHERE changed_at > ?"
+        params: List[Any] = [since]
+        if url:
+            query += " AND url = ?"
+            params.append(url)
+        if fields:
+            query += f" AND field IN ({','.join('?' * len(fields))})"
+            params.extend(fields)
+        query += " ORDER BY changed_at, id LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [
+            {
+                "url": row["url"],
+                "version": row["version"],
+                "changed_at": row["changed_at"],
+                "field": row["field"],
+                "old": json.loads(row["old"]) if row["old"] is not None else None,
+                "new": json.loads(row["new"]) if row["new"] is not None else None,
+                "detail": json.loads(row["detail"]) if row["detail"] else None,
+            }
+            for row in rows
+        ]
+
+    def versions(self, url: str) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT version, taken_at, keyframe, length(blob) AS size FROM snapshots "
+                "WHERE url = ? ORDER BY version",
+                (url,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_version(self, url: str, version: int) -> Dict[str, Any] | None:
+        """Rebuild one version from the nearest keyframe at or before it."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT version, keyframe, blob FROM snapshots WHERE url = ? AND version <= ? "
+                "AND version >= (SELECT MAX(version) FROM snapshots WHERE url = ? AND version <= ? AND keyframe = 1) "
+                "ORDER BY version",
+                (url, version, url, version),
+            ).fetchall()
+        if not rows or rows[-1]["version"] != version:
+            return None
+        current = zlib.decompress(rows[0]["blob"])
+        for row in rows[1:]:
+            current = _undelta(current, row["blob"])
+        return json.loads(current)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS versions, COUNT(DISTINCT url) AS urls, "
+                "COALESCE(SUM(length(blob)), 0) AS bytes FROM snapshots"
+            ).fetchone()
+        return dict(row)
+
+
+snapshot_store = SnapshotStore()
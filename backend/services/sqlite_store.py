@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+
+from backend.config import data_path
+
+
+class SQLiteStore:
+    """Base for services persisting state in their own local SQLite file.
+
+    Subclasses define ``SCHEMA``; it is applied lazily on first connection so
+    that importing a service never touches the disk.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, file_name: str) -> None:
+        self.file_path = data_path(file_name)
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.file_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            if not self._initialized:
+                conn.executescript(self.SCHEMA)
+                self._initialized = True
+            yield conn
+        finally:
+            conn.close()
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urljoin
+
+import httpx
+from bs4 import BeautifulSoup
+
+from backend.config import settings
+from backend.services.deadline import budget
+from backend.services.timings import span
+from backend.services.page_selectors import BODY_SKIP_WORDS, FIELD_INFO_KEYS, PARAGRAPH_FALLBACK_SELECTOR
+from backend.services.selector_memo import selector_memo
+from backend.services.structured_data import collect_parts, from_parts
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": settings.parser_user_agent,
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.8",
+}
+
+# Точки монтирования SPA: пустой корень почти всегда означает рендеринг на JS
+_SPA_ROOT_IDS = ("root", "app", "__next", "__nuxt", "svelte")
+_NOSCRIPT_HINT = re.compile(r"(enable|включите)\s+javascript|requires javascript", re.I)
+_MIN_TEXT_LENGTH = 200
+
+
+class StaticFetcher:
+    """First parsing tier: plain HTTP fetch plus in-process HTML extraction.
+
+    Uses one pooled ``httpx.AsyncClient`` for all requests and the same
+    selector heuristics as the browser extractor. ``fetch_page_info`` returns
+    the extracted fields, or ``None`` with a reason when the page has to be
+    escalated to the browser tier.
+    """
+
+    def __init__(self) -> None:
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True,
+                timeout=settings.parser_static_timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.parser_static_max_connections,
+                    max_keepalive_connections=settings.parser_static_max_connections,
+                ),
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch_html(self, url: str) -> Tuple[str | None, str | None]:
+        """Return ``(html, None)`` or ``(None, reason)`` if the page can't be used."""
+        try:
+            async with self.client.stream("GET", url, timeout=budget(settings.parser_static_timeout)) as response:
+                if response.status_code != 200:
+                    return None, f"http_{response.status_code}"
+                content_type = response.headers.get("content-type", "")
+                if "html" not in content_type:
+                    return None, "not_html"
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) > settings.parser_static_max_bytes:
+                        return None, "too_large"
+                return body.decode(response.encoding or "utf-8", errors="replace"), None
+        except httpx.HTTPError as e:
+            logger.info(f"Статическая загрузка не удалась для {url}: {str(e)}")
+            return None, "fetch_error"
+
+    async def fetch_page_info(
+        self, url: str, html: str | None = None
+    ) -> Tuple[Dict[str, Any] | None, str | None]:
+        """Extract page info, reusing ``html`` if the caller already fetched it."""
+        if html is None:
+            with span("static_fetch"):
+                html, reason = await self.fetch_html(url)
+            if html is None:
+                return None, reason
+        # Разбор HTML - CPU-работа, не блокируем event loop
+        with span("static_extract"):
+            return await asyncio.to_thread(extract_from_html, html, url)
+
+
+def _pick(
+    soup: BeautifulSoup, selectors: List[str], attr: str | None = None
+) -> Tuple[str | None, str | None, bool]:
+    """Return the first non-empty match, its selector and whether an empty placeholder was seen."""
+    placeholder = False
+    for selector in selectors:
+        try:
+            element = soup.select_one(selector)
+        except Exception:
+            continue
+        if element is None:
+            continue
+        value = element.get(attr) if attr else element.get_text(" ", strip=True)
+        if value:
+            return value, selector, placeholder
+        placeholder = True
+    return None, None, placeholder
+
+
+def _needs_javascript(soup: BeautifulSoup, text_length: int) -> bool:
+    for noscript in soup.find_all("noscript"):
+        if _NOSCRIPT_HINT.search(noscript.get_text(" ", strip=True)):
+            return True
+    if text_length >= _MIN_TEXT_LENGTH:
+        return False
+    return any(soup.find(id=root_id) is not None for root_id in _SPA_ROOT_IDS) or text_length == 0
+
+
+def extract_from_html(html: str, url: str) -> Tuple[Dict[str, Any] | None, str | None]:
+    """Apply the browser selector heuristics to server-rendered HTML."""
+    soup = BeautifulSoup(html, "html.parser")
+    page_title = soup.title.get_text(strip=True) if soup.title else None
+    structured = from_parts(**collect_parts(soup), url=url)
+
+    body = soup.body or soup
+    for tag in body.find_all(["script", "style", "template"]):
+        tag.decompose()
+    body_text = body.get_text("\n", strip=True)
+    # Каркас SPA с полной разметкой товара в JSON-LD браузер не требует
+    complete = bool(structured.get("title") and structured.get("price"))
+    if not complete and _needs_javascript(soup, len(body_text)):
+        return None, "needs_js"
+    for tag in body.find_all("noscript"):
+        tag.decompose()
+
+    # CSS-эвристики - только для полей, которых нет в структурированных данных
+    selectors = selector_memo.selectors_for(url)
+    picked: Dict[str, str | None] = {}
+    matched: Dict[str, str | None] = {}
+    price_placeholder = False
+    for field, key in FIELD_INFO_KEYS.items():
+        if structured.get(key):
+            continue
+        value, matched[field], placeholder = _pick(soup, selectors[field], attr="src" if field == "image" else None)
+        picked[key] = value
+        price_placeholder = price_placeholder or (field == "price" and placeholder)
+    title = structured.get("title") or picked.get("title")
+    price = structured.get("price") or picked.get("price")
+    image_url = structured.get("image_url") or picked.get("image_url")
+    description = structured.get("description") or picked.get("description")
+
+    # Пустой контейнер цены обычно заполняется скриптом уже в браузере
+    if not price and price_placeholder:
+        return None, "price_placeholder"
+
+    if not description:
+        for paragraph in soup.select(PARAGRAPH_FALLBACK_SELECTOR):
+            text = paragraph.get_text(" ", strip=True)
+            if len(text) > 50:
+                description = text
+                break
+
+    if not description:
+        content_lines: List[str] = []
+        for line in body_text.split("\n"):
+            line = line.strip()
+            if len(line) > 30 and not any(skip in line.lower() for skip in BODY_SKIP_WORDS):
+                content_lines.append(line)
+                if len(" ".join(content_lines)) > 200:
+                    break
+        description = " ".join(content_lines[:3]) or None
+
+    info = {
+        "title": title,
+        "price": price,
+        "image_url": urljoin(url, image_url) if image_url else None,
+        "description": description,
+        "page_title": page_title,
+        "price_value": structured.get("price_value"),
+        "currency": structured.get("currency"),
+        "structured": structured["structured"],
+    }
+    missing = [field for field in settings.parser_static_required_fields if not info.get(field)]
+    if missing:
+        return None, "missing_" + "_".join(missing)
+
+    # Запоминаем только то, что действительно пошло в результат
+    selector_memo.record(url, {field: selectors[field] for field in matched}, matched)
+    info["title"] = title or page_title
+    return info, None
+
+
+static_fetcher = StaticFetcher()
@@ -0,0 +1,205 @@
+"""Product data embedded by the page itself: JSON-LD, microdata and OpenGraph.
+
+Both extractors collect the same raw parts (JSON-LD script bodies, the
+relevant ``<meta>`` tags and ``itemprop`` values inside a Product/Offer
+scope) and normalize them here, so the browser and the static tier agree on
+the result. CSS heuristics only fill what structured data left empty.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Iterator, List
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+META_KEYS = (
+    "og:title", "og:description", "og:image",
+    "product:price:amount", "product:price:currency",
+    "og:price:amount", "og:price:currency",
+)
+MICRODATA_PROPS = ("name", "description", "image", "price", "lowPrice", "priceCurrency")
+MICRODATA_SCOPE = "[itemtype*='schema.org/Product'], [itemtype*='schema.org/Offer']"
+
+_PRODUCT_TYPES = {"product", "productgroup", "individualproduct", "productmodel"}
+# Разряды отделяются одним пробелом (в том числе неразрывным), точкой, запятой
+# или апострофом строго по три цифры - иначе «1 599\n1 299» склеилось бы в одно число
+_NUMBER = re.compile(
+    r"\d{1,3}(?:[ \u00a0\u202f\u2009.,']\d{3})+(?:[.,]\d{1,2})?(?!\d)|\d+(?:[.,]\d{1,2})?(?!\d)"
+)
+_CURRENCY_SYMBOLS = {"₽": "RUB", "руб": "RUB", "р.": "RUB", "$": "USD", "€": "EUR", "£": "GBP", "₸": "KZT", "₴": "UAH"}
+
+
+def parse_price(text: Any) -> float | None:
+    """Numeric value of a price such as ``1 299,00 ₽``, ``1,299.00`` or ``1299``.
+
+    Only the first number counts: a container with an old and a new price
+    yields the first of them, never the two glued together.
+    """
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = _NUMBER.search(str(text or ""))
+    if not match:
+        return None
+    number = re.sub(r"[\s']", "", match.group()).rstrip(".,")
+    if "," in number and "." in number:
+        # Десятичный разделитель - тот, что встречается последним
+        decimal = "," if number.rfind(",") > number.rfind(".") else "."
+        number = number.replace("." if decimal == "," else ",", "").replace(decimal, ".")
+    elif "," in number:
+        head, _, tail = number.rpartition(",")
+        number = f"{head.replace(',', '')}.{tail}" if len(tail) != 3 else number.replace(",", "")
+    elif number.count(".") > 1 or re.search(r"\.\d{3}$", number):
+        number = number.replace(".", "")
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def guess_currency(text: Any) -> str | None:
+    lowered = str(text or "").lower()
+    for symbol, code in _CURRENCY_SYMBOLS.items():
+        if symbol in lowered:
+            return code
+    match = re.search(r"\b(RUB|USD|EUR|GBP|KZT|UAH|BYN|CNY)\b", str(text or ""), re.I)
+    return match.group(1).upper() if match else None
+
+
+def format_price(value: float, currency: str | None) -> str:
+    amount = f"{value:.0f}" if value == int(value) else f"{value:.2f}"
+    return f"{amount} {currency}" if currency else amount
+
+
+def _nodes(data: Any) -> Iterator[Dict[str, Any]]:
+    if isinstance(data, list):
+        for item in data:
+            yield from _nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        for key in ("@graph", "mainEntity", "itemListElement"):
+            if key in data:
+                yield from _nodes(data[key])
+
+
+def _is_product(node: Dict[str, Any]) -> bool:
+    types = node.get("@type")
+    types = types if isinstance(types, list) else [types]
+    return any(str(t).lower() in _PRODUCT_TYPES for t in types)
+
+
+def _first(value: Any) -> Any:
+    while isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        return value.get("url") or value.get("contentUrl") or value.get("@id")
+    return value
+
+
+def _from_offers(offers: Any) -> Dict[str, Any]:
+    for offer in offers if isinstance(offers, list) else [offers]:
+        if not isinstance(offer, dict):
+            continue
+        spec = offer.get("priceSpecification")
+        spec = spec[0] if isinstance(spec, list) and spec else spec
+        price = offer.get("price", offer.get("lowPrice"))
+        if price is None and isinstance(spec, dict):
+            price = spec.get("price")
+        currency = offer.get("priceCurrency") or (spec.get("priceCurrency") if isinstance(spec, dict) else None)
+        if price is not None:
+            return {"price": price, "currency": currency}
+    return {}
+
+
+def _from_jsonld(blocks: List[str]) -> Dict[str, Any]:
+    for block in blocks:
+        try:
+            data = json.loads(block.strip(), strict=False)
+        except ValueError:
+            continue
+        for node in _nodes(data):
+            if not _is_product(node):
+                continue
+            offers = _from_offers(node.get("offers"))
+            return {
+                "title": _first(node.get("name")),
+                "description": _first(node.get("description")),
+                "image_url": _first(node.get("image")),
+                "price": offers.get("price"),
+                "currency": offers.get("currency"),
+            }
+    return {}
+
+
+def from_parts(
+    jsonld: List[str], meta: Dict[str, str], microdata: Dict[str, str], url: str
+) -> Dict[str, Any]:
+    """Merge the raw parts into page-info fields; JSON-LD wins over microdata over OpenGraph.
+
+    Returns only the fields that were found, plus ``price_value`` and
+    ``currency`` when a price is present, and ``structured`` listing the
+    fields taken from structured data.
+    """
+    sources = [
+        _from_jsonld(jsonld),
+        {
+            "title": microdata.get("name"),
+            "description": microdata.get("description"),
+            "image_url": microdata.get("image"),
+            "price": microdata.get("price") or microdata.get("lowPrice"),
+            "currency": microdata.get("priceCurrency"),
+        },
+        {
+            "title": meta.get("og:title"),
+            "description": meta.get("og:description"),
+            "image_url": meta.get("og:image"),
+            "price": meta.get("product:price:amount") or meta.get("og:price:amount"),
+            "currency": meta.get("product:price:currency") or meta.get("og:price:currency"),
+        },
+    ]
+    result: Dict[str, Any] = {}
+    for source in sources:
+        for key, value in source.items():
+            if isinstance(value, str):
+                value = value.strip()
+            if value not in (None, "") and key not in result:
+                result[key] = value
+
+    price_value = parse_price(result.get("price")) if "price" in result else None
+    if price_value is not None:
+        currency = result.get("currency") or guess_currency(result["price"])
+        result.update(price_value=price_value, currency=currency, price=format_price(price_value, currency))
+    else:
+        result.pop("price", None)
+        result.pop("currency", None)
+    if result.get("image_url"):
+        result["image_url"] = urljoin(url, str(result["image_url"]))
+    result["structured"] = [key for key in ("title", "price", "image_url", "description") if key in result]
+    return result
+
+
+def collect_parts(soup: BeautifulSoup) -> Dict[str, Any]:
+    """Raw structured parts from parsed HTML; must run before scripts are stripped."""
+    jsonld = [
+        script.string or script.get_text()
+        for script in soup.find_all("script", type=re.compile(r"ld\+json", re.I))
+    ]
+    meta: Dict[str, str] = {}
+    for tag in soup.find_all("meta"):
+        key = (tag.get("property") or tag.get("name") or "").lower()
+        if key in META_KEYS and key not in meta and tag.get("content"):
+            meta[key] = tag["content"]
+    microdata: Dict[str, str] = {}
+    for scope in soup.select(MICRODATA_SCOPE):
+        for element in scope.find_all(itemprop=True):
+            prop = element.get("itemprop")
+            if prop not in MICRODATA_PROPS or prop in microdata:
+                continue
+            value = (
+                element.get("content") or element.get("src") or element.get("href")
+                or element.get_text(" ", strip=True)
+            )
+            if value:
+                microdata[prop] = value
+    return {"jsonld": jsonld, "meta": meta, "microdata": microdata}
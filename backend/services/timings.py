@@ -0,0 +1,163 @@
+"""Stage timing spans for the parse pipeline.
+
+``span("navigation")`` times a block. Every span feeds a process-wide
+histogram for its stage (``/metrics/timings``); when a request opened a
+``Timeline`` (``/parsedemo?debug=true``) the span is also appended to it,
+including spans recorded in the Selenium thread, since the timeline travels
+in a context variable like the request deadline.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List
+
+# Верхние границы корзин гистограммы, мс
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_timeline: ContextVar["Timeline | None"] = ContextVar("timeline", default=None)
+_depth: ContextVar[int] = ContextVar("timing_depth", default=0)
+
+
+class Timeline:
+    """Spans of one request, in start order offsets from its creation."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self._spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._spans.append(entry)
+
+    def spans(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return sorted(self._spans, key=lambda s: s["start_ms"])
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "total", "max", "errors")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def observe(self, ms: float, error: bool) -> None:
+        index = next((i for i, bound in enumerate(BUCKETS_MS) if ms <= bound), len(BUCKETS_MS))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.errors += int(error)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (max for the last one)."""
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return float(BUCKETS_MS[index]) if index < len(BUCKETS_MS) else round(self.max, 1)
+        return round(self.max, 1)
+
+    def summary(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}": count for bound, count in zip(BUCKETS_MS, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total, 1),
+            "mean_ms": round(self.total / self.count, 1) if self.count else 0.0,
+            "max_ms": round(self.max, 1),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+_histograms: Dict[str, _Histogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def record(stage: str, ms: float, error: bool = False, started: float | None = None, **meta: Any) -> None:
+    """Add a finished stage to the histogram and the current timeline."""
+    with _histograms_lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = _Histogram()
+        histogram.observe(ms, error)
+    timeline = _timeline.get()
+    if timeline is not None:
+        started = time.perf_counter() - ms / 1000 if started is None else started
+        entry = {
+            "stage": stage,
+            "start_ms": round((started - timeline.started) * 1000, 1),
+            "duration_ms": round(ms, 1),
+            "depth": _depth.get(),
+        }
+        if error:
+            entry["error"] = True
+        if meta:
+            entry.update(meta)
+        timeline.add(entry)
+
+
+@contextmanager
+def span(stage: str, **meta: Any) -> Iterator[Dict[str, Any]]:
+    """Time the block as ``stage``; the yielded dict adds details to the span."""
+    started = time.perf_counter()
+    token = _depth.set(_depth.get() + 1)
+    error = False
+    try:
+        yield meta
+    except BaseException:
+        error = True
+        raise
+    finally:
+        _depth.reset(token)
+        record(stage, (time.perf_counter() - started) * 1000, error=error, started=started, **meta)
+
+
+@contextmanager
+def timeline_scope(enabled: bool = True) -> Iterator[Timeline | None]:
+    """Collect spans of the block into a new ``Timeline`` (``None`` if disabled)."""
+    if not enabled:
+        yield None
+        return
+    timeline = Timeline()
+    token = _timeline.set(timeline)
+    try:
+        yield timeline
+    finally:
+        _timeline.reset(token)
+
+
+def current_timeline() -> Timeline | None:
+    return _timeline.get()
+
+
+@contextmanager
+def attach_timeline(timeline: Timeline | None) -> Iterator[None]:
+    """Record spans of the block into an existing ``timeline`` (e.g. from another context)."""
+    token = _timeline.set(timeline)
+    try:
+        yield
+    finally:
+        _timeline.reset(token)
+
+
+def timing_histograms() -> Dict[str, Any]:
+    with _histograms_lock:
+        return {stage: histogram.summary() for stage, histogram in sorted(_histograms.items())}
+
+
+def reset_histograms() -> None:
+    with _histograms_lock:
+        _histograms.clear()
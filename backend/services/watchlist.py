@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from backend.config import settings
+from backend.services.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watchlist (
+    url TEXT PRIMARY KEY,
+    analyze INTEGER NOT NULL DEFAULT 0,
+    interval REAL NOT NULL,
+    next_check REAL NOT NULL,
+    last_checked REAL,
+    last_changed REAL,
+    fingerprint TEXT,
+    checks INTEGER NOT NULL DEFAULT 0,
+    changes INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_status TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS watchlist_next_check ON watchlist (next_check);
+"""
+
+# Поля, изменение которых считается изменением страницы
+_FINGERPRINT_FIELDS = ("product_name", "price", "price_value", "description", "image_url")
+
+# Множители интервала: изменилась - проверяем чаще, нет - реже
+_SHRINK = 0.5
+_GROW = 1.5
+
+
+def fingerprint(data: Dict[str, Any]) -> str:
+    fields = {name: data.get(name) for name in _FINGERPRINT_FIELDS}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def _clamp_interval(interval: float) -> float:
+    return min(max(interval, settings.watch_min_interval), settings.watch_max_interval)
+
+
+def _jitter(interval: float) -> float:
+    # Разносим проверки во времени, чтобы URL одного хоста не шли пачкой
+    return interval * random.uniform(0.9, 1.1)
+
+
+class Watchlist(SQLiteStore):
+    """Persistent list of monitored URLs with per-URL adaptive intervals.
+
+    After every check the interval is halved when the extracted fields
+    changed and grown by half otherwise, within the configured bounds, so
+    volatile price pages converge to frequent checks and static pages drift
+    towards the maximum interval. Failures back off the same way as an
+    unchanged page.
+    """
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self) -> None:
+        super().__init__(settings.watch_file)
+
+    def add(self, url: str, analyze: bool = False, interval: float | None = None) -> Dict[str, Any]:
+        now = time.time()
+        interval = _clamp_interval(interval or settings.watch_default_interval)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO watchlist (url, analyze, interval, next_check, created_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET analyze = excluded.analyze, interval = excluded.interval",
+                (url, int(analyze), interval, now, now),
+            )
+        return self.get(url)
+
+    def remove(self, url: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM watchlist WHERE url = ?", (url,)).rowcount > 0
+
+    def get(self, url: str) -> Dict[str, Any] | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM watchlist WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def entries(self, limit: int = 1000, offset: int = 0) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM watchlist ORDER BY next_check LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def due(self, limit: int, exclude: List[str] | None = None) -> List[Dict[str, Any]]:
+        """Most overdue URLs first."""
+        exclude = exclude or []
+        placeholders = ",".join("?" * len(exclude))
+        query = "SELECT url, analyze FROM watchlist WHERE next_check <= ?"
+        if exclude:
+            query += f" AND url NOT IN ({placeholders})"
+        query += " ORDER BY next_check LIMIT ?"
+        with self._connect() as conn:
+            rows = conn.execute(query, (time.time(), *exclude, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def record_check(self, url: str, data: Dict[str, Any] | None, error: str | None = None) -> None:
+        row = self.get(url)
+        if row is None:
+            return  # удалён из списка, пока проверялся
+        now = time.time()
+        interval = row["interval"]
+        changed = False
+        new_fingerprint = row["fingerprint"]
+        status = (data or {}).get("parsing_status", "failed")
+        if error is None and status in ("success", "partial"):
+            new_fingerprint = fingerprint(data)
+            changed = row["fingerprint"] is not None and new_fingerprint != row["fingerprint"]
+            interval = _clamp_interval(interval * (_SHRINK if changed else _GROW))
+        else:
+            interval = _clamp_interval(interval * _GROW)
+            error = error or (data or {}).get("error")
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE watchlist SET interval = ?, next_check = ?, last_checked = ?, "
+                "last_changed = CASE WHEN ? THEN ? ELSE last_changed END, fingerprint = ?, "
+                "checks = checks + 1, changes = changes + ?, failures = failures + ?, "
+                "last_status = ?, last_error = ? WHERE url = ?",
+                (
+                    interval,
+                    now + _jitter(interval),
+                    now,
+                    changed,
+                    now,
+                    new_fingerprint,
+                    int(changed),
+                    int(error is not None),
+                    status,
+                    error,
+                    url,
+                ),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS total, SUM(next_check <= ?) AS due, "
+                "SUM(3600.0 / interval) AS demand_per_hour FROM watchlist",
+                (time.time(),),
+            ).fetchone()
+        return {
+            "total": row["total"],
+            "due": row["due"] or 0,
+            "demand_per_hour": round(row["demand_per_hour"] or 0.0, 1),
+        }
+
+
+class WatchMonitor:
+    """Background loop re-parsing due watchlist URLs within a crawl budget.
+
+    The budget is a token bucket refilled at ``watch_budget_per_hour``; when
+    the watchlist demands more checks than that, the most overdue URLs go
+    first and the rest simply wait, so crawl cost stays bounded no matter
+    how large the list grows. The parse function is injected by the API
+    layer, which owns caching and AI analysis.
+    """
+
+    def __init__(self, watchlist: Watchlist) -> None:
+        self.watchlist = watchlist
+        self._runner: Callable[[str, bool], Awaitable[Dict[str, Any]]] | None = None
+        self._task: asyncio.Task | None = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._tokens = 0.0
+        self._refilled_at = time.monotonic()
+
+    @property
+    def _burst(self) -> float:
+        # Не больше пяти минут бюджета за раз
+        return max(1.0, settings.watch_budget_per_hour / 12)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        rate = settings.watch_budget_per_hour / 3600
+        self._tokens = min(self._burst, self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+
+    def start(self, runner: Callable[[str, bool], Awaitable[Dict[str, Any]]]) -> None:
+        if self._task is not None:
+            return
+        self._runner = runner
+        self._tokens = self._burst
+        self._refilled_at = time.monotonic()
+        self._task = asyncio.create_task(self._loop())
+        logger.info("Мониторинг списка наблюдения запущен")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        for task in list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(self._task, *self._running.values(), return_exceptions=True)
+        self._task = None
+        self._running.clear()
+
+    async def _check(self, url: str, analyze: bool) -> None:
+        data, error = None, None
+        try:
+            try:
+                data = await self._runner(url, analyze)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Проверка {url} из списка наблюдения не удалась: {str(e)}")
+                error = str(e)
+            # Итог проверки записывается ровно один раз, даже если запись упала
+            try:
+                await asyncio.to_thread(self.watchlist.record_check, url, data, error)
+            except Exception as e:
+                logger.error(f"Не удалось сохранить результат проверки {url}: {str(e)}")
+        finally:
+            self._running.pop(url, None)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                self._refill()
+                slots = min(int(self._tokens), settings.watch_concurrency - len(self._running))
+                if slots > 0:
+                    due = await asyncio.to_thread(self.watchlist.due, slots, list(self._running))
+                    for item in due:
+                        self._tokens -= 1
+                        self._running[item["url"]] = asyncio.create_task(
+                            self._check(item["url"], bool(item["analyze"]))
+                        )
+            except Exception as e:
+                logger.error(f"Ошибка планировщика мониторинга: {str(e)}")
+            await asyncio.sleep(settings.watch_tick)
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "running": sorted(self._running),
+            "tokens": round(self._tokens, 2),
+            "budget_per_hour": settings.watch_budget_per_hour,
+        }
+
+
+watchlist = Watchlist()
+watch_monitor = WatchMonitor(watchlist)
@@ -0,0 +1,100 @@
+"""
+Отдельный процесс-воркер парсера
+
+Забирает задачи из локальной очереди (SQLite) и записывает результаты обратно.
+Запуск: python -m backend.worker --concurrency 3
+
+API-процесс в режиме PARSER_MODE=queue только ставит задачи в очередь, поэтому
+мощность парсинга масштабируется числом запущенных воркеров.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import uuid
+from typing import Dict
+
+from backend.config import logger, settings
+from backend.services.job_queue import job_queue
+from backend.services.parsingservice import driver_pool, parse_locally, start_parser, stop_parser
+
+
+async def _process(job: Dict[str, str], worker_id: str, running: Dict[str, asyncio.Task]) -> None:
+    try:
+        result = await parse_locally(job["url"])
+        await asyncio.to_thread(job_queue.complete, job["id"], worker_id, result)
+        logger.info(f"Задача {job['id']} выполнена: {job['url']}")
+    except Exception as e:
+        logger.error(f"Задача {job['id']} не выполнена (попытка {job['attempt']}): {str(e)}")
+        await asyncio.to_thread(job_queue.fail, job["id"], worker_id, str(e))
+    finally:
+        running.pop(job["id"], None)
+
+
+async def _heartbeat(worker_id: str, running: Dict[str, asyncio.Task]) -> None:
+    while True:
+        await asyncio.sleep(settings.parser_queue_lease / 3)
+        cancelled = await asyncio.to_thread(job_queue.heartbeat, list(running), worker_id)
+        for job_id in cancelled:
+            task = running.get(job_id)
+            if task is not None:
+                # Результат больше никто не ждёт - parse_locally остановит и поток Selenium
+                logger.info(f"Задача {job_id} отменена")
+                task.cancel()
+
+
+async def run_worker(concurrency: int, poll_interval: float = 0.5) -> None:
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    # Воркер парсит сам, поэтому браузеры запускаются при любом PARSER_MODE
+    await start_parser(local=True)
+    running: Dict[str, asyncio.Task] = {}
+    heartbeat = asyncio.create_task(_heartbeat(worker_id, running))
+    logger.info(f"Воркер {worker_id} запущен, параллельность {concurrency}")
+    try:
+        while not stopping.is_set():
+            if len(running) >= concurrency:
+                await asyncio.sleep(poll_interval / 5)
+                continue
+            job = await asyncio.to_thread(job_queue.claim, worker_id)
+            if job is None:
+                try:
+                    await asyncio.wait_for(stopping.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            running[job["id"]] = asyncio.create_task(_process(job, worker_id, running))
+    finally:
+        # Дорабатываем уже взятые задачи, новые не берём
+        if running:
+            await asyncio.gather(*running.values(), return_exceptions=True)
+        heartbeat.cancel()
+        await stop_parser()
+        logger.info(f"Воркер {worker_id} остановлен")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Воркер парсинга Competition Monitor")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=driver_pool.size,
+        help="Сколько задач обрабатывать одновременно (по умолчанию - размер пула браузеров)",
+    )
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(run_worker(args.concurrency, args.poll_interval))
+
+
+if __name__ == "__main__":
+    main()
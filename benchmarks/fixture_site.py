@@ -0,0 +1,156 @@
+"""
+Локальный сайт с синтетическими карточками товаров для бенчмарка парсера
+
+Виды страниц (номер товара задаёт содержимое, так что страницы не повторяются):
+    /static/<n> - серверная разметка с JSON-LD, справляется HTTP-уровень
+    /js/<n>     - пустой корень SPA, товар дорисовывается скриптом через fetch
+    /slow/<n>   - ответ с задержкой и медленный подгружаемый ресурс
+    /huge/<n>   - карточка внутри каталога из тысяч элементов
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+PAGE_KINDS = ("static", "js", "slow", "huge")
+
+
+def product(n: int) -> Dict[str, Any]:
+    return {
+        "name": f"Кожаная сумка модель {n}",
+        "price": 4990 + n * 10,
+        "currency": "RUB",
+        "description": f"Сумка ручной работы из натуральной кожи, модель {n}. " * 4,
+        "image": f"/img/{n}.jpg",
+    }
+
+
+def _jsonld(item: Dict[str, Any]) -> str:
+    data = {
+        "@context": "https://schema.org",
+        "@type": "Product",
+        "name": item["name"],
+        "description": item["description"],
+        "image": item["image"],
+        "offers": {"@type": "Offer", "price": item["price"], "priceCurrency": item["currency"]},
+    }
+    return f'<script type="application/ld+json">{json.dumps(data, ensure_ascii=False)}</script>'
+
+
+def _card(item: Dict[str, Any]) -> str:
+    return (
+        f'<div class="product"><h1 class="product-title">{item["name"]}</h1>'
+        f'<span class="price">{item["price"]} ₽</span>'
+        f'<img class="product-image" src="{item["image"]}">'
+        f'<div class="description"><p>{item["description"]}</p></div></div>'
+    )
+
+
+def _page(title: str, head: str, body: str) -> str:
+    return (
+        f'<!doctype html><html lang="ru"><head><meta charset="utf-8"><title>{title}</title>{head}</head>'
+        f"<body>{body}</body></html>"
+    )
+
+
+def render(kind: str, n: int, params: Dict[str, List[str]]) -> str:
+    item = product(n)
+    if kind == "static":
+        return _page(item["name"], _jsonld(item), _card(item))
+    if kind == "js":
+        script = f"""
+<script>
+setTimeout(function () {{
+  fetch('/api/product/{n}').then(function (r) {{ return r.json(); }}).then(function (p) {{
+    document.getElementById('root').innerHTML =
+      '<h1 class="product-title">' + p.name + '</h1><span class="price">' + p.price + ' ₽</span>' +
+      '<div class="description"><p>' + p.description + '</p></div>';
+  }});
+}}, 300);
+</script>"""
+        return _page("Загрузка...", "", f'<div id="root"></div>{script}')
+    if kind == "slow":
+        delay = params.get("asset_delay", ["2000"])[0]
+        return _page(
+            item["name"],
+            _jsonld(item),
+            _card(item) + f'<script src="/asset/slow.js?delay={delay}&n={n}"></script>',
+        )
+    if kind == "huge":
+        items = int(params.get("items", ["5000"])[0])
+        listing = "".join(
+            f'<li class="catalog-item"><a href="/static/{i}">Товар {i}</a><span class="old">{i * 7} ₽</span></li>'
+            for i in range(items)
+        )
+        return _page(item["name"], _jsonld(item), f"<nav><ul>{listing}</ul></nav>{_card(item)}")
+    raise KeyError(kind)
+
+
+class FixtureSite:
+    """Threaded HTTP server on a free localhost port."""
+
+    def __init__(self, slow_delay: float = 1.5) -> None:
+        self.slow_delay = slow_delay
+        self.requests = 0
+        self._server: ThreadingHTTPServer | None = None
+
+    def start(self) -> None:
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                site.requests += 1
+                parts = urlsplit(self.path)
+                params = parse_qs(parts.query)
+                segments = parts.path.strip("/").split("/")
+                try:
+                    if segments[0] == "api" and len(segments) == 3:
+                        body = json.dumps(product(int(segments[2])), ensure_ascii=False)
+                        return self._send(200, body, "application/json")
+                    if segments[0] == "asset":
+                        time.sleep(int(params.get("delay", ["0"])[0]) / 1000)
+                        return self._send(200, "window.__slowAsset = true;", "application/javascript")
+                    if segments[0] == "robots.txt":
+                        return self._send(200, "User-agent: *\nAllow: /\n", "text/plain")
+                    kind, n = segments[0], int(segments[1])
+                    if kind == "slow":
+                        time.sleep(float(params.get("delay", [site.slow_delay])[0]))
+                    return self._send(200, render(kind, n, params), "text/html; charset=utf-8")
+                except (KeyError, IndexError, ValueError):
+                    return self._send(404, "not found", "text/plain")
+
+            def _send(self, status: int, body: str, content_type: str) -> None:
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fixture-site", daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def urls(self, kinds: List[str], count: int, offset: int = 0) -> List[str]:
+        """``count`` distinct page URLs cycling through ``kinds``."""
+        return [f"{self.base_url}/{kinds[i % len(kinds)]}/{offset + i}" for i in range(count)]
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
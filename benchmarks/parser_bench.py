@@ -0,0 +1,282 @@
+"""
+Бенчмарк пропускной способности парсера на локальном сайте-фикстуре
+
+Запуск: python -m benchmarks.parser_bench --levels 1,2,4,8 --requests 40
+
+Для каждого уровня параллельности прогоняет страницы фикстуры через
+parse_competitor_data_async (HTTP-уровень + Selenium) и ParserService.parse_url
+(Playwright) и пишет в JSON: страниц в секунду, задержки p50/p95/p99, пиковую
+память процесса вместе с браузерами и число процессов Chrome.
+
+Данные парсера (профили загрузки, скриншоты, история) пишутся во временный
+каталог, а вежливость по хостам отключается - иначе весь прогон упирается
+в лимит параллельности одного хоста.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+import psutil
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.fixture_site import PAGE_KINDS, FixtureSite  # noqa: E402
+
+TARGETS = ("selenium", "playwright")
+
+
+def percentile(values: List[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = q * (len(ordered) - 1)
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return round(ordered[low] + (ordered[high] - ordered[low]) * (position - low), 1)
+
+
+class ProcessSampler:
+    """Polls RSS of this process and its children (chromedriver, Chrome) in a thread."""
+
+    def __init__(self, interval: float = 0.2) -> None:
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.peak_rss_mb = 0.0
+        self.peak_chrome = 0
+        self.peak_drivers = 0
+
+    def _sample(self) -> None:
+        me = psutil.Process()
+        try:
+            children = me.children(recursive=True)
+        except psutil.Error:
+            children = []
+        rss, chrome, drivers = me.memory_info().rss, 0, 0
+        for child in children:
+            try:
+                rss += child.memory_info().rss
+                name = child.name().lower()
+            except psutil.Error:
+                continue
+            if "chromedriver" in name:
+                drivers += 1
+            elif "chrom" in name or "headless_shell" in name:
+                chrome += 1
+        self.peak_rss_mb = max(self.peak_rss_mb, rss / (1024 * 1024))
+        self.peak_chrome = max(self.peak_chrome, chrome)
+        self.peak_drivers = max(self.peak_drivers, drivers)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "ProcessSampler":
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="bench-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "peak_chrome_processes": self.peak_chrome,
+            "peak_chromedriver_processes": self.peak_drivers,
+        }
+
+
+async def run_level(
+    parse: Callable[[str], Awaitable[Dict[str, Any]]], urls: List[str], concurrency: int
+) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    runs: List[Dict[str, Any]] = []
+
+    async def one(url: str) -> None:
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                outcome = await parse(url)
+            except Exception as e:
+                outcome = {"ok": False, "error": str(e)}
+            outcome["latency_ms"] = (time.monotonic() - started) * 1000
+            outcome["kind"] = url.rsplit("/", 2)[-2]
+            runs.append(outcome)
+
+    with ProcessSampler() as sampler:
+        started = time.monotonic()
+        await asyncio.gather(*(one(url) for url in urls))
+        wall = time.monotonic() - started
+
+    latencies = [r["latency_ms"] for r in runs]
+    by_kind: Dict[str, List[float]] = {}
+    for r in runs:
+        by_kind.setdefault(r["kind"], []).append(r["latency_ms"])
+    errors = [r.get("error") for r in runs if not r["ok"]]
+    tiers: Dict[str, int] = {}
+    for r in runs:
+        if r.get("tier"):
+            tiers[r["tier"]] = tiers.get(r["tier"], 0) + 1
+    return {
+        "concurrency": concurrency,
+        "requests": len(runs),
+        "wall_s": round(wall, 3),
+        "pages_per_sec": round(len(runs) / wall, 3) if wall else None,
+        "success_rate": round(1 - len(errors) / len(runs), 3) if runs else None,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies), 1) if latencies else None,
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+        },
+        "latency_p50_ms_by_kind": {kind: percentile(values, 0.5) for kind, values in sorted(by_kind.items())},
+        "fetch_tiers": tiers,
+        "errors": errors[:10],
+        **sampler.result(),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    # Ключ OpenAI обязателен для настроек, но бенчмарк к OpenAI не обращается
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    if args.pool_size:
+        os.environ["PARSER_POOL_SIZE"] = str(args.pool_size)
+        os.environ["PLAYWRIGHT_POOL_SIZE"] = str(args.pool_size)
+    from backend.config import settings
+
+    # Сервисы создают файлы данных при импорте - уводим их во временный каталог
+    workdir = tempfile.mkdtemp(prefix="cm-bench-")
+    os.chdir(workdir)
+    from backend.services import parsingservice
+    from backend.services.parser_service import ParserService
+
+    settings.parser_static_enabled = not args.no_static
+    settings.parser_respect_robots = False
+    settings.parser_selector_memo_enabled = False
+    scheduler = parsingservice.host_scheduler
+
+    site = FixtureSite(slow_delay=args.slow_delay)
+    site.start()
+    kinds = args.pages.split(",")
+    levels = [int(level) for level in args.levels.split(",")]
+    report: Dict[str, Any] = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "levels": levels,
+            "requests_per_level": args.requests,
+            "pages": kinds,
+            "slow_delay_s": args.slow_delay,
+            "static_tier": settings.parser_static_enabled,
+            "selenium_pool": parsingservice.driver_pool.stats(),
+            "playwright_pool_size": settings.playwright_pool_size,
+        },
+        "results": {},
+    }
+
+    offset = 0
+    try:
+        if "selenium" in args.targets:
+            await parsingservice.start_parser()
+
+            async def selenium_parse(url: str) -> Dict[str, Any]:
+                data = await parsingservice.parse_competitor_data_async(url)
+                return {
+                    "ok": data.get("parsing_status") in ("success", "partial"),
+                    "error": data.get("error"),
+                    "tier": data.get("fetch_tier"),
+                }
+
+            results = []
+            for level in levels:
+                # Без ограничений вежливости: все страницы фикстуры на одном хосте
+                scheduler.per_host = level
+                scheduler.min_delay = 0.0
+                urls = site.urls(kinds, args.requests, offset)
+                offset += args.requests
+                results.append(await run_level(selenium_parse, urls, level))
+                print(json.dumps(results[-1], ensure_ascii=False), flush=True)
+            report["results"]["selenium"] = results
+            await parsingservice.stop_parser()
+
+        if "playwright" in args.targets:
+            service = ParserService()
+            await service.start()
+
+            async def playwright_parse(url: str) -> Dict[str, Any]:
+                title, _, _, _, error = await service.parse_url(url)
+                return {"ok": error is None and bool(title), "error": error, "tier": "playwright"}
+
+            results = []
+            for level in levels:
+                urls = site.urls(kinds, args.requests, offset)
+                offset += args.requests
+                results.append(await run_level(playwright_parse, urls, level))
+                print(json.dumps(results[-1], ensure_ascii=False), flush=True)
+            report["results"]["playwright"] = results
+            await service.stop()
+    finally:
+        site.stop()
+    report["fixture_requests"] = site.requests
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк парсера на локальном сайте-фикстуре")
+    parser.add_argument("--levels", default="1,2,4,8", help="Уровни параллельности через запятую")
+    parser.add_argument("--requests", type=int, default=40, help="Страниц на каждый уровень")
+    parser.add_argument("--pages", default=",".join(PAGE_KINDS), help=f"Виды страниц: {', '.join(PAGE_KINDS)}")
+    parser.add_argument("--targets", default=",".join(TARGETS), help=f"Что измерять: {', '.join(TARGETS)}")
+    parser.add_argument("--pool-size", type=int, help="Размер пулов браузеров (по умолчанию из настроек)")
+    parser.add_argument("--slow-delay", type=float, default=1.5, help="Задержка ответа /slow в секундах")
+    parser.add_argument("--no-static", action="store_true", help="Все страницы через браузер, без HTTP-уровня")
+    parser.add_argument("--output", type=Path, help="Файл результатов (по умолчанию benchmarks/results/)")
+    args = parser.parse_args()
+    unknown = set(args.pages.split(",")) - set(PAGE_KINDS)
+    if unknown:
+        parser.error(f"Неизвестные виды страниц: {', '.join(sorted(unknown))}")
+
+    output = args.output
+    if output is None:
+        output = ROOT / "benchmarks" / "results" / f"parser-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output = output.resolve()
+    report = asyncio.run(main_async(args))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Результаты: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -47,10 +47,14 @@ def main():
         ("uvicorn", "uvicorn"),
         ("openai", "openai"),
         ("selenium", "selenium"),
+        ("playwright", "playwright"),
         ("pydantic", "pydantic"),
         ("pydantic_settings", "pydantic-settings"),
         ("dotenv", "python-dotenv"),
         ("httpx", "httpx"),
+        ("bs4", "beautifulsoup4"),
+        ("PIL", "Pillow"),
+        ("psutil", "psutil"),
     ]
     
     backend_ok = all(check_module(mod, pkg) for mod, pkg in backend_deps)
@@ -2,6 +2,7 @@ import os
 import sys
 from pathlib import Path
 
+import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 
@@ -10,6 +11,10 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+# Настройки требуют ключ OpenAI; тесты к OpenAI не обращаются
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from backend.config import settings  # noqa: E402
 from backend.main import app  # noqa: E402
 
 
@@ -23,3 +28,15 @@ async def client():
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
 
+
+@pytest.fixture
+def make_store(tmp_path, monkeypatch):
+    """
+    Создаёт сервис с хранилищем во временном каталоге вместо рабочих файлов:
+    make_store(ChangeTracker, "change_tracker_file")
+    """
+    def make(cls, setting):
+        monkeypatch.setattr(settings, setting, str(tmp_path / setting))
+        return cls()
+
+    return make
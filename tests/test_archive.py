@@ -0,0 +1,41 @@
+import pytest
+
+from backend import archive as archive_cli
+from backend.config import settings
+from backend.services.load_profiles import LoadProfileStore
+from backend.services.selector_memo import SelectorMemo
+
+
+@pytest.fixture
+def stores(make_store, monkeypatch):
+    monkeypatch.setattr(settings, "parser_selector_memo_enabled", True)
+    monkeypatch.setattr(settings, "parser_domain_profiles", {})
+    profiles = make_store(LoadProfileStore, "parser_load_profiles_file")
+    memo = make_store(SelectorMemo, "parser_selector_memo_file")
+    monkeypatch.setattr(archive_cli, "load_profiles", profiles)
+    monkeypatch.setattr(archive_cli, "selector_memo", memo)
+    return profiles, memo
+
+
+def test_frozen_stores_learn_nothing(stores):
+    profiles, memo = stores
+    archive_cli._freeze_learning()
+    for _ in range(5):
+        profiles.record("https://shop.ru/p", 0.2, 0.4, 0.1, timed_out=True, usable=True)
+        memo.record("https://shop.ru/p", {"title": [".product-title"]}, {"title": ".product-title"})
+    assert profiles.snapshot() == {}
+    assert memo.snapshot() == {}
+    profiles.save()
+    memo.save()
+    assert not profiles.file_path.exists() and not memo.file_path.exists()
+
+
+def test_replay_pins_recorded_profile(stores):
+    profiles, _ = stores
+    recorded = {"strategy": "none", "nav_timeout": 7.0, "ready_max_wait": 1.5, "stop_early": True, "source": "learned"}
+    archive_cli._pin_profiles([{"url": "https://www.shop.ru/p/1", "load_profile": recorded}, {"url": "https://other.ru/"}])
+
+    profile = profiles.profile_for("http://shop.ru/p/2")
+    assert (profile.strategy, profile.nav_timeout, profile.ready_max_wait, profile.stop_early) == ("none", 7.0, 1.5, True)
+    assert profile.source == "override"
+    assert profiles.profile_for("https://other.ru/").source == "default"
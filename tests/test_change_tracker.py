@@ -0,0 +1,101 @@
+import httpx
+import pytest
+
+from backend.services import change_tracker as change_tracker_module
+from backend.services.change_tracker import ChangeTracker, content_hash
+from backend.services.deadline import DeadlineExceeded, deadline_scope
+
+URL = "https://shop.example/product/1"
+# Каркас SPA: цена и название дорисовываются скриптом, HTML не меняется
+SHELL = '<html><head><title>Магазин</title></head><body><div id="root"></div><script>app()</script></body></html>'
+
+
+@pytest.fixture
+def tracker(make_store):
+    return make_store(ChangeTracker, "change_tracker_file")
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Подменяет HTTP-клиент статического уровня; возвращает список заголовков запросов."""
+    seen = []
+
+    def install(handler):
+        def respond(request):
+            seen.append(request.headers)
+            return handler(request)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+        monkeypatch.setattr(change_tracker_module.static_fetcher, "_client", client)
+        return seen
+
+    return install
+
+
+def _payload(tier, price="1 299 ₽"):
+    return {"url": URL, "product_name": "Сумка", "price": price, "parsing_status": "success", "fetch_tier": tier}
+
+
+def test_content_hash_ignores_scripts_and_hidden_inputs():
+    first = '<p>Цена 100</p><script>var t = 1;</script><input type="hidden" value="a">'
+    second = '<p>Цена  100</p><script>var t = 2;</script><input type="hidden" value="b">'
+    assert content_hash(first) == content_hash(second)
+    assert content_hash(first) != content_hash("<p>Цена 200</p>")
+
+
+@pytest.mark.asyncio
+async def test_static_tier_page_with_same_html_is_unchanged(tracker, serve):
+    serve(lambda request: httpx.Response(200, html=SHELL, headers={"etag": '"v1"'}))
+    first = await tracker.probe(URL)
+    assert first.status == "new"
+    await tracker.record(URL, first, _payload("static"))
+
+    second = await tracker.probe(URL)
+    assert second.status == "unchanged"
+    assert second.previous["price"] == "1 299 ₽"
+
+
+@pytest.mark.asyncio
+async def test_static_tier_page_sends_validators(tracker, serve):
+    serve(lambda request: httpx.Response(200, html=SHELL, headers={"etag": '"v1"'}))
+    await tracker.record(URL, await tracker.probe(URL), _payload("static"))
+
+    seen = serve(lambda request: httpx.Response(304))
+    assert (await tracker.probe(URL)).status == "unchanged"
+    assert seen[-1]["if-none-match"] == '"v1"'
+
+
+@pytest.mark.asyncio
+async def test_browser_tier_page_with_same_html_is_reparsed(tracker, serve):
+    seen = serve(lambda request: httpx.Response(200, html=SHELL, headers={"etag": '"v1"'}))
+    await tracker.record(URL, await tracker.probe(URL), _payload("browser"))
+
+    probe = await tracker.probe(URL)
+    assert probe.status == "unknown"
+    assert not probe.unchanged
+    # HTML всё равно отдаётся парсеру, а валидаторы не отправляются - иначе пришёл бы 304 без тела
+    assert probe.html == SHELL
+    assert "if-none-match" not in seen[-1]
+
+
+@pytest.mark.asyncio
+async def test_probe_timeout_is_capped_by_deadline(tracker, serve):
+    timeouts = []
+
+    def handler(request):
+        timeouts.append(request.extensions["timeout"]["read"])
+        return httpx.Response(200, html=SHELL)
+
+    serve(handler)
+    with deadline_scope(0.5):
+        await tracker.probe(URL)
+    assert 0 < timeouts[0] <= 0.5
+
+
+@pytest.mark.asyncio
+async def test_probe_stops_when_deadline_expired(tracker, serve):
+    seen = serve(lambda request: httpx.Response(200, html=SHELL))
+    with deadline_scope(0):
+        with pytest.raises(DeadlineExceeded):
+            await tracker.probe(URL)
+    assert seen == []
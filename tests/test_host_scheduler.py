@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.services import host_scheduler as host_scheduler_module
+from backend.services.host_scheduler import HostScheduler, host_key
+from backend.services.timings import timeline_scope
+
+
+@pytest.fixture(autouse=True)
+def no_robots(monkeypatch):
+    monkeypatch.setattr(host_scheduler_module.settings, "parser_respect_robots", False)
+
+
+async def _run(scheduler, urls, order, hold=0.01):
+    async def one(url):
+        async with scheduler.slot(url):
+            order.append((host_key(url), time.monotonic()))
+            await asyncio.sleep(hold)
+
+    tasks = []
+    for url in urls:
+        tasks.append(asyncio.create_task(one(url)))
+        await asyncio.sleep(0)  # фиксируем порядок постановки в очередь
+    await asyncio.gather(*tasks)
+
+
+def test_host_key_drops_www():
+    assert host_key("https://WWW.Shop.ru/item") == "shop.ru"
+
+
+@pytest.mark.asyncio
+async def test_per_host_limit():
+    scheduler = HostScheduler(capacity=4, per_host=1, min_delay=0.0)
+    active, peak = 0, 0
+
+    async def one():
+        nonlocal active, peak
+        async with scheduler.slot("https://shop.ru/p"):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(one() for _ in range(3)))
+    assert peak == 1
+
+
+@pytest.mark.asyncio
+async def test_hosts_are_served_round_robin():
+    scheduler = HostScheduler(capacity=1, per_host=1, min_delay=0.0)
+    order = []
+    urls = [f"https://big.ru/{i}" for i in range(4)] + ["https://small.ru/1", "https://other.ru/1"]
+    await _run(scheduler, urls, order)
+    hosts = [host for host, _ in order]
+    # Маленькие хосты не ждут, пока обработается вся очередь большого
+    assert hosts.index("small.ru") < 3
+    assert hosts.index("other.ru") < 4
+    assert hosts.count("big.ru") == 4
+
+
+@pytest.mark.asyncio
+async def test_min_delay_between_starts_on_one_host():
+    scheduler = HostScheduler(capacity=4, per_host=4, min_delay=0.2)
+    order = []
+    await _run(scheduler, ["https://shop.ru/1", "https://shop.ru/2", "https://other.ru/1"], order)
+    starts = {}
+    for host, started in order:
+        starts.setdefault(host, []).append(started)
+    assert starts["shop.ru"][1] - starts["shop.ru"][0] >= 0.19
+    # Задержка действует на хост, а не на весь планировщик
+    assert starts["other.ru"][0] - starts["shop.ru"][0] < 0.1
+
+
+@pytest.mark.asyncio
+async def test_crawl_delay_overrides_smaller_min_delay():
+    scheduler = HostScheduler(capacity=2, per_host=2, min_delay=0.0)
+    scheduler._host("shop.ru").crawl_delay = 0.2
+    order = []
+    await _run(scheduler, ["https://shop.ru/1", "https://shop.ru/2"], order)
+    assert order[1][1] - order[0][1] >= 0.19
+
+
+@pytest.mark.asyncio
+async def test_nested_slot_for_same_host_does_not_wait():
+    scheduler = HostScheduler(capacity=1, per_host=1, min_delay=10.0)
+    async with scheduler.slot("https://shop.ru/1"):
+        await asyncio.wait_for(_enter(scheduler, "https://www.shop.ru/2"), timeout=1)
+        assert scheduler.stats()["active"] == 1
+    assert scheduler.stats()["active"] == 0
+
+
+async def _enter(scheduler, url):
+    async with scheduler.slot(url):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_slot_wait_is_recorded_once_by_outer_entry():
+    scheduler = HostScheduler(capacity=1, per_host=1, min_delay=0.0)
+    with timeline_scope() as timeline:
+        async with scheduler.slot("https://other.ru/1"):
+            blocked = asyncio.create_task(_enter(scheduler, "https://shop.ru/1"))
+            await asyncio.sleep(0.1)
+        await blocked
+        async with scheduler.slot("https://shop.ru/2"):
+            await _enter(scheduler, "https://shop.ru/3")
+    waits = [entry for entry in timeline.spans() if entry["stage"] == "host_slot_wait"]
+    # other.ru, shop.ru/1 (ждал освобождения слота) и внешний вход shop.ru/2
+    assert len(waits) == 3
+    assert max(entry["duration_ms"] for entry in waits) >= 90
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_frees_its_place():
+    scheduler = HostScheduler(capacity=1, per_host=1, min_delay=0.0)
+    async with scheduler.slot("https://shop.ru/1"):
+        waiting = asyncio.create_task(_enter(scheduler, "https://shop.ru/2"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+    await asyncio.wait_for(_enter(scheduler, "https://shop.ru/3"), timeout=1)
+    assert scheduler.stats()["active"] == 0
@@ -0,0 +1,76 @@
+import pytest
+
+from backend.config import settings
+from backend.services.job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(make_store):
+    return make_store(JobQueue, "parser_queue_file")
+
+
+def test_claim_leases_oldest_job_once(queue):
+    first = queue.submit("https://shop.ru/p/1")
+    second = queue.submit("https://shop.ru/p/2")
+    assert queue.claim("w1") == {"id": first, "url": "https://shop.ru/p/1", "attempt": 1}
+    assert queue.claim("w2")["id"] == second
+    assert queue.claim("w3") is None
+    assert queue.get(first)["worker_id"] == "w1"
+
+
+def test_failed_job_is_retried_until_attempts_run_out(queue, monkeypatch):
+    monkeypatch.setattr(settings, "parser_queue_max_attempts", 2)
+    job_id = queue.submit("https://shop.ru/p/1")
+    queue.claim("w1")
+    queue.fail(job_id, "w1", "Chrome упал")
+    assert queue.get(job_id)["status"] == "queued"
+    assert queue.claim("w2")["attempt"] == 2
+    queue.fail(job_id, "w2", "Chrome упал снова")
+    assert queue.get(job_id)["status"] == "failed"
+    assert queue.claim("w3") is None
+
+
+def test_expired_lease_is_claimed_again(queue, monkeypatch):
+    monkeypatch.setattr(settings, "parser_queue_lease", -1)
+    job_id = queue.submit("https://shop.ru/p/1")
+    queue.claim("w1")
+    assert queue.claim("w2")["id"] == job_id
+
+
+def test_result_of_other_worker_is_ignored(queue):
+    job_id = queue.submit("https://shop.ru/p/1")
+    queue.claim("w1")
+    queue.complete(job_id, "w2", {"parsing_status": "success"})
+    assert queue.get(job_id)["status"] == "running"
+    queue.complete(job_id, "w1", {"parsing_status": "success"})
+    assert queue.get(job_id)["result"] == {"parsing_status": "success"}
+    assert queue.purge(older_than=-1) == 1
+
+
+def test_cancelled_job_is_not_claimed(queue):
+    job_id = queue.submit("https://shop.ru/p/1")
+    assert queue.cancel(job_id)
+    assert queue.claim("w1") is None
+    assert queue.get(job_id)["status"] == "cancelled"
+
+
+def test_running_job_cancel_reaches_worker_heartbeat(queue):
+    job_id = queue.submit("https://shop.ru/p/1")
+    other_id = queue.submit("https://shop.ru/p/2")
+    assert queue.claim("w1")["id"] == job_id
+    assert queue.claim("w1")["id"] == other_id
+    queue.cancel(job_id)
+
+    assert queue.heartbeat([job_id, other_id], "w1") == [job_id]
+    # Поздний результат отменённой задачи её не воскрешает
+    queue.complete(job_id, "w1", {"parsing_status": "success"})
+    assert queue.get(job_id)["status"] == "cancelled"
+
+
+def test_finished_job_cannot_be_cancelled(queue):
+    job_id = queue.submit("https://shop.ru/p/1")
+    queue.claim("w1")
+    queue.complete(job_id, "w1", {"parsing_status": "success"})
+    assert not queue.cancel(job_id)
+    assert queue.get(job_id)["status"] == "done"
+    assert queue.purge(older_than=-1) == 1
@@ -0,0 +1,28 @@
+import pytest
+
+from backend.config import settings
+from backend.services.load_profiles import LoadProfileStore
+
+
+@pytest.fixture
+def profiles(make_store, monkeypatch):
+    monkeypatch.setattr(settings, "parser_domain_profiles", {})
+    return make_store(LoadProfileStore, "parser_load_profiles_file")
+
+
+def test_learned_ready_wait_follows_measurements(profiles):
+    for _ in range(3):
+        profiles.record("https://shop.ru/p", 1.0, 2.0, 1.5, timed_out=False, usable=True)
+    profile = profiles.profile_for("https://www.shop.ru/other")
+    assert profile.source == "learned"
+    assert profile.ready_max_wait == pytest.approx(min(3.0, settings.parser_ready_max_wait))
+
+
+def test_failed_navigation_does_not_shrink_ready_wait(profiles):
+    for _ in range(3):
+        profiles.record("https://shop.ru/p", 1.0, 2.0, 1.5, timed_out=False, usable=True)
+    before = profiles.profile_for("https://shop.ru/p").ready_max_wait
+    # Страница не загрузилась - до ожидания готовности дело не дошло
+    for _ in range(3):
+        profiles.record("https://shop.ru/p", None, None, None, timed_out=True, usable=False)
+    assert profiles.profile_for("https://shop.ru/p").ready_max_wait == before
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from backend.services.deadline import DeadlineExceeded, current_deadline, deadline_scope
+from backend.services.parse_cache import ParseCache
+
+
+@pytest.fixture
+def cache(make_store):
+    return make_store(ParseCache, "parse_cache_file")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_parse(cache):
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"parsing_status": "success", "price": "100"}
+
+    results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(3)))
+
+    assert calls == 1
+    assert sorted(info["status"] for _, info in results) == ["coalesced", "coalesced", "miss"]
+    # Каждому вызывающему - своя копия результата
+    results[0][0]["price"] = "200"
+    assert results[1][0]["price"] == "100"
+
+
+@pytest.mark.asyncio
+async def test_hit_from_memory_then_disk(cache):
+    async def compute():
+        return {"parsing_status": "success"}
+
+    await cache.get_or_compute("k", compute)
+    assert (await cache.get_or_compute("k", compute))[1]["tier"] == "memory"
+
+    # Новый экземпляр на том же файле - как после перезапуска
+    restarted = ParseCache()
+    assert (await restarted.get_or_compute("k", compute))[1]["tier"] == "disk"
+    assert (await restarted.get_or_compute("k", compute, force_refresh=True))[1]["status"] == "miss"
+
+
+@pytest.mark.asyncio
+async def test_uncacheable_result_is_not_stored(cache):
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return {"parsing_status": "failed"}
+
+    for _ in range(2):
+        await cache.get_or_compute("k", compute, cacheable=lambda value: value["parsing_status"] == "success")
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_parse_ignores_starter_deadline(cache):
+    seen = {}
+
+    async def compute():
+        seen["deadline"] = current_deadline()
+        await asyncio.sleep(0.3)
+        return {"parsing_status": "success"}
+
+    async def impatient():
+        with deadline_scope(0.05):
+            return await cache.get_or_compute("k", compute)
+
+    first = asyncio.create_task(impatient())
+    await asyncio.sleep(0.01)
+    value, info = await cache.get_or_compute("k", compute)
+
+    assert seen["deadline"] is None
+    assert value == {"parsing_status": "success"}
+    assert info["status"] == "coalesced"
+    with pytest.raises(DeadlineExceeded):
+        await first
+    # Результат полного парсинга попал в кэш
+    assert (await cache.get_or_compute("k", compute))[1]["status"] == "hit"
+
+
+@pytest.mark.asyncio
+async def test_last_waiter_leaving_cancels_shared_parse(cache):
+    cancelled = asyncio.Event()
+
+    async def compute():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def waiter(seconds):
+        with deadline_scope(seconds):
+            await cache.get_or_compute("k", compute)
+
+    short = asyncio.create_task(waiter(0.05))
+    long = asyncio.create_task(waiter(0.2))
+    results = await asyncio.gather(short, long, return_exceptions=True)
+
+    assert all(isinstance(result, DeadlineExceeded) for result in results)
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert cache.stats()["inflight"] == 0
@@ -0,0 +1,75 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from backend.config import settings
+from backend.services.screenshot_store import VARIANTS, ScreenshotError, ScreenshotStore
+
+
+@pytest.fixture
+def store(make_store, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "screenshot_dir", str(tmp_path / "screenshots"))
+    monkeypatch.setattr(settings, "screenshot_vision_max_side", 200)
+    return make_store(ScreenshotStore, "screenshot_index_file")
+
+
+def _image():
+    image = Image.new("RGB", (640, 400), "white")
+    for x in range(0, 640, 40):
+        image.paste((x % 256, 80, 160), (x, 0, x + 20, 400))
+    return image
+
+
+def _encode(image, fmt, **params):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def test_same_pixels_in_different_encodings_share_one_id(store):
+    image = _image()
+    fast = _encode(image, "PNG", compress_level=1)
+    small = _encode(image, "PNG", compress_level=9, optimize=True)
+    assert fast != small
+
+    first = store.save(fast, source_url="https://shop.ru/p")
+    second = store.save(small)
+    assert first["id"] == second["id"]
+    assert second["captures"] == 2
+    assert store.stats()["images"] == 1
+    # Другие пиксели - другой id
+    assert store.save(_encode(image.rotate(180), "PNG"))["id"] != first["id"]
+
+
+def test_variants_are_downscaled_webp(store):
+    meta = store.save(_encode(_image(), "PNG"))
+    assert (meta["width"], meta["height"]) == (640, 400)
+    assert meta["variants"] == ["original", *VARIANTS]
+
+    path, media_type = store.file(meta["id"], "original")
+    assert media_type == "image/png" and path.exists()
+    for variant in VARIANTS:
+        path, media_type = store.file(meta["id"], variant)
+        assert media_type == "image/webp"
+        with Image.open(path) as stored:
+            assert stored.format == "WEBP"
+            assert max(stored.size) <= 640
+    with Image.open(store.file(meta["id"], "vision")[0]) as vision:
+        assert vision.size == (200, 125)
+    with Image.open(store.file(meta["id"], "thumb")[0]) as thumb:
+        assert max(thumb.size) == 320
+
+
+def test_data_url_and_base64_roundtrip(store):
+    data = _encode(_image(), "PNG")
+    meta = store.save_base64("data:image/png;base64," + base64.b64encode(data).decode("ascii"))
+    assert store.data_url(meta["id"]).startswith("data:image/webp;base64,")
+    with pytest.raises(ScreenshotError):
+        store.file(meta["id"], "poster")
+
+
+def test_not_an_image_is_rejected(store):
+    with pytest.raises(ScreenshotError):
+        store.save(b"<html>not an image</html>")
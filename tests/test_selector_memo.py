@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+from backend.config import settings
+from backend.services import selector_memo as selector_memo_module
+from backend.services.page_selectors import PRICE_SELECTORS
+from backend.services.selector_memo import _DEAD_AFTER, _DEAD_TTL, _INVALIDATE_AFTER, SelectorMemo
+
+URL = "https://shop.ru/product/1"
+
+
+@pytest.fixture
+def memo(make_store, monkeypatch):
+    monkeypatch.setattr(settings, "parser_selector_memo_enabled", True)
+    return make_store(SelectorMemo, "parser_selector_memo_file")
+
+
+def _extract(memo, winner, url=URL):
+    """Как экстрактор: перебирает цены в выученном порядке до ``winner``."""
+    tried = memo.selectors_for(url)["price"]
+    memo.record(url, {"price": tried}, {"price": winner})
+
+
+def test_winner_is_tried_first(memo):
+    assert memo.selectors_for(URL)["price"] == PRICE_SELECTORS
+    _extract(memo, ".cost")
+    order = memo.selectors_for("https://www.shop.ru/product/2")["price"]
+    assert order[0] == ".cost"
+    assert sorted(order) == sorted(PRICE_SELECTORS)
+    # Память своя у каждого домена
+    assert memo.selectors_for("https://other.ru/p")["price"] == PRICE_SELECTORS
+
+
+def test_most_hits_first(memo):
+    _extract(memo, ".cost")
+    _extract(memo, ".amount")
+    _extract(memo, ".amount")
+    assert memo.selectors_for(URL)["price"][:2] == [".amount", ".cost"]
+
+
+def test_winner_missing_repeatedly_invalidates_field(memo):
+    for _ in range(3):
+        _extract(memo, ".cost")
+    for _ in range(_INVALIDATE_AFTER - 1):
+        _extract(memo, ".price")
+    # Прежний лидер ещё впереди: хватает попаданий
+    assert memo.selectors_for(URL)["price"][0] == ".cost"
+    _extract(memo, ".price")
+    assert memo.snapshot()["shop.ru"]["price"] is None
+    assert memo.selectors_for(URL)["price"] == PRICE_SELECTORS
+
+
+def test_winner_hit_resets_miss_streak(memo):
+    _extract(memo, ".cost")
+    for _ in range(_INVALIDATE_AFTER - 1):
+        _extract(memo, ".price")
+        _extract(memo, ".cost")
+    assert memo.snapshot()["shop.ru"]["price"] == ".cost"
+
+
+def test_dead_selectors_are_dropped_until_ttl(memo, monkeypatch):
+    # Цены на страницах не нашлось: все перебранные селекторы промахнулись
+    for _ in range(_DEAD_AFTER - 1):
+        memo.record(URL, {"price": PRICE_SELECTORS[:3]}, {"price": None})
+    assert memo.selectors_for(URL)["price"] == PRICE_SELECTORS
+    memo.record(URL, {"price": PRICE_SELECTORS[:3]}, {"price": None})
+    assert memo.selectors_for(URL)["price"] == PRICE_SELECTORS[3:]
+
+    later = time.time() + _DEAD_TTL + 1
+    monkeypatch.setattr(selector_memo_module.time, "time", lambda: later)
+    assert memo.selectors_for(URL)["price"] == PRICE_SELECTORS
+
+
+def test_selector_that_ever_hit_is_not_dead(memo):
+    _extract(memo, ".price")
+    for _ in range(_DEAD_AFTER + _INVALIDATE_AFTER):
+        memo.record(URL, {"price": PRICE_SELECTORS[:2]}, {"price": ".product-price"})
+    order = memo.selectors_for(URL)["price"]
+    assert order[0] == ".product-price"
+    assert ".price" in order
+
+
+def test_frozen_memo_learns_nothing(memo):
+    memo.frozen = True
+    _extract(memo, ".cost")
+    assert memo.selectors_for(URL)["price"] == PRICE_SELECTORS
+
+
+def test_memo_survives_restart(memo, make_store):
+    _extract(memo, ".cost")
+    memo.save()
+    assert make_store(SelectorMemo, "parser_selector_memo_file").selectors_for(URL)["price"][0] == ".cost"
@@ -0,0 +1,88 @@
+import asyncio
+import gzip
+
+import pytest
+
+from backend.services.sitemap_discovery import SitemapEntries, run_bounded
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+URLSET = (
+    f"<?xml version='1.0' encoding='UTF-8'?><urlset {NS}>"
+    + "".join(
+        f"<url><loc>https://shop.ru/product/{i}</loc><lastmod>2024-05-0{i % 9 + 1}</lastmod></url>"
+        for i in range(50)
+    )
+    + "</urlset>"
+).encode()
+INDEX = (
+    f"<sitemapindex {NS}>"
+    "<sitemap><loc>https://shop.ru/sitemap-products.xml.gz</loc><lastmod>2024-05-01</lastmod></sitemap>"
+    "<sitemap><loc>https://shop.ru/sitemap-blog.xml</loc></sitemap>"
+    "</sitemapindex>"
+).encode()
+
+
+def _parse(data, chunk_size=64):
+    entries = SitemapEntries()
+    found = []
+    for start in range(0, len(data), chunk_size):
+        found.extend(entries.feed(data[start:start + chunk_size]))
+    found.extend(entries.close())
+    return found
+
+
+def test_urlset_in_small_chunks():
+    found = _parse(URLSET)
+    assert len(found) == 50
+    assert found[0] == {"kind": "url", "loc": "https://shop.ru/product/0", "lastmod": "2024-05-01"}
+
+
+def test_gzip_is_sniffed_from_magic_bytes():
+    assert _parse(gzip.compress(URLSET), chunk_size=32) == _parse(URLSET)
+
+
+def test_sitemap_index_yields_child_sitemaps():
+    found = _parse(INDEX)
+    assert [entry["kind"] for entry in found] == ["sitemap", "sitemap"]
+    assert found[0]["loc"] == "https://shop.ru/sitemap-products.xml.gz"
+    assert found[1]["lastmod"] is None
+
+
+def test_root_is_cleared_while_streaming():
+    entries = SitemapEntries()
+    head, tail = URLSET[: len(URLSET) // 2], URLSET[len(URLSET) // 2:]
+    first = list(entries.feed(head))
+    assert first
+    # Разобранные элементы не копятся в дереве
+    assert len(entries._root) <= 1
+    rest = list(entries.feed(tail)) + list(entries.close())
+    assert len(first) + len(rest) == 50
+    assert len(entries._root) == 0
+
+
+async def _source(count, fail=False):
+    for i in range(count):
+        yield {"url": f"https://shop.ru/{i}"}
+        await asyncio.sleep(0)
+    if fail:
+        raise RuntimeError("sitemap оборвался")
+
+
+async def _work(item):
+    if item["url"].endswith("/3"):
+        raise ValueError("не распарсилось")
+    return {**item, "ok": True}
+
+
+@pytest.mark.asyncio
+async def test_run_bounded_reports_worker_errors_per_item():
+    results = [r async for r in run_bounded(_source(6), _work, concurrency=2)]
+    assert len(results) == 6
+    assert [r for r in results if "error" in r] == [{"url": "https://shop.ru/3", "error": "не распарсилось"}]
+
+
+@pytest.mark.asyncio
+async def test_run_bounded_ends_with_error_line_when_source_fails():
+    results = [r async for r in run_bounded(_source(4, fail=True), _work, concurrency=2)]
+    assert len(results) == 5
+    assert results[-1] == {"error": "sitemap оборвался"}
@@ -0,0 +1,44 @@
+import pytest
+
+from backend.config import settings
+from backend.services.snapshot_store import SnapshotStore, _detail
+
+URL = "https://shop.ru/p/1"
+PAYLOAD = {
+    "product_name": "Сумка Aurora",
+    "price": "4990 RUB",
+    "price_value": 4990.0,
+    "description": "Сумка ручной работы из натуральной кожи.",
+    "parsing_status": "success",
+}
+
+
+def test_similarity_is_exact_ratio():
+    # quick_ratio считает только общие символы: для перестановки он дал бы 1.0
+    assert _detail("product_name", "abc", "cba")["similarity"] == pytest.approx(0.333, abs=1e-3)
+    assert _detail("product_name", "Сумка", "Сумка")["similarity"] == 1.0
+
+
+def test_price_detail():
+    assert _detail("price_value", 5000.0, 4500.0) == {"delta": -500.0, "percent": -10.0}
+    assert _detail("price_value", None, 4500.0) is None
+
+
+@pytest.fixture
+def store(make_store, monkeypatch):
+    monkeypatch.setattr(settings, "snapshot_keyframe_interval", 2)
+    return make_store(SnapshotStore, "snapshot_file")
+
+
+def test_versions_roundtrip_through_deltas(store):
+    assert store.record(URL, PAYLOAD) == []
+    assert store.record(URL, PAYLOAD) == []
+    discounted = {**PAYLOAD, "price": "4490 RUB", "price_value": 4490.0}
+    changes = store.record(URL, discounted)
+    assert {change["field"] for change in changes} == {"price", "price_value"}
+    store.record(URL, {**discounted, "description": "Сумка из экокожи."})
+
+    assert [v["keyframe"] for v in store.versions(URL)] == [1, 0, 1]
+    assert store.get_version(URL, 2)["price_value"] == 4490.0
+    assert store.get_version(URL, 3)["description"] == "Сумка из экокожи."
+    assert [c["field"] for c in store.changes_since(0, url=URL)] == ["price", "price_value", "description"]
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from backend.services import static_fetcher as static_fetcher_module
+from backend.services.selector_memo import SelectorMemo
+from backend.services.static_fetcher import _needs_javascript, extract_from_html
+
+FIXTURES = Path(__file__).parent / "fixtures" / "static"
+URL = "https://shop.example/product/1"
+
+
+@pytest.fixture(autouse=True)
+def memo(make_store, monkeypatch):
+    memo = make_store(SelectorMemo, "parser_selector_memo_file")
+    monkeypatch.setattr(static_fetcher_module, "selector_memo", memo)
+    return memo
+
+
+def _html(name):
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize(
+    "html, expected",
+    [
+        ('<body><div id="root"></div></body>', True),
+        ('<body><div id="__next"><p>Загрузка...</p></div></body>', True),
+        ("<body></body>", True),
+        ("<body><noscript>Включите JavaScript, чтобы открыть магазин</noscript>" + "<p>текст</p>" * 50 + "</body>", True),
+        ('<body><div id="root">' + "<p>Описание товара</p>" * 20 + "</div></body>", False),
+        ("<body><h1>Сумка</h1><p>1 299 ₽</p></body>", False),
+    ],
+)
+def test_needs_javascript(html, expected):
+    soup = BeautifulSoup(html, "html.parser")
+    body_text = soup.body.get_text("\n", strip=True)
+    assert _needs_javascript(soup, len(body_text)) is expected
+
+
+@pytest.mark.parametrize(
+    "fixture, reason, fields",
+    [
+        (
+            "ssr_product.html",
+            None,
+            {
+                "title": "Кожаная сумка Tote",
+                "price": "12 990 ₽",
+                "image_url": "https://shop.example/img/tote.jpg",
+                "structured": [],
+            },
+        ),
+        ("js_shell.html", "needs_js", None),
+        (
+            "jsonld_only.html",
+            None,
+            {
+                "title": "Кроссовки Runner",
+                "price_value": 7490.0,
+                "currency": "RUB",
+                "image_url": "https://shop.example/img/runner.jpg",
+                "structured": ["title", "price", "image_url", "description"],
+            },
+        ),
+    ],
+)
+def test_extract_from_html(fixture, reason, fields):
+    info, escalation = extract_from_html(_html(fixture), URL)
+    assert escalation == reason
+    if fields is None:
+        assert info is None
+        return
+    for key, value in fields.items():
+        assert info[key] == value
+
+
+def test_ssr_page_remembers_winning_selectors(memo):
+    extract_from_html(_html("ssr_product.html"), URL)
+    assert memo.snapshot()["shop.example"]["price"] == ".product-price"
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from backend.services.structured_data import format_price, from_parts, guess_currency, parse_price
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("1299", 1299.0),
+        ("1 299 ₽", 1299.0),
+        ("1\u00a0299 ₽", 1299.0),
+        ("1\u202f299,00 ₽", 1299.0),
+        ("1 299,00 ₽", 1299.0),
+        ("1,299.00 $", 1299.0),
+        ("1.299,50 €", 1299.5),
+        ("1'299.90 CHF", 1299.9),
+        ("1,299", 1299.0),
+        ("1.299", 1299.0),
+        ("12 990 руб.", 12990.0),
+        ("1 234 567", 1234567.0),
+        ("1299.5", 1299.5),
+        ("12,5", 12.5),
+        ("0.99 USD", 0.99),
+        ("Цена: 4990 ₽", 4990.0),
+        # Старая и новая цена в одном контейнере - берётся первое число
+        ("1 599\n1 299 ₽", 1599.0),
+        ("1 299 1 599", 1299.0),
+        ("1 599 ₽  1 299 ₽", 1599.0),
+        (1299, 1299.0),
+        (12.5, 12.5),
+        ("Нет в наличии", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_parse_price(text, expected):
+    assert parse_price(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("1 299 ₽", "RUB"),
+        ("1299 руб.", "RUB"),
+        ("$19.99", "USD"),
+        ("19,99 €", "EUR"),
+        ("100 usd", "USD"),
+        ("1299", None),
+    ],
+)
+def test_guess_currency(text, expected):
+    assert guess_currency(text) == expected
+
+
+@pytest.mark.parametrize(
+    "value, currency, expected",
+    [(1299.0, "RUB", "1299 RUB"), (12.5, "EUR", "12.50 EUR"), (990.0, None, "990")],
+)
+def test_format_price(value, currency, expected):
+    assert format_price(value, currency) == expected
+
+
+def test_from_parts_prefers_jsonld_and_resolves_image():
+    jsonld = json.dumps({
+        "@context": "https://schema.org",
+        "@graph": [
+            {"@type": "BreadcrumbList"},
+            {
+                "@type": "Product",
+                "name": "Сумка Aurora",
+                "image": ["/img/1.jpg"],
+                "offers": [{"@type": "Offer", "price": "4990.00", "priceCurrency": "RUB"}],
+            },
+        ],
+    })
+    result = from_parts([jsonld], {"og:title": "Магазин"}, {"description": "Кожа"}, "https://shop.ru/p/1")
+    assert result["title"] == "Сумка Aurora"
+    assert result["price_value"] == 4990.0
+    assert result["currency"] == "RUB"
+    assert result["price"] == "4990 RUB"
+    assert result["image_url"] == "https://shop.ru/img/1.jpg"
+    assert result["description"] == "Кожа"
+    assert result["structured"] == ["title", "price", "image_url", "description"]
+
+
+def test_from_parts_drops_unparseable_price():
+    result = from_parts([], {"og:title": "Сумка", "product:price:amount": "по запросу"}, {}, "https://shop.ru/")
+    assert "price" not in result and "price_value" not in result
+    assert result["structured"] == ["title"]
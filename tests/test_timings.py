@@ -0,0 +1,98 @@
+import pytest
+
+from backend.services.timings import (
+    BUCKETS_MS,
+    _Histogram,
+    record,
+    reset_histograms,
+    span,
+    timeline_scope,
+    timing_histograms,
+)
+
+
+def _histogram(*values):
+    histogram = _Histogram()
+    for value in values:
+        histogram.observe(value, error=False)
+    return histogram
+
+
+def test_empty_histogram():
+    histogram = _Histogram()
+    assert histogram.quantile(0.5) == 0.0
+    assert histogram.quantile(0.99) == 0.0
+    summary = histogram.summary()
+    assert summary["count"] == 0
+    assert summary["mean_ms"] == 0.0
+    assert summary["p50_ms"] == summary["p95_ms"] == summary["p99_ms"] == 0.0
+    assert sum(summary["buckets"].values()) == 0
+
+
+@pytest.mark.parametrize(
+    "value, bucket",
+    [
+        (0.0, "le_5"),
+        (5.0, "le_5"),      # граница входит в корзину
+        (5.01, "le_10"),
+        (60000.0, "le_60000"),
+        (60000.5, "inf"),
+    ],
+)
+def test_bucket_edges(value, bucket):
+    summary = _histogram(value).summary()
+    assert summary["buckets"][bucket] == 1
+    assert sum(summary["buckets"].values()) == 1
+
+
+@pytest.mark.parametrize(
+    "values, q, expected",
+    [
+        ([1.0] * 10, 0.5, 5.0),
+        ([5.0] * 50 + [100.0] * 50, 0.5, 5.0),
+        ([5.0] * 50 + [100.0] * 50, 0.51, 100.0),
+        ([5.0] * 94 + [2000.0] * 6, 0.95, 2500.0),
+        ([5.0] * 99 + [70000.0], 0.99, 5.0),
+        # Последняя корзина не ограничена - отдаём максимум
+        ([5.0] * 98 + [70000.0, 91234.56], 0.99, 91234.6),
+        ([7.0], 0.0, 10.0),
+    ],
+)
+def test_quantile_is_upper_bound_of_bucket(values, q, expected):
+    assert _histogram(*values).quantile(q) == expected
+
+
+def test_summary():
+    histogram = _Histogram()
+    for value in (3.0, 12.0, 30.0, 400.0):
+        histogram.observe(value, error=False)
+    histogram.observe(1500.0, error=True)
+    summary = histogram.summary()
+    assert summary["count"] == 5
+    assert summary["errors"] == 1
+    assert summary["total_ms"] == 1945.0
+    assert summary["mean_ms"] == 389.0
+    assert summary["max_ms"] == 1500.0
+    assert summary["p50_ms"] == 50.0
+    assert summary["p95_ms"] == summary["p99_ms"] == 2500.0
+    assert list(summary["buckets"]) == [f"le_{bound}" for bound in BUCKETS_MS] + ["inf"]
+
+
+def test_span_feeds_histogram_and_timeline():
+    reset_histograms()
+    with timeline_scope() as timeline:
+        with span("outer"):
+            with pytest.raises(ValueError):
+                with span("inner", tier="static"):
+                    raise ValueError
+        record("host_slot_wait", 12.5)
+    stages = timing_histograms()
+    assert stages["inner"]["errors"] == 1
+    assert stages["outer"]["count"] == 1
+    spans = {entry["stage"]: entry for entry in timeline.spans()}
+    # Глубина - число объемлющих span
+    assert spans["inner"]["depth"] == 1 and spans["inner"]["tier"] == "static" and spans["inner"]["error"]
+    assert spans["outer"]["depth"] == 0
+    assert spans["host_slot_wait"]["duration_ms"] == 12.5
+    reset_histograms()
+    assert timing_histograms() == {}
@@ -0,0 +1,78 @@
+import pytest
+
+from backend.config import settings
+from backend.services.watchlist import Watchlist, WatchMonitor, fingerprint
+
+PAYLOAD = {
+    "url": "https://shop.ru/p/1",
+    "product_name": "Сумка Aurora",
+    "price": "4 990 ₽",
+    "price_value": 4990.0,
+    "description": "Натуральная кожа",
+    "image_url": "https://shop.ru/1.jpg",
+    "parsing_status": "success",
+    "parsed_at": "2024-01-01T00:00:00",
+}
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [
+        ("product_name", "Сумка Aurora Mini"),
+        ("price", "3 990 ₽"),
+        ("price_value", 3990.0),
+        ("description", "Экокожа"),
+        ("image_url", "https://shop.ru/2.jpg"),
+    ],
+)
+def test_fingerprint_changes_with_tracked_field(field, value):
+    assert fingerprint({**PAYLOAD, field: value}) != fingerprint(PAYLOAD)
+
+
+def test_fingerprint_ignores_volatile_fields():
+    assert fingerprint({**PAYLOAD, "parsed_at": "2024-02-01T00:00:00", "nav_ms": 812}) == fingerprint(PAYLOAD)
+
+
+@pytest.fixture
+def watchlist(make_store, monkeypatch):
+    monkeypatch.setattr(settings, "watch_min_interval", 60.0)
+    monkeypatch.setattr(settings, "watch_max_interval", 86400.0)
+    return make_store(Watchlist, "watch_file")
+
+
+def test_name_change_shortens_interval(watchlist):
+    watchlist.add(PAYLOAD["url"], interval=3600)
+    watchlist.record_check(PAYLOAD["url"], PAYLOAD)
+    grown = watchlist.get(PAYLOAD["url"])
+    assert grown["interval"] == pytest.approx(5400)
+    assert grown["changes"] == 0
+
+    watchlist.record_check(PAYLOAD["url"], {**PAYLOAD, "product_name": "Сумка Aurora Mini"})
+    changed = watchlist.get(PAYLOAD["url"])
+    assert changed["changes"] == 1
+    assert changed["interval"] == pytest.approx(2700)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fails", [False, True])
+async def test_monitor_records_each_check_once(watchlist, monkeypatch, fails):
+    watchlist.add(PAYLOAD["url"], interval=3600)
+    calls = []
+
+    def record_check(url, data, error=None):
+        calls.append((data, error))
+        raise OSError("database is locked")
+
+    monkeypatch.setattr(watchlist, "record_check", record_check)
+
+    async def runner(url, analyze):
+        if fails:
+            raise RuntimeError("timeout")
+        return PAYLOAD
+
+    monitor = WatchMonitor(watchlist)
+    monitor._runner = runner
+    await monitor._check(PAYLOAD["url"], False)
+    expected = (None, "timeout") if fails else (PAYLOAD, None)
+    assert calls == [expected]
+    assert monitor._running == {}